@@ -1,15 +1,76 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv() #una sola vez y antes de importar los servicios (leen la config al importarse)
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import cv_router
-from dotenv import load_dotenv
+from app.services.extraction_executor import get_extraction_executor
+from app.services.pdf_processor import PDFProcessor
+from app.services import metrics
+
+#Estado del precalentamiento en segundo plano (se ve en /health)
+_warmup = {"status": "pending", "seconds": None}
 
-load_dotenv()
+async def _prewarm() -> None:
+    """
+    Carga lo pesado después de que el server ya atiende: SDK de openai + conexión,
+    PyPDF2 en los workers de extracción y las firmas del índice de similitud.
+    Sin esto se carga igual, pero lo paga el primer roast
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    _warmup["status"] = "running"
+    try:
+        #primero los workers: así el fork no pasa mientras otro thread está importando openai
+        await get_extraction_executor().warmup(PDFProcessor.preload)
+        await asyncio.gather(
+            cv_router.roast_generator.ai_service.warmup(), #conexión a OpenAI lista en el pool
+            cv_router.roast_generator.load_similarity()
+        )
+        _warmup["status"] = "done"
+    except Exception as e:
+        print(f"Error en el precalentamiento: {str(e)}")
+        _warmup["status"] = "failed"
+    _warmup["seconds"] = round(loop.time() - start, 3)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup liviano: solo lo que tiene que estar antes del primer request.
+    Lo pesado va en un task de fondo (PREWARM=0 lo desactiva y todo se carga a demanda)
+    """
+    get_extraction_executor().start() #el pool arranca los procesos recién con el primer job
+    cv_router.job_queue.start() #workers del modo async
+    await cv_router.roast_generator.start() #backend compartido de roasts (SQLite/Redis)
+    
+    warmup_task = None
+    if os.getenv("PREWARM", "1") == "1":
+        warmup_task = asyncio.create_task(_prewarm())
+    else:
+        _warmup["status"] = "disabled"
+        await cv_router.roast_generator.load_similarity()
+    
+    yield
+    
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await cv_router.job_queue.stop()
+    get_extraction_executor().shutdown()
+    await cv_router.roast_generator.ai_service.close()
+    await cv_router.roast_generator.close()
 
 app = FastAPI(
     title="Resume Roaster API",
     description="API que destruye CVs con humor y feedback constructivo",
     version="1.0.0",
     docs_url="/docs",
+    lifespan=lifespan,
 )
 
 # Configurar CORS para conectar con el frontend
@@ -36,10 +97,26 @@ async def root():
         "endpoints": {
             "docs": "/docs",
             "upload": "/api/v1/upload-cv",
-            "roast": "/api/v1/roast/{roast_id}"
+            "roast": "/api/v1/roast/{roast_id}",
+            "metrics": "/metrics"
         }
     }
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "resume-roaster-api"}
\ No newline at end of file
+    store_stats = cv_router.roast_store.get_stats()
+    return {
+        "status": "healthy",
+        "service": "resume-roaster-api",
+        "warmup": _warmup,
+        "store": {
+            "hit_rate": store_stats["hit_rate"],
+            "evictions": store_stats["evictions"],
+            "resident_bytes": store_stats["resident_bytes"]
+        }
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Métricas en formato Prometheus (tiempos por etapa, cache, tokens, requests en vuelo)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
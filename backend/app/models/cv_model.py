@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 #Respuesta del upload
@@ -18,6 +18,13 @@ class RoastResult(BaseModel):
     processing_time: float  # segundos
     created_at: datetime
     
+#Estado de un roast procesado en modo async
+class JobStatus(BaseModel):
+    roast_id: str
+    processing_status: str  # queued | extracting | roasting | done | failed
+    error: Optional[str] = None
+    fast_roast: Optional[Dict[str, Any]] = None  # roast local mientras se espera al LLM
+
 #Errores
 class ErrorResponse(BaseModel):
     error: str
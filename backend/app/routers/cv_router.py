@@ -1,44 +1,123 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import asyncio
+import json
+import os
 import time
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, Optional
 
-from app.models.cv_model import UploadResponse, RoastResult, ErrorResponse
+from app.models.cv_model import UploadResponse, RoastResult, ErrorResponse, JobStatus
 from app.services.roast_generator import RoastGenerator
+from app.services.job_queue import Job, JobQueue, QueueFullError, FINAL_STATES, FAILED
+from app.services.upload_ingest import IngestedFile, UploadRejectedError, read_uploads
+from app.services.batch_processor import BatchProcessor
+from app.services.admission import RateLimitedError
+from app.services.ai_service import CapacityExceededError
+from app.services.extraction_executor import ExtractionTimeoutError, get_extraction_executor
+from app.services.metrics import Gauge, StageTimer
+from app.services.model_router import MOCK
+from app.services.roast_export import csv_lines, export_row, ndjson_lines
 
 router = APIRouter()
  
 roast_generator = RoastGenerator() #instancia global del generador (se usa entre requests)
-roast_storage: Dict[str, Dict[str, Any]] = {} #storage en memoria para los resultados (temporal)
+roast_store = roast_generator.store #store único de resultados (LRU + TTL + límite en bytes)
+admission = roast_generator.admission #token bucket + fair queuing por cliente
 
-@router.post("/upload-cv", response_model=UploadResponse)
-async def upload_cv(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def _run_roast_job(job: Job) -> None:
+    """Procesa un CV encolado en modo async; el resultado queda bajo el id del job (o como alias si salió del cache)"""
+    timer = job.timer if job.timer is not None else StageTimer()
+    timer.add("queue_wait", time.time() - job.created_at)
+    await roast_generator.process_cv_file(
+        job.file_content, job.filename, on_stage=job.set_stage, file_digest=job.file_digest, timer=timer,
+        on_preview=job.set_preview, client=job.client, rate_limit=False, #el token se cobró al encolar
+        roast_id=job.job_id
+    )
+
+job_queue = JobQueue(_run_roast_job) #cola interna para el modo async
+batch_processor = BatchProcessor(roast_generator) #uploads de muchos CVs (varios archivos o un zip)
+
+#gauges para /metrics: se leen de las stats al momento del scrape
+Gauge("cv_roast_llm_in_flight", "Completions al LLM en curso", lambda: roast_generator.ai_service.get_stats()["in_flight"])
+Gauge("cv_roast_llm_breaker_open", "1 si el circuit breaker del backend del LLM está abierto",
+      lambda: {(backend.name,): 1 if backend.breaker.state == "open" else 0
+               for backend in roast_generator.ai_service.router.backends if backend.kind != MOCK},
+      ("backend",))
+Gauge("cv_roast_in_flight", "CVs procesándose (single-flight)", lambda: roast_generator.get_cache_stats()["in_flight"])
+Gauge("cv_roast_jobs_queued", "Jobs esperando en la cola del modo async", lambda: job_queue.get_stats()["queued"])
+Gauge("cv_roast_batch_in_flight", "CVs de uploads batch procesándose", lambda: batch_processor.get_stats()["in_flight"])
+Gauge("cv_roast_extraction_queue_depth", "Extracciones esperando un worker",
+      lambda: get_extraction_executor().get_stats()["queue_depth"])
+Gauge("cv_roast_store_entries", "Roasts en el store en memoria", lambda: len(roast_store))
+Gauge("cv_roast_store_resident_bytes", "Bytes ocupados por el store en memoria",
+      lambda: roast_store.get_stats()["resident_bytes"])
+Gauge("cv_roast_admission_queue_depth", "CVs esperando lugar por cliente", admission.queue_depths, ("client",))
+Gauge("cv_roast_admission_in_service", "CVs procesándose por cliente", admission.in_service, ("client",))
+
+#los resultados no cambian: browsers y CDNs pueden guardarlos (un DELETE tarda hasta max-age en verse afuera)
+_ROAST_CACHE_CONTROL = f"public, max-age={int(os.getenv('ROAST_HTTP_MAX_AGE', '3600'))}, immutable"
+
+#el body se lee en streaming (read_uploads), así que documentamos el form a mano
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}}
+        }}}
+    }
+}
+
+@router.post("/upload-cv", response_model=UploadResponse, openapi_extra=_UPLOAD_OPENAPI)
+async def upload_cv(
+    request: Request,
+    async_mode: bool = Query(False, alias="async", description="Encolar y devolver el roast_id sin esperar el roast")
+):
     """
     Endpoint principal: sube un CV y devuelve el roast
-    Procesa todo en el momento (no background job)
+    Por defecto procesa todo en el momento; con ?async=true encola el CV y
+    devuelve el roast_id enseguida (consultar GET /roast/{id} o /roast/{id}/events)
+    Si el cliente (X-API-Key o IP) se pasa de su cuota responde 429 con Retry-After;
+    un CV que ya está en cache no cuenta
     """
     start_time = time.time()
+    client = admission.identify(request)
     
     try:
-        if not file:
-            raise HTTPException(status_code=400, detail="No se subió ningún archivo")        
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="Archivo sin nombre")
-        
-        #validar extensión
-        allowed_extensions = ['.pdf', '.doc', '.docx']
-        if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
-            raise HTTPException(status_code=400, detail="Formato no soportado. Solo PDF, DOC, DOCX"           )
+        file = await _read_upload(request)
+        timer = _upload_timer(file)
         
-        file_content = await file.read()
-        
-        if len(file_content) == 0:
-            raise HTTPException(status_code=400, detail="El archivo está vacío")
+        if async_mode:
+            #un re-upload que ya está en cache se responde enseguida y no gasta cuota (igual que en modo sync)
+            cached_result = await roast_generator.lookup_file(file.digest, timer)
+            if cached_result is not None:
+                timer.finish()
+                return UploadResponse(
+                    roast_id=cached_result["roast_id"], message="¡CV roasteado exitosamente! 🔥",
+                    processing_status="completed", estimated_time=0
+                )
+            charged = roast_generator.charge(client, file.digest)
+            try:
+                job = job_queue.submit(
+                    roast_generator.generate_roast_id(), file.content, file.filename, file.digest, timer=timer,
+                    client=client
+                )
+            except QueueFullError:
+                if charged:
+                    admission.refund(client) #no se encoló: el token no se gastó
+                raise
+            return UploadResponse(
+                roast_id=job.job_id, message="CV en la cola. Ya lo estamos prendiendo fuego 🔥",
+                processing_status=job.status,
+                estimated_time=int(roast_generator.ai_service.get_stats()["avg_latency"]) + 1
+            )
         
         #procesamos el cv (extraer texto + generar roast)
-        result = await roast_generator.process_cv_file(file_content, file.filename)
-        
-        roast_storage[result["roast_id"]] = result #guardamos el resultado en memoria temporal
+        result = await roast_generator.process_cv_file(
+            file.content, file.filename, file_digest=file.digest, timer=timer, client=client
+        ) #queda guardado en el store
         
         total_time = time.time() - start_time #cerramos tiempo
         
@@ -51,30 +130,161 @@ async def upload_cv(background_tasks: BackgroundTasks, file: UploadFile = File(.
         raise
         
     except Exception as e:
-        print(f"Error inesperado: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error procesando tu CV: {str(e)}")
+        raise _processing_error(e)
 
-@router.get("/roast/{roast_id}", response_model=RoastResult)
-async def get_roast(roast_id: str):
-    """Obtiene el resultado de un roast por ID"""
+@router.post("/upload-cv/stream", openapi_extra=_UPLOAD_OPENAPI)
+async def upload_cv_stream(request: Request):
+    """
+    Sube un CV y devuelve el roast en streaming (server-sent events):
+    "fast_roast" con el análisis local apenas se extrae el texto, "roast" apenas está listo,
+    un "feedback" por cada punto y "done" con el resultado completo.
+    "replace" (roast + feedback) indica que lo recibido no pasó la validación: el cliente tiene que
+    descartarlo y mostrar ese contenido, que es el mismo que trae "done".
+    "error" indica que el roast falló a mitad de camino: lo recibido hasta ahí se descarta
+    """
     try:
-        if roast_id not in roast_storage:
-            #intentar buscar en cache del generator
-            try:
-                result = roast_generator.get_roast_by_id(roast_id)
-                roast_storage[roast_id] = result #sincronizar storages con el faltante
-            except ValueError:
-                raise HTTPException(status_code=404,detail="Roast no encontrado. Puede haber expirado.")
-        
-        result = roast_storage[roast_id]
-        return RoastResult(
-            roast_id=result["roast_id"],
-            roast_text=result["roast_text"],
-            feedback_points=result["feedback_points"],
-            brutality_level=result["brutality_level"],
-            processing_time=result["processing_time"],
-            created_at=result["created_at"]
+        file = await _read_upload(request)
+        events = roast_generator.stream_cv_file(
+            file.content, file.filename, file_digest=file.digest, timer=_upload_timer(file),
+            client=admission.identify(request)
         )
+        first_event = await events.__anext__() #errores de validación/extracción/capacidad salen como HTTP
+        
+    except HTTPException:
+        raise
+        
+    except Exception as e:
+        raise _processing_error(e)
+    
+    async def stream():
+        try:
+            event = first_event
+            while True:
+                if event["type"] == "result":
+                    yield _sse("done", RoastResult(**event["data"]).model_dump(mode="json"))
+                    return
+                yield _sse(event["type"], event)
+                event = await events.__anext__()
+        except StopAsyncIteration:
+            return
+        except Exception as e:
+            print(f"Error en el streaming del roast: {str(e)}")
+            yield _sse("error", {"error": "Error procesando tu CV", "message": str(e)})
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+_BATCH_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["files"],
+            "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}}
+        }}}
+    }
+}
+
+@router.post("/upload-cv/batch", openapi_extra=_BATCH_OPENAPI)
+async def upload_cv_batch(
+    request: Request,
+    concurrency: Optional[int] = Query(None, ge=1, description="CVs en paralelo (tope: BATCH_CONCURRENCY)")
+):
+    """
+    Sube muchos CVs de una (PDF/DOCX en el campo "files", o uno o más .zip con los CVs adentro)
+    y devuelve NDJSON: una línea por archivo apenas termina (completed / duplicate / failed)
+    y una última línea "summary". Los roasts quedan guardados como los de /upload-cv
+    El batch cuenta como un solo upload para la cuota del cliente; sus CVs hacen fila por turnos
+    con los de los demás clientes
+    """
+    client = admission.identify(request)
+    try:
+        admission.check_rate(client) #antes de leer hasta 100MB
+        files = await read_uploads(
+            request, field="files", max_files=batch_processor.max_files,
+            max_bytes=batch_processor.max_bytes, max_total_bytes=batch_processor.max_bytes, allow_zip=True,
+            per_file_errors=True #un archivo que no es CV falla solo su línea
+        )
+        items = await asyncio.to_thread(batch_processor.expand, files) #descomprimir y hashear hasta 100MB, fuera del loop
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except RateLimitedError as e:
+        raise _processing_error(e)
+    
+    async def stream():
+        results = batch_processor.run(items, concurrency, client)
+        try:
+            async for line in results:
+                yield json.dumps(line) + "\n"
+        except Exception as e:
+            print(f"Error en el batch: {str(e)}")
+            yield json.dumps({"type": "error", "error": "Error procesando el batch", "message": str(e)}) + "\n"
+        finally:
+            await results.aclose()
+    
+    return StreamingResponse(
+        stream(), media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _read_upload(request: Request) -> IngestedFile:
+    """Lee y valida el archivo subido en streaming (tamaño, tipo real y hash)"""
+    try:
+        files = await read_uploads(request, field="file", max_files=1)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    return files[0]
+
+def _upload_timer(file: IngestedFile) -> StageTimer:
+    """Arranca los tiempos por etapa del request con lo que tardó el upload"""
+    timer = StageTimer()
+    timer.add("upload_read", max(0.0, file.read_seconds - file.hash_seconds))
+    timer.add("hash", file.hash_seconds)
+    return timer
+
+def _processing_error(e: Exception) -> HTTPException:
+    """Traduce un error del pipeline a la respuesta HTTP correspondiente"""
+    if isinstance(e, RateLimitedError):
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    if isinstance(e, (CapacityExceededError, QueueFullError)):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    if isinstance(e, ExtractionTimeoutError):
+        return HTTPException(status_code=422, detail="El archivo tardó demasiado en procesarse. Probá con otro PDF/DOCX")
+    
+    print(f"Error inesperado: {str(e)}")
+    return HTTPException(status_code=500, detail=f"Error procesando tu CV: {str(e)}")
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/roast/{roast_id}", response_model=RoastResult,
+            responses={202: {"model": JobStatus, "description": "El roast todavía se está procesando"}})
+async def get_roast(roast_id: str, request: Request):
+    """
+    Obtiene el resultado de un roast por ID (202 con el estado si sigue en proceso)
+    La respuesta sale ya serializada del store, con ETag: con If-None-Match devuelve 304
+    """
+    try:
+        response = await roast_generator.get_roast_response(roast_id)
+        
+        if response is None:
+            job = job_queue.get(roast_id)
+            if job is not None and job.status == FAILED:
+                raise HTTPException(status_code=422, detail=job.error or "No se pudo procesar el CV")
+            if job is not None and job.status not in FINAL_STATES:
+                return JSONResponse(status_code=202, content=job.to_dict(), headers={"Cache-Control": "no-store"})
+            raise HTTPException(status_code=404,detail="Roast no encontrado. Puede haber expirado.")
+        
+        body, etag = response
+        headers = {"ETag": etag, "Cache-Control": _ROAST_CACHE_CONTROL}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
         
     except HTTPException:
         raise
@@ -83,22 +293,62 @@ async def get_roast(roast_id: str):
         print(f"Error obteniendo roast: {str(e)}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match usa comparación débil: "*", o alguno de la lista con o sin W/"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+@router.get("/roast/{roast_id}/events")
+async def get_roast_events(roast_id: str):
+    """Server-sent events con las etapas del roast (queued, extracting, roasting, done/failed)"""
+    job = job_queue.get(roast_id)
+    
+    if job is None:
+        if await roast_generator.get_roast(roast_id) is None:
+            raise HTTPException(status_code=404, detail="Roast no encontrado")
+        events = _single_event({"roast_id": roast_id, "status": "done"})
+    else:
+        events = job.subscribe()
+    
+    async def stream():
+        async for event in events:
+            yield _sse(event["status"], event)
+    
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _single_event(event: Dict[str, Any]):
+    yield event
+
 @router.get("/roast/{roast_id}/stats")
 async def get_roast_stats(roast_id: str):
     """Obtiene estadísticas adicionales de un roast"""
     try:
-        if roast_id not in roast_storage:
+        result = await roast_generator.get_roast(roast_id)
+        if result is None:
             raise HTTPException(status_code=404, detail="Roast no encontrado")
         
-        result = roast_storage[roast_id]
-        
         return {
             "roast_id": roast_id,
             "brutality_level": result["brutality_level"],
             "processing_time": result["processing_time"],
             "feedback_count": result["feedback_count"],
             "cv_length": result.get("cv_length", 0),
+            "cv_tokens_original": result.get("cv_tokens_original"),
+            "cv_tokens": result.get("cv_tokens"),
+            "cv_truncated": result.get("cv_truncated", False),
+            "input_tokens": result.get("input_tokens"),
+            "input_tokens_estimated": result.get("input_tokens_estimated", True),
             "from_cache": result.get("from_cache", False),
+            "fallback": result.get("fallback"),
+            "route": result.get("route"),
+            "similar_to": result.get("similar_to"),
+            "similarity": result.get("similarity"),
+            "stages_ms": result.get("stages_ms", {}),
             "created_at": result["created_at"]
         }
         
@@ -112,8 +362,7 @@ async def get_roast_stats(roast_id: str):
 async def delete_roast(roast_id: str):
     """Elimina un roast del storage (para limpiar memoria)"""
     try:
-        if roast_id in roast_storage:
-            del roast_storage[roast_id]
+        if await roast_generator.delete_roast(roast_id):
             return {"message": f"Roast {roast_id} eliminado"}
         else:
             raise HTTPException(status_code=404, detail="Roast no encontrado")
@@ -134,12 +383,22 @@ async def health_check():
         return {
             "status": "healthy",
             "service": "cv-router",
-            "active_roasts": len(roast_storage),
+            "active_roasts": len(roast_store),
             "cache_stats": cache_stats,
+            "store": roast_store.get_stats(),
+            "extraction": get_extraction_executor().get_stats(),
+            "text_cache": roast_generator.pdf_processor.get_text_cache_stats(),
+            "llm": roast_generator.ai_service.get_stats(),
+            "jobs": job_queue.get_stats(),
+            "batch": batch_processor.get_stats(),
+            "admission": admission.get_stats(),
             "endpoints": {
                 "upload": "/api/v1/upload-cv",
+                "upload_stream": "/api/v1/upload-cv/stream",
+                "upload_batch": "/api/v1/upload-cv/batch",
                 "get_roast": "/api/v1/roast/{roast_id}",
-                "stats": "/api/v1/roast/{roast_id}/stats"
+                "stats": "/api/v1/roast/{roast_id}/stats",
+                "events": "/api/v1/roast/{roast_id}/events"
             }
         }
         
@@ -153,13 +412,72 @@ async def health_check():
 async def clear_storage():
     """Limpia todo el storage temporal"""
     try:
-        cleared_count = len(roast_storage)
-        roast_storage.clear()
+        cleared_count = await roast_generator.clear_roasts()
         
         return {
             "message": f"Storage limpiado. {cleared_count} roasts eliminados.",
-            "remaining_roasts": len(roast_storage)
+            "remaining_roasts": len(roast_store)
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Error limpiando storage")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error limpiando storage")
+
+@router.get("/admin/roasts")
+async def list_roasts(
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(100, ge=1, le=1000),
+    since: Optional[datetime] = Query(None, description="created_at desde (inclusive)"),
+    until: Optional[datetime] = Query(None, description="created_at hasta (exclusive)")
+):
+    """
+    Lista paginada de los roasts guardados (una fila resumen por roast, sin texto).
+    Seguir pidiendo con cursor=next_cursor hasta que venga null
+    """
+    try:
+        results, next_cursor = await roast_generator.list_roasts(cursor, limit, _timestamp(since), _timestamp(until))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    except Exception as e:
+        print(f"Error listando roasts: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error listando roasts")
+
+    return {"items": [export_row(result) for result in results], "next_cursor": next_cursor}
+
+@router.get("/admin/roasts/export")
+async def export_roasts(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None, description="created_at desde (inclusive)"),
+    until: Optional[datetime] = Query(None, description="created_at hasta (exclusive)")
+):
+    """
+    Exporta los roasts guardados (NDJSON o CSV) en streaming: se leen página por página del
+    store/backend, así que la memoria no crece con la cantidad de roasts
+    """
+    results = roast_generator.iter_roasts(_timestamp(since), _timestamp(until))
+    lines = csv_lines(results) if format == "csv" else ndjson_lines(results)
+
+    async def stream():
+        try:
+            async for line in lines:
+                yield line
+        except Exception as e:
+            #el status ya salió: cortamos el archivo (en NDJSON con una línea de error)
+            print(f"Error exportando roasts: {str(e)}")
+            if format == "ndjson":
+                yield json.dumps({"type": "error", "error": "Error exportando roasts", "message": str(e)}) + "\n"
+        finally:
+            await lines.aclose()
+            await results.aclose()
+
+    return StreamingResponse(
+        stream(), media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="roasts.{format}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    """Los created_at se guardan en hora local sin zona: un datetime sin zona se interpreta igual"""
+    return value.timestamp() if value is not None else None
@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.requests import HTTPConnection
+
+from app.services.metrics import Counter, StageTimer
+
+ADMISSION_DECISIONS = Counter(
+    "cv_roast_admission_total", "Decisiones de admisión para trabajo caro (extracción + LLM)", ("result",)
+)
+
+
+class RateLimitedError(Exception):
+    """El cliente superó su cuota o su cola; el cliente debe reintentar más tarde (429)"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _ClientState:
+    __slots__ = ("weight", "tokens", "updated", "queued", "in_service", "last_finish",
+                 "admitted", "rate_limited", "queue_full")
+
+    def __init__(self, weight: float, burst: float):
+        self.weight = weight
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.queued = 0
+        self.in_service = 0
+        self.last_finish = 0.0 #tag virtual del último trabajo encolado (fair queuing)
+        self.admitted = 0
+        self.rate_limited = 0
+        self.queue_full = 0
+
+
+class AdmissionController:
+    """
+    Admisión por cliente delante del trabajo caro (extracción + LLM); los cache hits y los
+    GET no pasan por acá.
+    - Token bucket por cliente: `rate` CVs nuevos por segundo (x peso) con ráfagas de hasta `burst`.
+    - Weighted fair queuing sobre `slots` lugares: cuando están todos ocupados cada cliente espera
+      en su cola y los lugares se reparten por turnos según el peso, así un cliente con 100 CVs
+      encolados no hace esperar a uno que manda 1.
+    - Sin tokens, o con la cola del cliente llena: RateLimitedError (429 con Retry-After).
+    Cliente = API key conocida (header X-API-Key) o IP.
+    Config (variables de entorno):
+        ADMISSION_SLOTS: CVs procesándose a la vez (default: OPENAI_MAX_CONCURRENCY o 16)
+        ADMISSION_RATE / ADMISSION_BURST: CVs nuevos por segundo y ráfaga por cliente (default: 0 = sin cuota / 10).
+            Ojo con clientes detrás de un NAT o proxy compartido: todos cuentan como la misma IP
+        ADMISSION_MAX_QUEUE: CVs esperando como máximo por cliente (default: 20)
+        ADMISSION_API_KEYS: claves reconocidas con su peso, "clave1=4,clave2=1" (una clave no
+            listada cuenta como su IP)
+        ADMISSION_TRUST_PROXY: si es 1, la IP sale del primer X-Forwarded-For (default: 0)
+        ADMISSION_MAX_CLIENTS: clientes inactivos que se recuerdan (default: 10000)
+    """
+
+    def __init__(self, slots: int = None, rate: float = None, burst: float = None, max_queue: int = None):
+        self.slots = slots or int(os.getenv("ADMISSION_SLOTS", os.getenv("OPENAI_MAX_CONCURRENCY", "16")))
+        self.rate = rate if rate is not None else float(os.getenv("ADMISSION_RATE", "0"))
+        self.burst = burst if burst is not None else float(os.getenv("ADMISSION_BURST", "10"))
+        self.max_queue = max_queue or int(os.getenv("ADMISSION_MAX_QUEUE", "20"))
+        self.trust_proxy = os.getenv("ADMISSION_TRUST_PROXY", "0") == "1"
+        self.max_clients = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+
+        #API key -> (id del cliente, peso); el id no expone la clave en métricas/stats
+        self._keys: Dict[str, Tuple[str, float]] = {}
+        for item in filter(None, (part.strip() for part in os.getenv("ADMISSION_API_KEYS", "").split(","))):
+            key, _, weight = item.partition("=")
+            client = "key:" + hashlib.sha256(key.encode()).hexdigest()[:12]
+            self._keys[key] = (client, float(weight or 1))
+        self._weights = dict(self._keys.values())
+
+        self._clients: "OrderedDict[str, _ClientState]" = OrderedDict()
+        self._free = self.slots
+        self._waiting: List[Tuple[float, int, str, asyncio.Future]] = [] #heap por tag virtual
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._avg_service = 5.0 #promedio móvil (segundos) de un CV admitido, para el Retry-After
+
+    def identify(self, connection: HTTPConnection) -> str:
+        """Id del cliente: API key reconocida o IP"""
+        key = connection.headers.get("x-api-key")
+        if key and key in self._keys:
+            return self._keys[key][0]
+        if self.trust_proxy and connection.headers.get("x-forwarded-for"):
+            return "ip:" + connection.headers["x-forwarded-for"].split(",")[0].strip()
+        return "ip:" + (connection.client.host if connection.client else "unknown")
+
+    def _state(self, client: str) -> _ClientState:
+        state = self._clients.get(client)
+        if state is None:
+            state = self._clients[client] = _ClientState(self._weights.get(client, 1.0), self.burst)
+            self._forget_idle()
+        else:
+            self._clients.move_to_end(client)
+        return state
+
+    def _forget_idle(self) -> None:
+        """Acota la memoria: olvida los clientes inactivos más viejos (su bucket vuelve a estar lleno)"""
+        for client in list(self._clients):
+            if len(self._clients) <= self.max_clients:
+                return
+            state = self._clients[client]
+            if not state.queued and not state.in_service:
+                del self._clients[client]
+
+    def check_rate(self, client: str) -> None:
+        """Consume un token del cliente; sin tokens levanta RateLimitedError con el tiempo hasta el próximo"""
+        if self.rate <= 0:
+            return
+        state = self._state(client)
+        now = time.monotonic()
+        rate = self.rate * state.weight
+        state.tokens = min(self.burst, state.tokens + (now - state.updated) * rate)
+        state.updated = now
+        if state.tokens >= 1:
+            state.tokens -= 1
+            return
+        state.rate_limited += 1
+        ADMISSION_DECISIONS.inc(1, "rate_limited")
+        raise RateLimitedError(
+            "Demasiados CVs seguidos. Esperá un momento antes de subir otro",
+            retry_after=max(1, math.ceil((1 - state.tokens) / rate))
+        )
+
+    def refund(self, client: str) -> None:
+        """Devuelve el token de un CV que se cobró pero no se llegó a procesar (ej: la cola estaba llena)"""
+        if self.rate <= 0:
+            return
+        state = self._state(client)
+        state.tokens = min(self.burst, state.tokens + 1)
+
+    async def acquire(self, client: str) -> None:
+        """Espera un lugar para procesar (por turnos entre clientes); con la cola del cliente llena rechaza"""
+        state = self._state(client)
+        if self._free > 0 and not self._waiting:
+            self._free -= 1
+            state.in_service += 1
+            state.admitted += 1
+            ADMISSION_DECISIONS.inc(1, "admitted")
+            return
+
+        if state.queued >= self.max_queue:
+            state.queue_full += 1
+            ADMISSION_DECISIONS.inc(1, "queue_full")
+            raise RateLimitedError(
+                "Tenés demasiados CVs esperando. Probá de nuevo en unos segundos",
+                retry_after=max(1, math.ceil(self._avg_service * (state.queued + 1) / self.slots))
+            )
+
+        #fair queuing: el tag avanza 1/peso por trabajo, desde el reloj virtual o desde el último del cliente
+        tag = max(self._virtual_time, state.last_finish) + 1 / state.weight
+        state.last_finish = tag
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (tag, next(self._sequence), client, future))
+        state.queued += 1
+        ADMISSION_DECISIONS.inc(1, "queued")
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                state.queued -= 1 #se fue antes de su turno; _dispatch saltea la entrada
+            else:
+                self.release(client) #le tocó justo cuando se cancelaba: devolvemos el lugar
+            raise
+
+    def release(self, client: str, service_seconds: Optional[float] = None) -> None:
+        state = self._clients.get(client)
+        if state is not None:
+            state.in_service -= 1
+        if service_seconds is not None:
+            self._avg_service = 0.8 * self._avg_service + 0.2 * service_seconds
+        self._free += 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._free > 0 and self._waiting:
+            tag, _, client, future = heapq.heappop(self._waiting)
+            if future.cancelled():
+                continue
+            self._virtual_time = tag
+            state = self._state(client)
+            state.queued -= 1
+            state.in_service += 1
+            state.admitted += 1
+            self._free -= 1
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, client: str, timer: Optional[StageTimer] = None) -> AsyncIterator[None]:
+        """Lugar para procesar un CV mientras dura el bloque (la espera va a la etapa "admission_wait")"""
+        if timer is not None:
+            with timer.stage("admission_wait"):
+                await self.acquire(client)
+        else:
+            await self.acquire(client)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(client, time.monotonic() - start)
+
+    def queue_depths(self) -> Dict[Tuple[str], float]:
+        """CVs esperando por cliente (solo clientes con cola), para /metrics"""
+        return {(client,): state.queued for client, state in self._clients.items() if state.queued}
+
+    def in_service(self) -> Dict[Tuple[str], float]:
+        return {(client,): state.in_service for client, state in self._clients.items() if state.in_service}
+
+    def get_stats(self, top: int = 10) -> Dict[str, Any]:
+        busiest = sorted(
+            self._clients.items(), key=lambda item: (item[1].queued + item[1].in_service, item[1].admitted),
+            reverse=True
+        )[:top]
+        return {
+            "slots": self.slots,
+            "free_slots": self._free,
+            "waiting": sum(state.queued for state in self._clients.values()),
+            "rate": self.rate,
+            "burst": self.burst,
+            "max_queue_per_client": self.max_queue,
+            "clients": len(self._clients),
+            "top_clients": {
+                client: {
+                    "weight": state.weight,
+                    "queued": state.queued,
+                    "in_service": state.in_service,
+                    "admitted": state.admitted,
+                    "rate_limited": state.rate_limited,
+                    "queue_full": state.queue_full
+                }
+                for client, state in busiest
+            }
+        }
@@ -1,50 +1,19 @@
-import openai
 import os
-from typing import Dict, Any
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Any, Optional, Tuple
 import asyncio
-from dotenv import load_dotenv
+from app.services.stream_parser import RoastStreamParser
+from app.services.text_compactor import count_tokens
+from app.services.cv_analyzer import fast_roast
+from app.services.metrics import LLM_TIMEOUTS, LLM_TOKENS, StageTimer
+from app.services.model_router import MOCK, ModelBackend, ModelRouter, Route
 
-load_dotenv()
+_SYSTEM_MESSAGE = "You are a witty, brutal but constructive CV reviewer. Always respond in valid JSON format."
 
-class AIService:
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        
-        if self.api_key:
-            self.client = openai.OpenAI(api_key=self.api_key)
-            self.use_openai = True
-        else:
-            self.client = None
-            self.use_openai = False
-            print("PPENAI_API_KEY no configurada. Usando respuestas simuladas.")
-
-    async def generate_roast_and_feedback(self, cv_text: str) -> Dict[str, Any]:
-        """
-        Genera roast y feedback usando OpenAI o respuesta simulada
-        Args:
-            cv_text: Texto extraído del CV
-        Returns:
-            Dict con roast, feedback y metadata
-        """
-        try:
-            if not self.use_openai:
-                return self._generate_mock_response(cv_text) #respuesta simulada cuando no hay API key
-            
-            roast_prompt = self._create_roast_prompt(cv_text) #creamos el prompt
-            response = await asyncio.to_thread(
-                self._call_openai, 
-                roast_prompt
-            ) #llamamos la api
-                        
-            return self._parse_ai_response(response) #devolvemos la respuesta parseada
-            
-        except Exception as e:
-            print(f"Error con OpenAI, usando respuesta simulada: {str(e)}")
-            return self._generate_mock_response(cv_text)
-
-    def _create_roast_prompt(self, cv_text: str) -> str:
-        """Crea el prompt optimizado para generar el roast, pasando el texto del cv"""
-        return f"""
+#Parte fija del prompt; el texto del CV se agrega al final
+_ROAST_INSTRUCTIONS = """
 You are a brutally honest but constructive CV reviewer with a sharp sense of humor. 
 Your job is to roast this resume while providing actionable feedback.
 
@@ -52,11 +21,8 @@ TONE: Sarcastic, witty, brutally honest, but ultimately helpful
 LANGUAGE: Mix of professional insights with savage humor
 GOAL: Point out flaws in an entertaining way, then provide real solutions
 
-CV TO ROAST:
-{cv_text}
-
 RESPOND IN THIS EXACT JSON FORMAT:
-{{
+{
     "roast": "Your brutal but funny roast here (2-3 sentences max, be savage but not mean-spirited)",
     "feedback": [
         "Specific actionable improvement 1",
@@ -65,7 +31,7 @@ RESPOND IN THIS EXACT JSON FORMAT:
         "Specific actionable improvement 4"
     ],
     "brutality_level": 75
-}}
+}
 
 ROAST EXAMPLES (for inspiration):
 - "This CV reads like it was written during a coffee shop earthquake"
@@ -78,32 +44,507 @@ FEEDBACK SHOULD BE:
 - Focus on: formatting, content, quantification, relevance
 
 Make it hurt (a little) but help them win! 🔥
+
+CV TO ROAST:
 """
 
-    def _call_openai(self, prompt: str) -> str:
-        """Llama a la API de OpenAI"""
+class CapacityExceededError(Exception):
+    """No hay slots libres para otra llamada al LLM; el cliente debe reintentar más tarde"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AIService:
+    """
+    Cliente del LLM con límites de latencia. Cada roast pasa por el ModelRouter, que elige backend
+    (modelo de OpenAI, servidor compatible o mock) y límite de salida; la decisión queda en el resultado.
+    Config (variables de entorno, además de OPENAI_API_KEY / OPENAI_BASE_URL y las de ModelRouter):
+        OPENAI_DEADLINE: segundos máximos por roast, reintentos incluidos (default: 30)
+        OPENAI_MAX_RETRIES: reintentos ante errores reintentables: conexión, 429, 5xx (default: 2)
+        OPENAI_RETRY_BACKOFF: base del backoff exponencial con jitter, en segundos (default: 0.5)
+        OPENAI_HEDGE: si es 1, manda un segundo request cuando el primero supera el p95 (default: 0)
+        OPENAI_BREAKER_FAILURES / OPENAI_BREAKER_RESET: fallas seguidas que abren el breaker de un
+            backend y segundos hasta volver a probar (default: 5 / 30)
+        OPENAI_OVERLOAD_FALLBACK: si es 1, con el governor lleno responde con el fast roast local
+            en vez de rechazar con 503 (default: 0)
+    Sin API key, o cuando el proveedor falla, la respuesta es el fast roast local (cv_analyzer)
+    """
+
+    def __init__(self):
+        #Límites del pool HTTP y de completions en vuelo
+        self.max_concurrency = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+        self.max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", str(self.max_concurrency)))
+        self.queue_timeout = float(os.getenv("OPENAI_QUEUE_TIMEOUT", "0.5"))
+        self.request_timeout = float(os.getenv("OPENAI_TIMEOUT", "60"))
+        
+        #Deadline, reintentos, hedging y circuit breaker
+        self.deadline = float(os.getenv("OPENAI_DEADLINE", "30"))
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+        self.retry_backoff = float(os.getenv("OPENAI_RETRY_BACKOFF", "0.5"))
+        self.hedge = os.getenv("OPENAI_HEDGE", "0") == "1"
+        self.hedge_min_samples = int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", "20"))
+        self.overload_fallback = os.getenv("OPENAI_OVERLOAD_FALLBACK", "0") == "1"
+        #Backends (cada uno con su breaker) y la elección por roast
+        self.router = ModelRouter.from_env(
+            breaker_failures=int(os.getenv("OPENAI_BREAKER_FAILURES", "5")),
+            breaker_reset=float(os.getenv("OPENAI_BREAKER_RESET", "30"))
+        )
+        
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight = 0
+        self._rejected = 0
+        self._avg_latency = 5.0 #promedio móvil (segundos) de cada completion, para el Retry-After
+        self._latencies: Deque[float] = deque(maxlen=200) #últimos intentos exitosos, para el p95 de las stats
+        self._retries = 0
+        self._timeouts = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._fallbacks = {"circuit_open": 0, "timeout": 0, "error": 0, "overload": 0}
+        
+        #Los clientes (y el SDK de openai, ~0.4s de import) se crean recién en el primer uso o en warmup()
+        self.use_openai = self.router.uses_llm
+        if not self.use_openai:
+            print("OPENAI_API_KEY no configurada. Usando el fast roast local.")
+
+    def _get_client(self, backend: ModelBackend):
+        """Cliente async (OpenAI o servidor compatible) del backend, creado la primera vez que se necesita"""
+        if backend.client is None:
+            import httpx
+            import openai
+            
+            backend.client = openai.AsyncOpenAI(
+                api_key=backend.api_key,
+                base_url=backend.base_url, #None = OPENAI_BASE_URL o la API de OpenAI
+                timeout=self.request_timeout,
+                max_retries=0, #los reintentos los manejamos acá, dentro del deadline
+                http_client=openai.DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    ),
+                    timeout=self.request_timeout
+                )
+            )
+        return backend.client
+
+    async def warmup(self) -> None:
+        """
+        Importa el SDK y abre la conexión con cada backend antes del primer request (TLS + keep-alive
+        en el pool). El import corre en un thread para no frenar el event loop mientras tanto
+        """
+        backends = [backend for backend in self.router.backends if backend.kind != MOCK]
+        if not backends:
+            return
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-5-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a witty, brutal but constructive CV reviewer. Always respond in valid JSON format."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                max_tokens=800,
-                temperature=0.8,
-                response_format={"type": "json_object"} #Fuerza respuesta JSON
+            await asyncio.to_thread(self._get_client, backends[0]) #el import del SDK, fuera del event loop
+        except Exception as e:
+            print(f"No se pudo precalentar el cliente de OpenAI: {str(e)}")
+            return
+        await asyncio.gather(*(self._warmup_backend(backend) for backend in backends))
+
+    async def _warmup_backend(self, backend: ModelBackend) -> None:
+        try:
+            await self._get_client(backend).models.list()
+        except Exception as e:
+            print(f"No se pudo precalentar el backend {backend.name}: {str(e)}")
+
+    async def close(self) -> None:
+        """Cierra los pools de conexiones HTTP"""
+        for backend in self.router.backends:
+            if backend.client is not None:
+                await backend.client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        p95 = self._p95_latency()
+        return {
+            "backend": "openai-async" if self.use_openai else "local",
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "max_connections": self.max_connections,
+            "rejected": self._rejected,
+            "avg_latency": round(self._avg_latency, 2),
+            "p95_latency": round(p95, 2) if p95 is not None else None,
+            "deadline": self.deadline,
+            "retries": self._retries,
+            "timeouts": self._timeouts,
+            "hedges": self._hedges,
+            "hedge_wins": self._hedge_wins,
+            "fallbacks": dict(self._fallbacks),
+            "routing": self.router.get_stats()
+        }
+
+    async def _acquire_slot(self) -> None:
+        """Reserva un slot de completion o rechaza rápido si el governor está lleno"""
+        try:
+            if self._semaphore.locked() and self.queue_timeout <= 0:
+                raise asyncio.TimeoutError()
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=max(self.queue_timeout, 0.001))
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise CapacityExceededError(
+                "Demasiados CVs en proceso. Probá de nuevo en unos segundos",
+                retry_after=max(1, int(self._avg_latency + 0.999))
             )
+
+    async def generate_roast_and_feedback(self, cv_text: str, timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+        """
+        Genera roast y feedback con el backend que elija el router (LLM o fast roast local)
+        Args:
+            cv_text: Texto extraído del CV
+            timer: StageTimer del request (registra prompt_build, llm_call y parse)
+        Returns:
+            Dict con roast, feedback y metadata ("fallback" indica si se usó la respuesta local y por qué,
+            "route" qué backend y límite de salida se eligieron)
+        """
+        timer = timer if timer is not None else StageTimer()
+        route = self.router.route(self.estimate_prompt_tokens(cv_text))
+        data = await self._generate(cv_text, route, timer)
+        data["route"] = route.to_dict()
+        return data
+
+    async def _generate(self, cv_text: str, route: Route, timer: StageTimer) -> Dict[str, Any]:
+        backend = route.backend
+        try:
+            if backend.kind == MOCK:
+                return self._mock(cv_text, route)
             
-            return response.choices[0].message.content
+            with timer.stage("prompt_build"):
+                roast_prompt = self._create_roast_prompt(cv_text) #creamos el prompt
             
+            try:
+                await self._acquire_slot()
+            except CapacityExceededError:
+                if not self.overload_fallback:
+                    raise
+                return self._fallback(cv_text, "overload") #nadie espera al proveedor: respuesta local
+            try:
+                if not backend.breaker.allow():
+                    return self._fallback(cv_text, "circuit_open") #el proveedor viene fallando: ni lo intentamos
+                
+                self._in_flight += 1
+                start_time = time.monotonic()
+                try:
+                    response, input_tokens = await self._with_retries(
+                        lambda: self._hedged_call(roast_prompt, route), start_time + self.deadline
+                    ) #llamamos la api
+                except BaseException as e:
+                    self._record_failure(e, backend, time.monotonic() - start_time)
+                    raise
+                finally:
+                    self._in_flight -= 1
+                    elapsed = time.monotonic() - start_time
+                    timer.add("llm_call", elapsed)
+                    self._avg_latency = 0.8 * self._avg_latency + 0.2 * elapsed
+                backend.breaker.record_success()
+                backend.record(elapsed, ok=True)
+            finally:
+                self._semaphore.release()
+            
+            with timer.stage("parse"):
+                data = self._parse_ai_response(response)
+            return self._with_usage(data, cv_text, input_tokens) #devolvemos la respuesta parseada
+            
+        except CapacityExceededError:
+            raise
         except Exception as e:
-            raise Exception(f"Error en API de OpenAI: {str(e)}")
+            print(f"Error con OpenAI, usando el fast roast local: {type(e).__name__} {str(e)}")
+            return self._fallback(cv_text, self._fallback_reason(e))
+
+    async def stream_roast_and_feedback(self, cv_text: str,
+                                        timer: Optional[StageTimer] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Igual que generate_roast_and_feedback pero en streaming (con deadline, reintentos
+        antes del primer evento y circuit breaker; sin hedging)
+        Yields:
+            {"type": "roast", "value": str} apenas se completa el roast,
+            {"type": "feedback", "index": int, "value": str} por cada item de feedback,
+            {"type": "replace", "roast": str, "feedback": List[str]} si la respuesta validada no es
+            lo que ya se emitió (JSON inválido o incompleto: el fast roast local la reemplaza),
+            y al final {"type": "result", "data": Dict} con la respuesta validada
+        """
+        timer = timer if timer is not None else StageTimer()
+        route = self.router.route(self.estimate_prompt_tokens(cv_text))
+        events = self._stream(cv_text, route, timer)
+        try:
+            async for event in events:
+                if event["type"] == "result":
+                    event["data"]["route"] = route.to_dict()
+                yield event
+        finally:
+            await events.aclose()
+
+    async def _stream(self, cv_text: str, route: Route, timer: StageTimer) -> AsyncIterator[Dict[str, Any]]:
+        backend = route.backend
+        if backend.kind == MOCK:
+            async for event in self._replay_response(self._mock(cv_text, route)):
+                yield event
+            return
+        
+        with timer.stage("prompt_build"):
+            roast_prompt = self._create_roast_prompt(cv_text)
+        parser = RoastStreamParser()
+        emitted = False
+        streamed: Dict[str, Any] = {"roast": None, "feedback": []} #lo que ya vio el cliente
+        input_tokens = None
+        fallback_reason = None
+        
+        try:
+            await self._acquire_slot()
+        except CapacityExceededError:
+            if not self.overload_fallback:
+                raise
+            async for event in self._replay_response(self._fallback(cv_text, "overload")):
+                yield event
+            return
+        try:
+            if not backend.breaker.allow():
+                fallback_reason = "circuit_open"
+            else:
+                self._in_flight += 1
+                start_time = time.monotonic()
+                deadline = start_time + self.deadline
+                stream = None
+                try:
+                    stream = await self._with_retries(
+                        lambda: self._get_client(backend).chat.completions.create(
+                            **self._completion_params(roast_prompt, route), stream=True,
+                            stream_options={"include_usage": True} #el último chunk trae el usage
+                        ),
+                        deadline
+                    )
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=deadline - time.monotonic())
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            self._count_timeout() #el deadline venció entre chunks
+                            raise
+                        if chunk.usage is not None:
+                            input_tokens = chunk.usage.prompt_tokens
+                            self._count_tokens(chunk.usage)
+                        if not chunk.choices:
+                            continue
+                        for event in parser.feed(chunk.choices[0].delta.content or ""):
+                            emitted = True
+                            if event["type"] == "roast":
+                                streamed["roast"] = event["value"]
+                            else:
+                                streamed["feedback"].append(event["value"])
+                            yield event
+                except Exception as e:
+                    self._record_failure(e, backend, time.monotonic() - start_time)
+                    if emitted:
+                        raise Exception(f"Error en API de OpenAI: {str(e)}")
+                    #no mandamos nada todavía: mismo fallback que el camino sin streaming
+                    print(f"Error con OpenAI, usando el fast roast local: {type(e).__name__} {str(e)}")
+                    fallback_reason = self._fallback_reason(e)
+                except BaseException:
+                    backend.breaker.release() #el cliente se fue: sin veredicto sobre el proveedor
+                    raise
+                else:
+                    backend.breaker.record_success()
+                    backend.record(time.monotonic() - start_time, ok=True)
+                finally:
+                    if stream is not None:
+                        await stream.close()
+                    self._in_flight -= 1
+                    elapsed = time.monotonic() - start_time
+                    timer.add("llm_call", elapsed)
+                    self._avg_latency = 0.8 * self._avg_latency + 0.2 * elapsed
+        finally:
+            self._semaphore.release()
+        
+        if fallback_reason is not None:
+            async for event in self._replay_response(self._fallback(cv_text, fallback_reason)):
+                yield event
+            return
+        
+        with timer.stage("parse"):
+            try:
+                data = self._with_usage(self._parse_ai_response(parser.text), cv_text, input_tokens)
+            except Exception as e:
+                #el JSON no pasó la validación: mismo fallback que el camino sin streaming
+                print(f"Respuesta inválida de OpenAI, usando el fast roast local: {str(e)}")
+                data = self._fallback(cv_text, "error")
+        if emitted and (streamed["roast"] != data["roast"] or streamed["feedback"] != data["feedback"]):
+            #lo que se mandó no es el roast final: el cliente tiene que reemplazarlo
+            yield {"type": "replace", "roast": data["roast"], "feedback": data["feedback"]}
+        yield {"type": "result", "data": data}
+
+    async def _with_retries(self, call: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        """
+        Corre call() dentro del deadline; reintenta con backoff exponencial y jitter ("full jitter")
+        solo los errores reintentables y solo si el reintento entra en el tiempo que queda
+        """
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(call(), timeout=deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                self._count_timeout()
+                raise
+            except Exception as e:
+                delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+                if (attempt >= self.max_retries or not self._is_retryable(e)
+                        or time.monotonic() + delay >= deadline):
+                    raise
+                attempt += 1
+                self._retries += 1
+                await asyncio.sleep(delay)
+
+    async def _hedged_call(self, prompt: str, route: Route) -> Tuple[str, Optional[int]]:
+        """
+        Si el request tarda más que el p95 reciente del backend manda otro igual y se queda con el
+        primero que responde bien (corta la cola de latencia a costa de algún request extra)
+        """
+        hedge_after = route.backend.latency_p95(self.hedge_min_samples) if self.hedge else None
+        if hedge_after is None:
+            return await self._call_openai(prompt, route)
+        
+        first = asyncio.ensure_future(self._call_openai(prompt, route))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self._hedges += 1
+                tasks.append(asyncio.ensure_future(self._call_openai(prompt, route)))
+            
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self._hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception() #marcamos como leída la excepción del que perdió
+
+    def _count_timeout(self) -> None:
+        """Una llamada cortada por el deadline (stats y /metrics); la usan el camino normal y el de streaming"""
+        self._timeouts += 1
+        LLM_TIMEOUTS.inc()
+
+    def _p95_latency(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Errores transitorios del proveedor: conexión/timeout HTTP, rate limit y 5xx"""
+        import openai #ya cargado: solo se llega acá después de usar el cliente
+        
+        return isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError))
+
+    def _record_failure(self, error: BaseException, backend: ModelBackend, elapsed: float) -> None:
+        """Le cuenta al breaker y al router las fallas del proveedor (no las nuestras, ej: un 400)"""
+        if isinstance(error, asyncio.TimeoutError) or (isinstance(error, Exception) and self._is_retryable(error)):
+            backend.breaker.record_failure()
+            backend.record(elapsed, ok=False)
+        else:
+            backend.breaker.release()
+
+    @staticmethod
+    def _fallback_reason(error: Exception) -> str:
+        return "timeout" if isinstance(error, asyncio.TimeoutError) else "error"
+
+    def _fallback(self, cv_text: str, reason: str) -> Dict[str, Any]:
+        """Respuesta local cuando OpenAI no está disponible; queda contada y marcada en el resultado"""
+        self._fallbacks[reason] += 1
+        data = self._with_usage(self.fast_roast(cv_text), cv_text)
+        data["fallback"] = reason
+        return data
+
+    def _mock(self, cv_text: str, route: Route) -> Dict[str, Any]:
+        """Respuesta del backend mock (fast roast local); también registra su latencia para el router"""
+        start_time = time.monotonic()
+        data = self._with_usage(self.fast_roast(cv_text), cv_text, estimate=route.input_tokens)
+        route.backend.record(time.monotonic() - start_time, ok=True)
+        return data
+
+    async def _replay_response(self, data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Emite una respuesta ya completa con el mismo formato de eventos del streaming"""
+        yield {"type": "roast", "value": data["roast"]}
+        for index, item in enumerate(data["feedback"]):
+            yield {"type": "feedback", "index": index, "value": item}
+        yield {"type": "result", "data": data}
+
+    def _create_roast_prompt(self, cv_text: str) -> str:
+        """
+        Crea el prompt para generar el roast, pasando el texto del cv.
+        Todo lo fijo va primero y el CV al final: así el prefijo es idéntico entre requests
+        y el proveedor lo puede cachear (prompt caching)
+        """
+        return _ROAST_INSTRUCTIONS + cv_text + "\n"
+
+    def estimate_prompt_tokens(self, cv_text: str) -> int:
+        """Estimación local de los tokens de entrada (system + prompt) para un texto de CV"""
+        return count_tokens(_SYSTEM_MESSAGE) + count_tokens(self._create_roast_prompt(cv_text))
+
+    def _with_usage(self, data: Dict[str, Any], cv_text: str, input_tokens: int = None,
+                    estimate: int = None) -> Dict[str, Any]:
+        """Agrega los tokens de entrada: los que reporta el proveedor o, si no hay, la estimación local"""
+        if input_tokens is None:
+            data["input_tokens"] = estimate if estimate is not None else self.estimate_prompt_tokens(cv_text)
+        else:
+            data["input_tokens"] = input_tokens
+        data["input_tokens_estimated"] = input_tokens is None
+        return data
+
+    async def _call_openai(self, prompt: str, route: Route) -> Tuple[str, Optional[int]]:
+        """
+        Llama al backend elegido (cliente async, conexiones del pool del backend); devuelve contenido
+        y tokens de entrada. Los errores del SDK se propagan tal cual para decidir si reintentar
+        """
+        start_time = time.monotonic()
+        response = await self._get_client(route.backend).chat.completions.create(
+            **self._completion_params(prompt, route)
+        )
+        self._latencies.append(time.monotonic() - start_time)
+        
+        input_tokens = None
+        if response.usage is not None:
+            input_tokens = response.usage.prompt_tokens
+            self._count_tokens(response.usage)
+        return response.choices[0].message.content, input_tokens
+
+    @staticmethod
+    def _count_tokens(usage) -> None:
+        """Suma el usage del proveedor a las métricas (/metrics)"""
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, "prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, "completion")
+
+    @staticmethod
+    def _completion_params(prompt: str, route: Route) -> Dict[str, Any]:
+        """Parámetros del chat completion según la ruta (compartidos por el camino normal y el de streaming)"""
+        return {
+            "model": route.backend.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": _SYSTEM_MESSAGE
+                },
+                {
+                    "role": "user", 
+                    "content": prompt
+                }
+            ],
+            "max_tokens": route.max_tokens,
+            "temperature": route.backend.temperature,
+            "response_format": {"type": "json_object"} #Fuerza respuesta JSON
+        }
 
     def _parse_ai_response(self, response_text: str) -> Dict[str, Any]:
         """Parsea y valida la respuesta de la IA"""
@@ -145,35 +586,9 @@ Make it hurt (a little) but help them win! 🔥
         except Exception as e:
             raise Exception(f"Error procesando respuesta de IA: {str(e)}")
 
-    def _generate_mock_response(self, cv_text: str) -> Dict[str, Any]:
-        """Genera una respuesta simulada cuando no hay API key de OpenAI"""
-        import random
-        
-        roasts = [
-            "Well, well, well... looks like someone copy-pasted their CV from a template and called it a day. The lack of originality here is so impressive, it should be its own skill on your resume.",
-            "This CV is like a participation trophy - technically it exists, but nobody's really proud of it. I've seen more personality in a tax form.",
-            "Your CV reads like it was written by someone who learned about jobs from watching sitcoms. 'Hardworking team player'? Come on, even my spam folder has more creativity.",
-            "I've seen grocery lists with more compelling narratives than this CV. At least those tell a story about dinner plans.",
-            "This resume is so generic, I'm pretty sure I could fill in Mad Libs and get something more personalized."
-        ]
-        
-        feedback_options = [
-            "Add specific achievements with numbers and metrics",
-            "Remove generic buzzwords like 'hardworking' and 'team player'",
-            "Include relevant projects or portfolio links",
-            "Tailor your experience to the job you're applying for",
-            "Use action verbs to start each bullet point",
-            "Quantify your impact wherever possible",
-            "Keep it to 1-2 pages maximum",
-            "Use a cleaner, more professional format",
-            "Add relevant technical skills",
-            "Include education and certifications if relevant"
-        ]
-        
-        selected_feedback = random.sample(feedback_options, random.randint(3, 6))
-        
-        return {
-            "roast": random.choice(roasts),
-            "feedback": selected_feedback,
-            "brutality_level": random.randint(75, 95)
-        }
\ No newline at end of file
+    @staticmethod
+    def fast_roast(cv_text: str) -> Dict[str, Any]:
+        """Roast local del analizador de reglas (unos ms, sin proveedor); sin el detalle del análisis"""
+        data = fast_roast(cv_text)
+        del data["analysis"]
+        return data
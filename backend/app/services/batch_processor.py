@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import io
+import os
+import posixpath
+import time
+import zipfile
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.services.admission import RateLimitedError
+from app.services.ai_service import CapacityExceededError
+from app.services.extraction_executor import ExtractionTimeoutError
+from app.services.metrics import StageTimer
+from app.services.upload_ingest import (
+    IngestedFile, UploadRejectedError, check_kind, max_upload_bytes, sniff_kind
+)
+
+#Estados de cada archivo en la respuesta NDJSON
+COMPLETED = "completed"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+
+
+class BatchItem:
+    """Un archivo del batch: el CV listo para procesar o el motivo por el que se rechazó"""
+
+    __slots__ = ("index", "filename", "file", "error")
+
+    def __init__(self, index: int, filename: str, file: Optional[IngestedFile] = None, error: Optional[str] = None):
+        self.index = index
+        self.filename = filename
+        self.file = file
+        self.error = error
+
+
+class BatchProcessor:
+    """
+    Procesa muchos CVs de un solo upload (varios archivos o un zip):
+    - deduplica por sha256: cada contenido distinto se procesa una sola vez
+    - corre hasta `concurrency` CVs a la vez (extracción + LLM), así un batch de N tarda
+      ~N / concurrency veces el CV más lento y no N veces el promedio
+    - entrega el resultado de cada archivo apenas termina (NDJSON), no al final
+    Config (variables de entorno):
+        BATCH_CONCURRENCY: CVs en paralelo por batch (default: 8)
+        BATCH_MAX_FILES: CVs por batch, contando los de adentro de los zips (default: 500)
+        BATCH_MAX_MB: tamaño máximo del upload y de lo descomprimido (default: 100)
+        BATCH_CAPACITY_RETRIES: reintentos de un CV si el LLM está saturado (default: 3)
+    """
+
+    def __init__(self, roast_generator, concurrency: int = None, max_files: int = None, max_bytes: int = None):
+        self.roast_generator = roast_generator
+        self.concurrency = concurrency or int(os.getenv("BATCH_CONCURRENCY", "8"))
+        self.max_files = max_files or int(os.getenv("BATCH_MAX_FILES", "500"))
+        self.max_bytes = max_bytes or int(float(os.getenv("BATCH_MAX_MB", "100")) * 1024 * 1024)
+        self.capacity_retries = int(os.getenv("BATCH_CAPACITY_RETRIES", "3"))
+
+        self._batches = 0
+        self._in_flight = 0
+        self._files = 0
+        self._duplicates = 0
+        self._failed = 0
+
+    def expand(self, files: List[IngestedFile]) -> List[BatchItem]:
+        """Arma la lista de CVs del batch abriendo los zips; un archivo inválido (suelto o adentro de un zip) no corta el batch"""
+        items: List[BatchItem] = []
+        total = 0
+        for file in files:
+            if file.error is not None:
+                items.append(BatchItem(len(items), file.filename, error=file.error))
+                continue
+            if file.kind != "zip":
+                items.append(BatchItem(len(items), file.filename, file))
+                continue
+
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(file.content))
+            except zipfile.BadZipFile:
+                raise UploadRejectedError(f"{file.filename} no es un zip válido")
+            with archive:
+                for info in archive.infolist():
+                    name = info.filename
+                    base = posixpath.basename(name)
+                    if info.is_dir() or name.startswith("__MACOSX/") or not base or base.startswith("."):
+                        continue #carpetas y basura de macOS
+                    if len(items) >= self.max_files:
+                        raise UploadRejectedError(f"Demasiados archivos (máximo {self.max_files})")
+                    #el tamaño declarado puede mentir (zip bomb): leemos con tope igual
+                    total += info.file_size
+                    if total > self.max_bytes:
+                        raise UploadRejectedError("El zip descomprimido supera el tamaño total permitido", status_code=413)
+                    items.append(self._zip_member(len(items), archive, info, base))
+            file.content = b"" #el zip ya no hace falta
+
+        if len(items) > self.max_files:
+            raise UploadRejectedError(f"Demasiados archivos (máximo {self.max_files})")
+        if not items:
+            raise UploadRejectedError("El batch no tiene ningún CV")
+        return items
+
+    @staticmethod
+    def _zip_member(index: int, archive: zipfile.ZipFile, info: zipfile.ZipInfo, filename: str) -> BatchItem:
+        limit = max_upload_bytes()
+        if info.file_size > limit:
+            return BatchItem(index, filename, error=f"Archivo muy grande (máximo {limit // (1024 * 1024)}MB)")
+        try:
+            with archive.open(info) as member:
+                content = member.read(limit + 1)
+        except Exception as e:
+            return BatchItem(index, filename, error=f"No se pudo leer del zip: {str(e)}")
+        if len(content) > limit:
+            return BatchItem(index, filename, error=f"Archivo muy grande (máximo {limit // (1024 * 1024)}MB)")
+        if not content:
+            return BatchItem(index, filename, error="El archivo está vacío")
+
+        try:
+            kind = check_kind(filename, sniff_kind(content[:1024]))
+        except UploadRejectedError as e:
+            return BatchItem(index, filename, error=str(e))
+        start = time.perf_counter()
+        digest = hashlib.sha256(content).hexdigest()
+        file = IngestedFile(filename, content, digest, kind, time.perf_counter() - start)
+        return BatchItem(index, filename, file)
+
+    async def run(self, items: List[BatchItem], concurrency: Optional[int] = None,
+                  client: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Procesa el batch y emite un dict por archivo a medida que terminan
+        ({"type": "item", "index", "filename", "status", ...}) y al final {"type": "summary", ...}
+        Los CVs del batch hacen fila por turnos con los del resto de los clientes (admisión de `client`)
+        """
+        start_time = time.time()
+        concurrency = max(1, min(concurrency or self.concurrency, self.concurrency))
+        self._batches += 1
+        self._files += len(items)
+
+        #dedupe por contenido: digest -> primer archivo con ese contenido y sus repetidos
+        originals: Dict[str, BatchItem] = {}
+        repeats: Dict[str, List[BatchItem]] = {}
+        counts = {COMPLETED: 0, DUPLICATE: 0, FAILED: 0}
+        pending: List[BatchItem] = []
+        for item in items:
+            if item.file is None:
+                counts[FAILED] += 1
+                self._failed += 1
+                yield self._line(item, FAILED, error=item.error)
+            elif item.file.digest in originals:
+                repeats[item.file.digest].append(item)
+            else:
+                originals[item.file.digest] = item
+                repeats[item.file.digest] = []
+                pending.append(item)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        done: asyncio.Queue = asyncio.Queue()
+
+        async def worker(item: BatchItem) -> None:
+            async with semaphore:
+                self._in_flight += 1
+                try:
+                    result = await self._process(item.file, client)
+                    await done.put((item, result, None))
+                except Exception as e:
+                    await done.put((item, None, e))
+                finally:
+                    self._in_flight -= 1
+                    item.file.content = b"" #liberamos los bytes apenas se procesa
+
+        tasks = [asyncio.create_task(worker(item)) for item in pending]
+        try:
+            for _ in range(len(tasks)):
+                item, result, error = await done.get()
+                if error is not None:
+                    message = self._error_message(error)
+                    for failed in [item] + repeats[item.file.digest]:
+                        counts[FAILED] += 1
+                        self._failed += 1
+                        yield self._line(failed, FAILED, error=message)
+                    continue
+
+                counts[COMPLETED] += 1
+                yield self._line(item, COMPLETED, result=result)
+                for repeat in repeats[item.file.digest]:
+                    counts[DUPLICATE] += 1
+                    self._duplicates += 1
+                    yield self._line(repeat, DUPLICATE, result=result, duplicate_of=item.index)
+        finally:
+            for task in tasks:
+                task.cancel() #el cliente cortó: no seguimos gastando LLM en un batch que nadie lee
+
+        yield {
+            "type": "summary",
+            "files": len(items),
+            "unique": len(pending),
+            "completed": counts[COMPLETED],
+            "duplicates": counts[DUPLICATE],
+            "failed": counts[FAILED],
+            "concurrency": concurrency,
+            "elapsed": round(time.time() - start_time, 2)
+        }
+
+    async def _process(self, file: IngestedFile, client: Optional[str] = None) -> Dict[str, Any]:
+        """Roast de un CV del batch; si el LLM (o la cola del cliente) está saturado espera y reintenta en vez de fallar"""
+        attempt = 0
+        while True:
+            timer = StageTimer()
+            timer.add("hash", file.hash_seconds)
+            try:
+                return await self.roast_generator.process_cv_file(
+                    file.content, file.filename, file_digest=file.digest, timer=timer,
+                    client=client, rate_limit=False #el batch paga un solo token al entrar
+                )
+            except (CapacityExceededError, RateLimitedError) as e:
+                attempt += 1
+                if attempt > self.capacity_retries:
+                    raise
+                await asyncio.sleep(min(e.retry_after, 5))
+
+    @staticmethod
+    def _line(item: BatchItem, status: str, result: Optional[Dict[str, Any]] = None,
+              error: Optional[str] = None, duplicate_of: Optional[int] = None) -> Dict[str, Any]:
+        line = {"type": "item", "index": item.index, "filename": item.filename, "status": status}
+        if result is not None:
+            line.update({
+                "roast_id": result["roast_id"],
+                "brutality_level": result["brutality_level"],
+                "feedback_count": result["feedback_count"],
+                "processing_time": result["processing_time"],
+                "from_cache": result.get("from_cache", False),
+                "fallback": result.get("fallback")
+            })
+        if duplicate_of is not None:
+            line["duplicate_of"] = duplicate_of
+        if error is not None:
+            line["error"] = error
+        return line
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        if isinstance(error, ExtractionTimeoutError):
+            return "El archivo tardó demasiado en procesarse"
+        if isinstance(error, (CapacityExceededError, RateLimitedError)):
+            return "El servicio está saturado; reintentá este CV más tarde"
+        return str(error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "max_files": self.max_files,
+            "max_mb": self.max_bytes // (1024 * 1024),
+            "batches": self._batches,
+            "in_flight": self._in_flight,
+            "files": self._files,
+            "duplicates": self._duplicates,
+            "failed": self._failed
+        }
@@ -0,0 +1,74 @@
+import time
+from typing import Any, Dict
+
+#Estados del breaker
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker para un proveedor externo.
+    - closed: todo pasa; failure_threshold fallas seguidas lo abren
+    - open: nada pasa (el que llama usa su fallback) hasta que pasen reset_timeout segundos
+    - half_open: deja pasar un solo request de prueba; si anda se cierra, si falla vuelve a open
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._opens = 0
+        self._short_circuited = 0
+
+    def allow(self) -> bool:
+        """True si se puede llamar al proveedor ahora"""
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self._short_circuited += 1
+        return False
+
+    def is_open(self) -> bool:
+        """True si está abierto y todavía no toca probar (sin cambiar el estado, para elegir entre proveedores)"""
+        return self.state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == OPEN:
+            return #fallas de requests que salieron antes de abrir: no corren el momento de la prueba
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opens += 1
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """El request de prueba terminó sin veredicto (ej: se canceló): dejamos pasar otro"""
+        self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opens": self._opens,
+            "short_circuited": self._short_circuited
+        }
+        if self.state == OPEN:
+            stats["retry_in"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+        return stats
@@ -0,0 +1,236 @@
+import math
+import re
+from typing import Any, Dict, List, Tuple
+
+from app.services.text_compactor import is_heading
+
+#Secciones que buscamos (cualquiera de los alias en el título cuenta)
+_SECTIONS = {
+    "experience": ("experience", "experiencia", "work history", "employment", "trayectoria"),
+    "education": ("education", "educación", "educacion", "formación", "formacion", "academic", "estudios"),
+    "skills": ("skills", "habilidades", "competencias", "tecnologías", "tecnologias", "tech stack"),
+    "summary": ("summary", "resumen", "perfil", "profile", "about", "sobre mí", "objective", "objetivo"),
+    "projects": ("projects", "proyectos", "portfolio"),
+}
+#Sin estas el CV está incompleto; summary y projects suman pero no son obligatorias
+_CORE_SECTIONS = ("experience", "education", "skills")
+
+_BUZZWORDS = (
+    "team player", "hardworking", "hard-working", "hard working", "detail-oriented", "detail oriented",
+    "results-driven", "results driven", "results-oriented", "self-starter", "self starter", "go-getter",
+    "synergy", "passionate", "dynamic", "motivated", "proactive", "think outside the box", "fast learner",
+    "quick learner", "excellent communication", "strategic thinker", "rockstar", "ninja", "guru",
+    "trabajo en equipo", "proactivo", "proactiva", "orientado a resultados", "orientada a resultados",
+    "apasionado", "apasionada", "dinámico", "dinámica", "motivado", "motivada", "autodidacta",
+    "capacidad de liderazgo", "buena comunicación", "resolutivo", "resolutiva",
+)
+_BUZZWORD_RE = re.compile(r"\b(?:" + "|".join(re.escape(word) for word in _BUZZWORDS) + r")\b", re.IGNORECASE)
+
+#Arranques que describen el puesto en vez de lo que se logró
+_WEAK_OPENERS = (
+    "responsible for", "worked on", "helped", "assisted", "involved in", "tasked with", "duties included",
+    "responsable de", "encargado de", "encargada de", "participé en", "ayudé", "colaboré en", "tareas de",
+)
+
+_BULLET_RE = re.compile(r"^\s*(?:[-•*·▪●◦–]|\d{1,2}[.)])\s+")
+#Un número que no sea un año: porcentajes, plata, cantidades (12, 3.5x, 40%, $2M, 1.000)
+_METRIC_RE = re.compile(
+    r"\d+(?:[.,]\d+)?\s*(?:%|x\b|k\b|m\b|mm\b|\+)|[$€£]\s?\d|\b\d{1,3}(?:[.,]\d{3})+\b|\b(?!(?:19|20)\d{2}\b)\d+\b",
+    re.IGNORECASE
+)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+_YEAR_RANGE_RE = re.compile(r"(?:19|20)\d{2}\s*[-–/]\s*(?:19|20)\d{2}")
+_WORD_RE = re.compile(r"\w+(?:[-']\w+)*")
+
+#Un CV de una página tiene ~450 palabras
+WORDS_PER_PAGE = 450
+LONG_BULLET_WORDS = 30
+MAX_FEEDBACK = 6
+
+
+def analyze_cv(cv_text: str) -> Dict[str, Any]:
+    """
+    Análisis local del CV (reglas, sin LLM; unos pocos ms): secciones, bullets con y sin
+    métricas, densidad de buzzwords, bullets largos, arranques flojos, contacto y páginas estimadas
+    """
+    lines = [line.strip() for line in cv_text.split("\n") if line.strip()]
+    words = _WORD_RE.findall(cv_text)
+
+    sections = []
+    for line in lines:
+        if not is_heading(line):
+            continue
+        lowered = line.lower()
+        for section, aliases in _SECTIONS.items():
+            if section not in sections and any(alias in lowered for alias in aliases):
+                sections.append(section)
+
+    bullets = [_BULLET_RE.sub("", line) for line in lines if _BULLET_RE.match(line)]
+    if len(bullets) < 3:
+        #muchos PDFs pierden los símbolos de bullet: tomamos las líneas con pinta de logro
+        bullets = [line for line in lines if len(line.split()) >= 6 and not is_heading(line)]
+    bullet_words = [len(bullet.split()) for bullet in bullets]
+
+    buzzwords: Dict[str, int] = {}
+    for match in _BUZZWORD_RE.finditer(cv_text):
+        word = match.group(0).lower()
+        buzzwords[word] = buzzwords.get(word, 0) + 1
+    buzzword_count = sum(buzzwords.values())
+
+    weak_openers: Dict[str, int] = {}
+    for bullet in bullets:
+        lowered = bullet.lower()
+        for opener in _WEAK_OPENERS:
+            if lowered.startswith(opener):
+                weak_openers[opener] = weak_openers.get(opener, 0) + 1
+                break
+
+    return {
+        "words": len(words),
+        "pages": max(1, math.ceil(len(words) / WORDS_PER_PAGE)),
+        "sections": sections,
+        "missing_sections": [section for section in _CORE_SECTIONS if section not in sections],
+        "bullets": len(bullets),
+        "bullets_with_metrics": sum(1 for bullet in bullets if _METRIC_RE.search(bullet)),
+        "long_bullets": sum(1 for count in bullet_words if count > LONG_BULLET_WORDS),
+        "longest_bullet": max(bullet_words, default=0),
+        "buzzwords": dict(sorted(buzzwords.items(), key=lambda item: item[1], reverse=True)),
+        "buzzword_density": round(100 * buzzword_count / len(words), 2) if words else 0.0,
+        "weak_openers": weak_openers,
+        "has_email": bool(_EMAIL_RE.search(cv_text)),
+        "has_phone": _has_phone(cv_text),
+    }
+
+
+def _has_phone(cv_text: str) -> bool:
+    """Un teléfono tiene 8+ dígitos; "2019-2023" no es un teléfono"""
+    for match in _PHONE_RE.finditer(cv_text):
+        if len(re.sub(r"\D", "", match.group(0))) >= 8 and not _YEAR_RANGE_RE.fullmatch(match.group(0).strip()):
+            return True
+    return False
+
+
+def _count(number: int, noun: str) -> str:
+    return f"{number} {noun}{'' if number == 1 else 's'}"
+
+
+def _join(names: List[str], last: str) -> str:
+    return names[0] if len(names) == 1 else ", ".join(names[:-1]) + f" {last} " + names[-1]
+
+
+def _findings(analysis: Dict[str, Any]) -> List[Tuple[float, str, str]]:
+    """Problemas encontrados como (penalidad, roast, feedback), del más grave al menos grave"""
+    findings = []
+    bullets = analysis["bullets"]
+    with_metrics = analysis["bullets_with_metrics"]
+
+    if not bullets:
+        findings.append((
+            30,
+            "Not a single achievement in sight. This CV lists where you sat, not what you did.",
+            "Add 3-5 bullet points per role with concrete results"
+        ))
+    elif with_metrics < bullets:
+        missing_ratio = 1 - with_metrics / bullets
+        findings.append((
+            30 * missing_ratio,
+            f"{_count(bullets, 'bullet point')} and {f'only {with_metrics}' if with_metrics else 'none'} with a number. "
+            "Your achievements are like ghost stories: everyone swears they happened, nobody has proof.",
+            f"Bullet points with a number: {with_metrics}/{bullets}. Add metrics "
+            "(%, $, time saved, users, team size) to the rest"
+        ))
+
+    missing = analysis["missing_sections"]
+    if missing:
+        names = [section.capitalize() for section in missing]
+        findings.append((
+            10 * len(missing),
+            f"No {_join(names, 'or')} section. "
+            "Bold strategy: letting the recruiter guess what you actually know.",
+            f"Add the missing section{'s' if len(missing) > 1 else ''}: {_join(names, 'and')}"
+        ))
+
+    if analysis["buzzwords"]:
+        top = list(analysis["buzzwords"])[:3]
+        uses = sum(analysis["buzzwords"].values())
+        findings.append((
+            min(15, 5 * analysis["buzzword_density"]) + min(5, uses),
+            f"'{top[0]}' appears {_count(analysis['buzzwords'][top[0]], 'time')}. "
+            "More buzzwords than a startup pitch deck, less evidence than a horoscope.",
+            f"Cut the buzzwords ({', '.join(repr(word) for word in top)}: {uses} uses) "
+            "and show those traits through results instead"
+        ))
+
+    if analysis["long_bullets"]:
+        findings.append((
+            15 * analysis["long_bullets"] / max(1, bullets) + 3,
+            f"Your longest bullet point has {analysis['longest_bullet']} words. "
+            "That's not a bullet, that's a hostage negotiation.",
+            f"{_count(analysis['long_bullets'], 'bullet point')} over "
+            f"{LONG_BULLET_WORDS} words (longest: {analysis['longest_bullet']}): split or trim to one line each"
+        ))
+
+    if analysis["pages"] > 2:
+        findings.append((
+            min(15, 5 * (analysis["pages"] - 2)),
+            f"~{analysis['pages']} pages? This isn't a CV, it's a memoir. "
+            "Recruiters give a resume seconds, not a weekend.",
+            f"At ~{analysis['pages']} pages ({analysis['words']} words) this CV is too long: aim for 1-2 pages"
+        ))
+
+    if analysis["weak_openers"]:
+        opener, count = max(analysis["weak_openers"].items(), key=lambda item: item[1])
+        total = sum(analysis["weak_openers"].values())
+        findings.append((
+            10 * total / max(1, bullets) + 2,
+            f"'{opener.capitalize()}' opens {count} of your bullets. "
+            "Being responsible for things isn't an achievement, it's a job description.",
+            f"{_count(total, 'bullet point')} open with phrases like '{opener}': "
+            "lead with an action verb and the result"
+        ))
+
+    if not analysis["has_email"] or not analysis["has_phone"]:
+        missing_contact = " and ".join(
+            name for name, present in (("email", analysis["has_email"]), ("phone", analysis["has_phone"])) if not present
+        )
+        findings.append((
+            5,
+            f"No {missing_contact} anywhere. Impressive commitment to never being contacted.",
+            f"Add your {missing_contact} at the top so recruiters can reach you"
+        ))
+
+    return sorted(findings, key=lambda finding: finding[0], reverse=True)
+
+
+def fast_roast(cv_text: str) -> Dict[str, Any]:
+    """
+    Roast local basado en analyze_cv: el roast y el feedback salen de lo que realmente tiene
+    el CV y el brutality_level es la suma de las penalidades. Mismo formato que la respuesta del LLM
+    (roast, feedback, brutality_level) más el "analysis" usado
+    """
+    analysis = analyze_cv(cv_text)
+    findings = _findings(analysis)
+
+    if findings:
+        roast = findings[0][1]
+    else:
+        roast = (
+            f"Annoyingly solid: {analysis['bullets_with_metrics']} of {analysis['bullets']} bullet points have numbers "
+            "and there's barely a buzzword in sight. The only thing to roast here is how little there is to roast."
+        )
+    feedback = [finding[2] for finding in findings[:MAX_FEEDBACK]]
+    if len(feedback) < 3:
+        feedback.append("Move your strongest, most quantified achievement to the top of each role")
+    if len(feedback) < 3:
+        feedback.append("Tailor the summary and skills to the job you're applying for")
+    if len(feedback) < 3:
+        feedback.append("Link a portfolio, GitHub or published work that backs up your claims")
+
+    brutality = 20 + sum(finding[0] for finding in findings)
+    return {
+        "roast": roast,
+        "feedback": feedback,
+        "brutality_level": max(1, min(100, int(round(brutality)))),
+        "analysis": analysis
+    }
@@ -0,0 +1,76 @@
+import io
+import re
+import zipfile
+from typing import List
+from xml.etree.ElementTree import iterparse
+
+#Namespaces de WordprocessingML que nos interesan
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+_TEXT = _W + "t"
+_TAB = _W + "tab"
+_BREAKS = (_W + "br", _W + "cr")
+_PARAGRAPH = _W + "p"
+_CELL = _W + "tc"
+_FALLBACK = _MC + "Fallback" #copia VML de los text boxes (duplicaría el texto)
+
+_HEADER_RE = re.compile(r"^word/header\d*\.xml$")
+_FOOTER_RE = re.compile(r"^word/footer\d*\.xml$")
+
+
+def extract_docx_text(file_content: bytes) -> str:
+    """
+    Extrae el texto de un DOCX leyendo el XML directamente (sin armar el árbol de python-docx).
+    Incluye tablas, text boxes, headers y footers, en orden de documento:
+    headers, cuerpo y footers (los headers/footers repetidos aparecen una sola vez).
+    """
+    with zipfile.ZipFile(io.BytesIO(file_content)) as archive:
+        names = archive.namelist()
+        headers = sorted(name for name in names if _HEADER_RE.match(name))
+        footers = sorted(name for name in names if _FOOTER_RE.match(name))
+
+        parts: List[str] = []
+        seen = set()
+        for name in headers + ["word/document.xml"] + footers:
+            if name not in names:
+                continue
+            with archive.open(name) as xml_file:
+                text = _extract_part(xml_file)
+            if name != "word/document.xml":
+                if text in seen:
+                    continue
+                seen.add(text)
+            parts.append(text)
+
+    return "\n".join(parts)
+
+
+def _extract_part(xml_file) -> str:
+    """Recorre un part de WordprocessingML con un parser incremental"""
+    pieces: List[str] = []
+    fallback_depth = 0
+
+    for event, element in iterparse(xml_file, events=("start", "end")):
+        tag = element.tag
+
+        if tag == _FALLBACK:
+            fallback_depth += 1 if event == "start" else -1
+            continue
+        if event == "start" or fallback_depth:
+            continue
+
+        if tag == _TEXT:
+            if element.text:
+                pieces.append(element.text)
+        elif tag == _TAB:
+            pieces.append("\t")
+        elif tag in _BREAKS:
+            pieces.append("\n")
+        elif tag == _PARAGRAPH:
+            pieces.append("\n")
+            element.clear() #liberamos el párrafo ya procesado
+        elif tag == _CELL:
+            element.clear()
+
+    return "".join(pieces)
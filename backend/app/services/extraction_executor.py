@@ -0,0 +1,366 @@
+import asyncio
+import math
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+try:
+    import resource  #solo POSIX; en Windows caemos al deadline de reloj
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+class ExtractionTimeoutError(Exception):
+    """El documento superó el deadline de CPU y fue rechazado"""
+
+
+def _raise_cpu_deadline(signum, frame):
+    raise ExtractionTimeoutError("El documento superó el tiempo máximo de procesamiento")
+
+
+#CPU que puede gastar un worker en toda su vida, en deadlines: el hard limit se fija una sola vez
+WORKER_CPU_BUDGET = 100
+
+
+def _init_worker(cpu_deadline: Optional[float] = None) -> None:
+    """
+    Inicializa cada proceso del pool: handler para SIGXCPU y, con deadline, el hard limit de CPU del worker.
+    El hard se baja una sola vez (sin privilegios no se puede volver a subir); por job se mueve solo el soft
+    """
+    if resource is None or not hasattr(signal, "SIGXCPU"):
+        return
+    signal.signal(signal.SIGXCPU, _raise_cpu_deadline)
+    if cpu_deadline:
+        soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        budget = int(_cpu_used() + math.ceil(cpu_deadline) * WORKER_CPU_BUDGET)
+        if hard != resource.RLIM_INFINITY:
+            budget = min(budget, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (budget, budget))
+
+
+def _cpu_used() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _run_job(fn: Callable, args: Tuple, cpu_deadline: Optional[float],
+             next_deadline: Optional[float] = None) -> Tuple[Any, float, float, bool]:
+    """
+    Corre un job dentro del worker con un límite de CPU (soft de RLIMIT_CPU).
+    next_deadline es el deadline que tiene que quedar disponible para el próximo job (default: el mismo).
+    Al pasar el soft el kernel manda SIGXCPU (ExtractionTimeoutError en Python), y lo repite cada segundo
+    de CPU si el error se traga; el deadline de reloj del pool corta lo que siga trabado (ej: en C)
+    Returns:
+        (resultado, timestamp de inicio, segundos de CPU usados, si al worker le queda CPU para otro job)
+    """
+    started_at = time.time()
+    cpu_start = time.process_time()
+    hard = None
+
+    if cpu_deadline and resource is not None and hasattr(signal, "SIGXCPU"):
+        hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+        soft = int(_cpu_used() + math.ceil(cpu_deadline)) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+    try:
+        result = fn(*args)
+    finally:
+        if hard is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard)) #subir el soft hasta el hard no pide privilegios
+
+    reusable = (
+        hard is None or hard == resource.RLIM_INFINITY
+        or _cpu_used() + math.ceil(next_deadline or cpu_deadline) + 2 <= hard
+    )
+    return result, started_at, time.process_time() - cpu_start, reusable
+
+
+class ExtractionExecutor:
+    """
+    Ejecuta las funciones de extracción (CPU-bound) fuera del event loop.
+    Subclases: ProcessPoolExtractionExecutor (default), ThreadExtractionExecutor,
+    InlineExtractionExecutor (para desarrollo)
+    """
+
+    name = "base"
+
+    def __init__(self, max_workers: int = 2, cpu_deadline: Optional[float] = 10.0, history_size: int = 200):
+        self.max_workers = max(1, max_workers)
+        self.cpu_deadline = cpu_deadline
+
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        #últimos jobs: (espera en cola, duración, cpu)
+        self._timings: Deque[Tuple[float, float, float]] = deque(maxlen=history_size)
+
+    def start(self) -> None:
+        """Levanta los workers por adelantado (opcional)"""
+
+    async def warmup(self, fn: Callable) -> None:
+        """Corre fn una vez por worker (ej: importar librerías pesadas) sin contarlo en las stats"""
+        self.start()
+        await asyncio.gather(*(self._execute(fn, (), self.cpu_deadline) for _ in range(self.max_workers)))
+
+    def shutdown(self) -> None:
+        """Libera los workers"""
+
+    async def _execute(self, fn: Callable, args: Tuple, cpu_deadline: Optional[float]) -> Tuple[Any, float, float]:
+        raise NotImplementedError
+
+    async def run(self, fn: Callable, *args, cpu_deadline: Optional[float] = None) -> Any:
+        """
+        Corre fn(*args) en el executor y registra métricas del job
+        cpu_deadline acota este job (ej: lo que le queda a un documento repartido en varios jobs);
+        no puede superar el del executor
+        """
+        submitted_at = time.time()
+        self._submitted += 1
+        self._pending += 1
+        if cpu_deadline is None or not self.cpu_deadline:
+            cpu_deadline = self.cpu_deadline
+        else:
+            cpu_deadline = min(cpu_deadline, self.cpu_deadline)
+
+        try:
+            result, started_at, cpu_time = await self._execute(fn, args, cpu_deadline)
+        except ExtractionTimeoutError:
+            self._timed_out += 1
+            raise
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        finished_at = time.time()
+        self._completed += 1
+        self._timings.append((
+            max(0.0, started_at - submitted_at),
+            finished_at - started_at,
+            cpu_time
+        ))
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        running = min(self._pending, self.max_workers)
+        waits = sorted(t[0] for t in self._timings)
+        durations = sorted(t[1] for t in self._timings)
+
+        return {
+            "executor": self.name,
+            "max_workers": self.max_workers,
+            "cpu_deadline": self.cpu_deadline,
+            "queue_depth": self._pending - running,
+            "running": running,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timed_out": self._timed_out,
+            "avg_queue_wait_ms": _avg_ms(waits),
+            "avg_job_ms": _avg_ms(durations),
+            "p95_job_ms": _percentile_ms(durations, 0.95),
+        }
+
+
+class ProcessPoolExtractionExecutor(ExtractionExecutor):
+    """
+    Pool de procesos acotado y reutilizado; los jobs que exceden el deadline de CPU se cortan en el worker
+    (soft de RLIMIT_CPU). Un deadline de reloj más largo recicla el pool si igual un worker no responde
+    (ej: trabado en C o en I/O). Sin RLIMIT_CPU (Windows) el de reloj es el único deadline.
+    Cada worker tiene un hard limit fijo (WORKER_CPU_BUDGET deadlines de CPU): cuando se le acaba,
+    el pool se renueva
+    """
+
+    name = "process"
+
+    #SIGXCPU llega a los cpu_deadline + 1s de CPU: el de reloj deja margen para una máquina cargada
+    WALL_CLOCK_FACTOR = 2.0
+    WALL_CLOCK_SLACK = 2.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        #un job por worker: la espera para entrar al pool queda fuera del deadline de reloj
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._retired = 0
+        self._wall_clock_deadline = self._wall_clock_for(self.cpu_deadline)
+
+    def _wall_clock_for(self, cpu_deadline: Optional[float]) -> Optional[float]:
+        #sin RLIMIT_CPU (Windows) el worker no se puede cortar solo: el deadline de reloj es el de CPU
+        if resource is None or not hasattr(signal, "SIGXCPU") or not cpu_deadline:
+            return cpu_deadline
+        return cpu_deadline * self.WALL_CLOCK_FACTOR + self.WALL_CLOCK_SLACK
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker, initargs=(self.cpu_deadline,)
+            )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _recycle(self) -> None:
+        """Mata los workers (ej: uno colgado) y arranca un pool nuevo en el próximo job"""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _retire(self, pool: ProcessPoolExecutor) -> None:
+        """A un worker de pool se le acabó el CPU del hard limit: terminan lo suyo y el próximo job usa uno nuevo"""
+        if self._pool is pool:
+            self._pool = None
+            self._retired += 1
+        pool.shutdown(wait=False)
+
+    async def _execute(self, fn: Callable, args: Tuple, cpu_deadline: Optional[float]) -> Tuple[Any, float, float]:
+        async with self._slots:
+            self.start()
+            pool = self._pool
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            future = loop.run_in_executor(pool, _run_job, fn, args, cpu_deadline, self.cpu_deadline)
+            wall_clock_deadline = self._wall_clock_for(cpu_deadline)
+
+            try:
+                if wall_clock_deadline:
+                    result, started_at, cpu_time, reusable = await asyncio.wait_for(
+                        future, timeout=wall_clock_deadline
+                    )
+                else:
+                    result, started_at, cpu_time, reusable = await future
+            except asyncio.TimeoutError:
+                self._recycle()
+                raise ExtractionTimeoutError("El documento superó el tiempo máximo de procesamiento")
+            except BrokenProcessPool:
+                self._recycle()
+                if cpu_deadline and loop.time() - started >= cpu_deadline:
+                    #lo más probable: el kernel mató al worker al llegar al hard limit (o SIGXCPU sin handler)
+                    raise ExtractionTimeoutError("El documento superó el tiempo máximo de procesamiento")
+                raise
+
+            if not reusable:
+                self._retire(pool)
+            return result, started_at, cpu_time
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update({
+            "wall_clock_deadline": self._wall_clock_deadline,
+            "pools_retired": self._retired
+        })
+        return stats
+
+
+class ThreadExtractionExecutor(ExtractionExecutor):
+    """Pool de threads: no se puede matar un job, pero sí rechazarlo al vencer el deadline"""
+
+    name = "thread"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extraction")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _execute(self, fn: Callable, args: Tuple, cpu_deadline: Optional[float]) -> Tuple[Any, float, float]:
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, _run_timed, fn, args)
+
+        try:
+            return await asyncio.wait_for(future, timeout=cpu_deadline)
+        except asyncio.TimeoutError:
+            raise ExtractionTimeoutError("El documento superó el tiempo máximo de procesamiento")
+
+
+class InlineExtractionExecutor(ExtractionExecutor):
+    """Corre la extracción en el mismo thread (bloquea el loop; solo para desarrollo)"""
+
+    name = "inline"
+
+    async def _execute(self, fn: Callable, args: Tuple, cpu_deadline: Optional[float]) -> Tuple[Any, float, float]:
+        return _run_timed(fn, args)
+
+
+def _run_timed(fn: Callable, args: Tuple) -> Tuple[Any, float, float]:
+    started_at = time.time()
+    cpu_start = time.thread_time()
+    result = fn(*args)
+    return result, started_at, time.thread_time() - cpu_start
+
+
+def _avg_ms(values) -> float:
+    if not values:
+        return 0.0
+    return round(sum(values) / len(values) * 1000, 2)
+
+
+def _percentile_ms(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct))
+    return round(sorted_values[index] * 1000, 2)
+
+
+_EXECUTORS = {
+    "process": ProcessPoolExtractionExecutor,
+    "thread": ThreadExtractionExecutor,
+    "inline": InlineExtractionExecutor,
+}
+
+_default_executor: Optional[ExtractionExecutor] = None
+
+
+def create_extraction_executor(kind: Optional[str] = None) -> ExtractionExecutor:
+    """
+    Crea un executor según configuración (variables de entorno):
+        EXTRACTION_EXECUTOR: process | thread | inline (default: process)
+        EXTRACTION_WORKERS: cantidad de workers (default: min(4, cpus))
+        EXTRACTION_CPU_DEADLINE: segundos de CPU por documento (default: 10)
+    """
+    kind = kind or os.getenv("EXTRACTION_EXECUTOR", "process")
+    if kind not in _EXECUTORS:
+        raise ValueError(f"Executor de extracción desconocido: {kind}")
+
+    workers = int(os.getenv("EXTRACTION_WORKERS", min(4, os.cpu_count() or 1)))
+    deadline = float(os.getenv("EXTRACTION_CPU_DEADLINE", "10"))
+
+    return _EXECUTORS[kind](max_workers=workers, cpu_deadline=deadline or None)
+
+
+def get_extraction_executor() -> ExtractionExecutor:
+    """Executor compartido por el proceso (se crea en el primer uso)"""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = create_extraction_executor()
+    return _default_executor
+
+
+def set_extraction_executor(executor: ExtractionExecutor) -> None:
+    """Reemplaza el executor compartido (ej: inline en desarrollo)"""
+    global _default_executor
+    if _default_executor is not None and _default_executor is not executor:
+        _default_executor.shutdown()
+    _default_executor = executor
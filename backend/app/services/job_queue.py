@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.services.metrics import StageTimer
+
+#Estados de un job (en orden)
+QUEUED = "queued"
+EXTRACTING = "extracting"
+ROASTING = "roasting"
+DONE = "done"
+FAILED = "failed"
+
+FINAL_STATES = (DONE, FAILED)
+
+
+class QueueFullError(Exception):
+    """La cola de jobs está llena; el cliente debe reintentar más tarde"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Job:
+    """Un CV esperando (o siendo) procesado por los workers"""
+
+    def __init__(self, job_id: str, file_content: bytes, filename: str, file_digest: Optional[str] = None,
+                 timer: Optional[StageTimer] = None, client: Optional[str] = None):
+        self.job_id = job_id
+        self.file_content: Optional[bytes] = file_content
+        self.filename = filename
+        self.file_digest = file_digest
+        self.timer = timer #tiempos por etapa que ya trae el request (upload)
+        self.client = client #quién lo subió (admisión por cliente)
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.fast_roast: Optional[Dict[str, Any]] = None #preview local mientras se espera al LLM
+        self.created_at = time.time()
+        self.events: List[Dict[str, Any]] = []
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._record(QUEUED)
+
+    def set_stage(self, status: str, error: Optional[str] = None) -> None:
+        """Registra una transición y la publica a los suscriptores (SSE)"""
+        if self.status in FINAL_STATES:
+            return
+        self.status = status
+        self.error = error
+        self._record(status)
+
+    def set_preview(self, fast_roast: Dict[str, Any]) -> None:
+        """Guarda el fast roast local para mostrarlo mientras el job sigue en proceso"""
+        self.fast_roast = fast_roast
+
+    def _record(self, status: str) -> None:
+        event = {
+            "roast_id": self.job_id,
+            "status": status,
+            "elapsed": round(time.time() - self.created_at, 2)
+        }
+        if self.error:
+            event["error"] = self.error
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """Devuelve las transiciones ya ocurridas y después las nuevas, hasta un estado final"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["status"] in FINAL_STATES:
+                    return
+        finally:
+            self._subscribers.discard(queue)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "roast_id": self.job_id,
+            "processing_status": self.status,
+            "error": self.error,
+            "fast_roast": self.fast_roast
+        }
+
+
+class JobQueue:
+    """
+    Cola interna de procesamiento con workers asyncio.
+    Config (variables de entorno):
+        JOB_WORKERS: jobs procesados en paralelo (default: 4)
+        JOB_QUEUE_SIZE: jobs esperando como máximo (default: 100)
+        JOB_HISTORY: jobs terminados que se recuerdan para polling (default: 1000)
+    """
+
+    def __init__(self, handler: Callable[[Job], Awaitable[None]]):
+        self.handler = handler
+        self.workers = int(os.getenv("JOB_WORKERS", "4"))
+        self.max_queue = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+        self.history_size = int(os.getenv("JOB_HISTORY", "1000"))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._completed = 0
+        self._failed = 0
+
+    def start(self) -> None:
+        """Arranca los workers (se llama en el startup o en el primer submit)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, job_id: str, file_content: bytes, filename: str, file_digest: Optional[str] = None,
+               timer: Optional[StageTimer] = None, client: Optional[str] = None) -> Job:
+        """Encola un CV; si la cola está llena rechaza enseguida"""
+        self.start()
+        job = Job(job_id, file_content, filename, file_digest, timer, client)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("La cola de CVs está llena. Probá de nuevo en unos segundos", retry_after=5)
+
+        self._jobs[job_id] = job
+        self._trim_history()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _trim_history(self) -> None:
+        #solo descartamos jobs terminados (los pendientes tienen que poder consultarse)
+        excess = len(self._jobs) - self.history_size
+        if excess <= 0:
+            return
+        for job_id in [key for key, job in self._jobs.items() if job.status in FINAL_STATES][:excess]:
+            del self._jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self.handler(job)
+                job.set_stage(DONE)
+                self._completed += 1
+            except asyncio.CancelledError:
+                job.set_stage(FAILED, "Procesamiento cancelado")
+                raise
+            except Exception as e:
+                job.set_stage(FAILED, str(e))
+                self._failed += 1
+            finally:
+                job.file_content = None #liberamos los bytes del archivo
+                self._queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "tracked_jobs": len(self._jobs),
+            "completed": self._completed,
+            "failed": self._failed
+        }
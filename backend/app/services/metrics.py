@@ -0,0 +1,165 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+#Buckets (segundos) pensados para el rango de un roast: desde un lookup de cache hasta una completion lenta
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_REGISTRY: Dict[str, "_Metric"] = {}
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        _REGISTRY[name] = self #si se registra de nuevo con el mismo nombre, el último gana
+
+    def _labels(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(labels)} {_number(value)}" for labels, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """
+    Gauge calculado al momento del scrape (no agrega costo al camino del request).
+    Con labelnames, el callback devuelve {(valores de labels): valor}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Any],
+                 labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> List[str]:
+        try:
+            if not self.labelnames:
+                return [f"{self.name} {_number(self.callback())}"]
+            return [f"{self.name}{self._labels(labels)} {_number(value)}" for labels, value in self.callback().items()]
+        except Exception:
+            return [] #una fuente rota no rompe el resto del scrape
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        #labels -> [conteo por bucket (no acumulado; el último es +Inf), suma, cantidad]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = self._labels(labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {count}")
+        return lines
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    """Todas las métricas en el formato de texto de Prometheus (0.0.4)"""
+    return "\n".join(metric.render() for metric in _REGISTRY.values()) + "\n"
+
+
+#Métricas del pipeline de roasts
+STAGE_SECONDS = Histogram(
+    "cv_roast_stage_seconds", "Duración de cada etapa del procesamiento de un CV", ("stage",)
+)
+CACHE_LOOKUPS = Counter(
+    "cv_roast_cache_lookups_total", "Búsquedas en los índices de cache por resultado", ("index", "result")
+)
+LLM_TOKENS = Counter(
+    "cv_roast_llm_tokens_total", "Tokens reportados por el proveedor del LLM", ("type",)
+)
+LLM_TIMEOUTS = Counter(
+    "cv_roast_llm_timeouts_total", "Llamadas al LLM cortadas por el deadline (con y sin streaming)"
+)
+
+
+class StageTimer:
+    """
+    Tiempos por etapa de un roast (upload_read, hash, cache_lookup, extraction, similarity, compaction,
+    prompt_build, llm_call, parse, ...). Una etapa que se repite se acumula; finish() registra cada etapa
+    una sola vez en el histograma. Solo son un par de perf_counter() por etapa.
+    """
+
+    __slots__ = ("stages", "_finished")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        for name, seconds in self.stages.items():
+            STAGE_SECONDS.observe(seconds, name)
+
+    def to_dict(self) -> Dict[str, float]:
+        """Etapas en milisegundos (para el resultado y /roast/{id}/stats)"""
+        return {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
@@ -0,0 +1,228 @@
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.metrics import Counter
+
+#Tipos de backend
+OPENAI = "openai" #API de OpenAI o cualquier servidor compatible (vLLM, llama.cpp, Ollama...) vía base_url
+MOCK = "mock" #fast roast local (cv_analyzer): sin proveedor, unos ms
+
+LLM_ROUTES = Counter(
+    "cv_roast_llm_routes_total", "Roasts por backend elegido y motivo de la elección", ("backend", "reason")
+)
+
+
+class ModelBackend:
+    """Un destino para el roast, con su cliente, su circuit breaker y una ventana móvil de latencias/errores"""
+
+    def __init__(self, name: str, kind: str = OPENAI, model: Optional[str] = None,
+                 base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 max_input_tokens: Optional[int] = None, max_tokens: int = 800, temperature: float = 0.8,
+                 breaker: Optional[CircuitBreaker] = None, window: float = 300.0):
+        self.name = name
+        self.kind = kind
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_input_tokens = max_input_tokens #None = sin límite
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.breaker = breaker or CircuitBreaker()
+        self.window = window
+        self.client = None #lo crea AIService en el primer uso
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=200) #(cuándo, latencia, ok)
+
+    def fits(self, input_tokens: int) -> bool:
+        return self.max_input_tokens is None or input_tokens <= self.max_input_tokens
+
+    def record(self, latency: float, ok: bool) -> None:
+        self._samples.append((time.monotonic(), latency, ok))
+
+    def _recent(self) -> Deque[Tuple[float, float, bool]]:
+        """Muestras dentro de la ventana; las viejas se descartan (un backend salteado vuelve a probarse)"""
+        horizon = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < horizon:
+            self._samples.popleft()
+        return self._samples
+
+    def latency_p95(self, min_samples: int = 1) -> Optional[float]:
+        """p95 de las llamadas exitosas en la ventana (None si hay menos de min_samples)"""
+        latencies = sorted(latency for _, latency, ok in self._recent() if ok)
+        if len(latencies) < max(1, min_samples):
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def error_rate(self, min_samples: int = 1) -> Optional[float]:
+        samples = self._recent()
+        if len(samples) < max(1, min_samples):
+            return None
+        return sum(1 for _, _, ok in samples if not ok) / len(samples)
+
+    def get_stats(self) -> Dict[str, Any]:
+        p95 = self.latency_p95()
+        errors = self.error_rate()
+        stats = {
+            "type": self.kind,
+            "samples": len(self._recent()),
+            "p95_latency": round(p95, 2) if p95 is not None else None,
+            "error_rate": round(errors, 3) if errors is not None else None,
+        }
+        if self.kind != MOCK:
+            stats.update({
+                "model": self.model,
+                "base_url": self.base_url,
+                "max_input_tokens": self.max_input_tokens,
+                "max_tokens": self.max_tokens,
+                "breaker": self.breaker.get_stats()
+            })
+        return stats
+
+
+class Route:
+    """Decisión de routing para un roast: backend, límite de tokens de salida y por qué"""
+
+    __slots__ = ("backend", "max_tokens", "reason", "input_tokens")
+
+    def __init__(self, backend: ModelBackend, max_tokens: Optional[int], reason: str, input_tokens: int):
+        self.backend = backend
+        self.max_tokens = max_tokens
+        self.reason = reason
+        self.input_tokens = input_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "model": self.backend.model,
+            "max_tokens": self.max_tokens,
+            "reason": self.reason,
+            "input_tokens": self.input_tokens
+        }
+
+
+class ModelRouter:
+    """
+    Elige el backend y el límite de salida de cada roast según los tokens de entrada y la latencia
+    y tasa de error recientes de cada backend:
+    - los backends van en orden de preferencia (el más barato primero); se saltean los que no
+      aceptan un CV de ese tamaño, los que tienen el breaker abierto o demasiados errores
+    - con objetivo de latencia, se elige el primero cuyo p95 reciente lo cumple (o sin datos todavía);
+      si ninguno lo cumple, el más rápido con el límite de salida mínimo
+    - el límite de salida crece con la entrada: un CV de media página no necesita la misma respuesta
+      que uno de 20
+    Config (variables de entorno):
+        LLM_BACKENDS: lista JSON de backends, en orden de preferencia, ej:
+            [{"name": "local", "base_url": "http://gpu:8000/v1", "model": "llama-3.1-8b", "max_input_tokens": 2500},
+             {"name": "mini", "model": "gpt-5-mini"}, {"name": "mock", "type": "mock"}]
+            Campos: name, type (openai | mock), model, base_url, api_key o api_key_env (default: OPENAI_API_KEY),
+            max_input_tokens, max_tokens (default: LLM_MAX_TOKENS), temperature.
+            Default: OPENAI_MODEL (gpt-5-mini) si hay OPENAI_API_KEY, si no el mock
+        LLM_LATENCY_TARGET: p95 en segundos que tiene que cumplir un backend; 0 = sin objetivo (default: 0)
+        LLM_MAX_ERROR_RATE: tasa de error reciente desde la que se saltea un backend (default: 0.5)
+        LLM_ROUTER_WINDOW / LLM_ROUTER_MIN_SAMPLES: ventana en segundos y muestras mínimas para
+            confiar en las estimaciones (default: 300 / 5)
+        LLM_MAX_TOKENS: tope de tokens de salida por backend (default: 800)
+        LLM_MIN_TOKENS / LLM_TOKENS_PER_INPUT: límite de salida = mínimo + entrada x factor, hasta el
+            tope del backend (default: 500 / 0.1)
+    """
+
+    def __init__(self, backends: List[ModelBackend], latency_target: float = None, max_error_rate: float = None,
+                 min_samples: int = None, min_tokens: int = None, tokens_per_input: float = None):
+        if not backends:
+            raise ValueError("El router necesita al menos un backend")
+        self.backends = backends
+        self.latency_target = latency_target if latency_target is not None else float(os.getenv("LLM_LATENCY_TARGET", "0"))
+        self.max_error_rate = max_error_rate if max_error_rate is not None else float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))
+        self.min_samples = min_samples or int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "5"))
+        self.min_tokens = min_tokens or int(os.getenv("LLM_MIN_TOKENS", "500"))
+        self.tokens_per_input = tokens_per_input if tokens_per_input is not None else float(os.getenv("LLM_TOKENS_PER_INPUT", "0.1"))
+
+    @classmethod
+    def from_env(cls, breaker_failures: int = 5, breaker_reset: float = 30.0) -> "ModelRouter":
+        """Arma los backends desde LLM_BACKENDS (o el default de siempre: OpenAI con la API key, o el mock)"""
+        window = float(os.getenv("LLM_ROUTER_WINDOW", "300"))
+        max_tokens = int(os.getenv("LLM_MAX_TOKENS", "800"))
+        raw = os.getenv("LLM_BACKENDS", "").strip()
+        if raw:
+            specs = json.loads(raw)
+        elif os.getenv("OPENAI_API_KEY"):
+            specs = [{"name": "openai", "model": os.getenv("OPENAI_MODEL", "gpt-5-mini")}]
+        else:
+            specs = [{"name": "mock", "type": MOCK}]
+
+        backends = []
+        for spec in specs:
+            kind = spec.get("type", OPENAI)
+            api_key = spec.get("api_key") or os.getenv(spec.get("api_key_env", "OPENAI_API_KEY"))
+            if kind == OPENAI and not api_key:
+                if not spec.get("base_url"):
+                    print(f"Backend {spec.get('name')} sin API key: lo salteamos")
+                    continue
+                api_key = "local" #los servidores locales no la validan pero el SDK la pide
+            backends.append(ModelBackend(
+                name=spec.get("name") or spec.get("model") or kind,
+                kind=kind,
+                model=spec.get("model", "gpt-5-mini") if kind == OPENAI else None,
+                base_url=spec.get("base_url"),
+                api_key=api_key if kind == OPENAI else None,
+                max_input_tokens=spec.get("max_input_tokens"),
+                max_tokens=spec.get("max_tokens", max_tokens),
+                temperature=spec.get("temperature", 0.8),
+                breaker=CircuitBreaker(failure_threshold=breaker_failures, reset_timeout=breaker_reset),
+                window=window
+            ))
+        if not backends:
+            backends = [ModelBackend("mock", MOCK, window=window)]
+        return cls(backends)
+
+    @property
+    def uses_llm(self) -> bool:
+        """True si algún backend es un LLM de verdad (no solo el mock)"""
+        return any(backend.kind != MOCK for backend in self.backends)
+
+    def _healthy(self, backend: ModelBackend) -> bool:
+        if backend.kind == MOCK:
+            return True
+        errors = backend.error_rate(self.min_samples)
+        return not backend.breaker.is_open() and (errors is None or errors <= self.max_error_rate)
+
+    def _output_limit(self, backend: ModelBackend, input_tokens: int) -> Optional[int]:
+        if backend.kind == MOCK:
+            return None
+        return min(backend.max_tokens, self.min_tokens + int(input_tokens * self.tokens_per_input))
+
+    def route(self, input_tokens: int) -> Route:
+        """Elige backend y límite de salida para un prompt de input_tokens tokens"""
+        fitting = [backend for backend in self.backends if backend.fits(input_tokens)]
+        if not fitting:
+            fitting = [max(self.backends, key=lambda backend: backend.max_input_tokens or float("inf"))]
+        healthy = [backend for backend in fitting if self._healthy(backend)]
+        candidates = healthy or fitting[:1] #todos caídos: el preferido (su breaker decide el fallback)
+        reason = "preferred" if healthy else "all_unhealthy"
+
+        chosen, limit = candidates[0], None
+        if healthy and self.latency_target > 0:
+            estimates = [(backend, backend.latency_p95(self.min_samples)) for backend in candidates]
+            within = [(backend, p95) for backend, p95 in estimates if p95 is None or p95 <= self.latency_target]
+            if within:
+                chosen, p95 = within[0]
+                reason = "within_target" if p95 is not None else "no_data"
+            else:
+                chosen = min(estimates, key=lambda item: item[1])[0]
+                reason = "fastest"
+                limit = min(chosen.max_tokens, self.min_tokens) if chosen.kind != MOCK else None
+
+        route = Route(chosen, limit if limit is not None else self._output_limit(chosen, input_tokens),
+                      reason, input_tokens)
+        LLM_ROUTES.inc(1, chosen.name, reason)
+        return route
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "latency_target": self.latency_target or None,
+            "max_error_rate": self.max_error_rate,
+            "backends": {backend.name: backend.get_stats() for backend in self.backends}
+        }
@@ -1,70 +1,222 @@
-import PyPDF2
-from docx import Document
+import asyncio
+import hashlib
 import io
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.docx_extractor import extract_docx_text
+from app.services.extraction_executor import ExtractionTimeoutError, get_extraction_executor
+from app.services.roast_store import RoastStore
+
+#Corte de extracción: con esta cantidad de caracteres ya alcanza para el prompt (0 = sin límite)
+PDF_CHAR_BUDGET = int(os.getenv("PDF_CHAR_BUDGET", "20000"))
+#Páginas que lee el primer job antes de repartir el resto entre los workers
+PDF_FIRST_PAGES = int(os.getenv("PDF_FIRST_PAGES", "4"))
+#Páginas por job como mínimo al repartir: menos no compensa abrir el PDF en otro worker
+PDF_MIN_PAGES_PER_JOB = int(os.getenv("PDF_MIN_PAGES_PER_JOB", "8"))
+
+#Último PDF abierto en cada worker (ver PDFProcessor._open_pdf)
+_open_pdfs = threading.local()
+
+#Cache de texto extraído por hash del documento (independiente del cache de roasts)
+_text_cache = RoastStore(
+    max_bytes=int(float(os.getenv("TEXT_CACHE_MAX_MB", "16")) * 1024 * 1024),
+    ttl_seconds=float(os.getenv("TEXT_CACHE_TTL_SECONDS", str(24 * 3600)))
+)
 
 class PDFProcessor:
     @staticmethod
-    async def extract_text_from_file(file_content: bytes, filename: str) -> str:
+    def preload() -> None:
+        """Importa PyPDF2 en el worker que lo corre (precalentamiento; ver ExtractionExecutor.warmup)"""
+        import PyPDF2  # noqa: F401
+
+    @staticmethod
+    async def extract_text_from_file(file_content: bytes, filename: str,
+                                     file_digest: Optional[str] = None) -> str:
         """
         Extrae texto de un archivo PDF o DOCX desde memoria
         Args:
             file_content: Contenido del archivo en bytes
             filename: Nombre del archivo para determinar el tipo
+            file_digest: sha256 del archivo (clave del cache de texto); se calcula si no viene
         Returns:
             str: Texto extraído del archivo
         """
         try:
+            cache_key = file_digest or hashlib.sha256(file_content).hexdigest()
+            cached = _text_cache.get(cache_key)
+            if cached is not None:
+                return cached["text"] #mismo documento: no volvemos a parsearlo
+            
             # Determinar tipo de archivo por extensión
             if filename.lower().endswith('.pdf'):
-                return await PDFProcessor._extract_from_pdf(file_content)
+                text = await PDFProcessor._extract_from_pdf(file_content, doc_key=cache_key)
             elif filename.lower().endswith(('.doc', '.docx')):
-                return await PDFProcessor._extract_from_docx(file_content)
+                text = await PDFProcessor._extract_from_docx(file_content)
             else:
                 raise ValueError("Formato de archivo no soportado")
+            
+            try:
+                _text_cache.put(cache_key, {"text": text})
+            except ValueError:
+                pass #texto más grande que todo el cache: no lo guardamos
+            return text
                 
+        except ExtractionTimeoutError:
+            raise
         except Exception as e:
             raise Exception(f"Error procesando archivo: {str(e)}")
 
     @staticmethod
-    async def _extract_from_pdf(file_content: bytes) -> str:
-        """Extrae texto de un PDF en memoria"""
+    async def _extract_from_pdf(file_content: bytes, char_budget: Optional[int] = None,
+                                doc_key: Optional[str] = None) -> str:
+        """
+        Extrae texto de un PDF en memoria (en el executor de extracción, fuera del event loop).
+        El primer job lee las primeras páginas (alcanza para la mayoría de los CVs); si el PDF es
+        largo, las páginas que faltan para el presupuesto de caracteres se reparten por rangos
+        entre los workers (de a PDF_MIN_PAGES_PER_JOB como mínimo) y se unen en orden.
+        El deadline de CPU es por documento: cada tanda de rangos se reparte lo que dejó la anterior,
+        y si un rango se pasa se cancelan los demás
+        """
+        if char_budget is None:
+            char_budget = PDF_CHAR_BUDGET
+        executor = get_extraction_executor()
+        doc_key = doc_key or hashlib.sha256(file_content).hexdigest()
+        cpu_left = executor.cpu_deadline
+        
         try:
-
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            #leer cada página
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
+            pages, page_count, cpu_time = await executor.run(
+                PDFProcessor._extract_pdf_pages, file_content, 0, max(1, PDF_FIRST_PAGES), char_budget, doc_key
+            )
             
-            text = PDFProcessor._clean_text(text)
+            total_chars = sum(len(page) for page in pages)
+            next_page = len(pages)
+            while next_page < page_count and not (char_budget and total_chars >= char_budget):
+                if cpu_left:
+                    cpu_left -= cpu_time
+                    if cpu_left <= 0:
+                        raise ExtractionTimeoutError("El documento superó el tiempo máximo de procesamiento")
+                
+                #cuántas páginas faltan (estimado con el promedio de caracteres por página)
+                wanted = page_count - next_page
+                if char_budget and pages:
+                    avg_chars = max(1, total_chars // len(pages))
+                    wanted = min(wanted, -(-(char_budget - total_chars) // avg_chars) + 1)
+                
+                #las repartimos en rangos contiguos, uno por worker; cada worker abre el PDF una vez,
+                #así que pocos rangos chicos no compensan: por debajo del mínimo va un solo job
+                per_job = max(PDF_MIN_PAGES_PER_JOB, -(-wanted // executor.max_workers))
+                ranges = [
+                    (start, min(start + per_job, next_page + wanted))
+                    for start in range(next_page, next_page + wanted, per_job)
+                ]
+                next_page += wanted
+                
+                jobs = [
+                    asyncio.ensure_future(executor.run(
+                        PDFProcessor._extract_pdf_pages, file_content, start, end, char_budget, doc_key,
+                        cpu_deadline=cpu_left / len(ranges) if cpu_left else None
+                    ))
+                    for start, end in ranges
+                ]
+                try:
+                    batches = await asyncio.gather(*jobs)
+                finally:
+                    for job in jobs:
+                        job.cancel() #uno se pasó del deadline (o falló): los demás no siguen gastando
+                
+                cpu_time = sum(batch[2] for batch in batches)
+                for batch_pages, _, _ in batches: #en orden de página
+                    for page in batch_pages:
+                        if char_budget and total_chars >= char_budget:
+                            break
+                        pages.append(page)
+                        total_chars += len(page)
+            
+            text = PDFProcessor._clean_text("\n".join(pages))
             
             if not text.strip():
                 raise Exception("No se pudo extraer texto del PDF")
             return text
             
+        except ExtractionTimeoutError:
+            raise
         except Exception as e:
             raise Exception(f"Error procesando PDF: {str(e)}")
 
     @staticmethod
     async def _extract_from_docx(file_content: bytes) -> str:
-        """Extrae texto de un DOCX en memoria"""
+        """Extrae texto de un DOCX en memoria (en el executor de extracción, fuera del event loop)"""
+        return await get_extraction_executor().run(PDFProcessor._extract_from_docx_sync, file_content)
+
+    @staticmethod
+    def _extract_pdf_pages(file_content: bytes, start: int, end: int,
+                           char_budget: int = 0, doc_key: Optional[str] = None) -> Tuple[List[str], int, float]:
+        """
+        Extrae el texto de las páginas [start, end) (bloqueante, corre en un worker)
+        Returns:
+            (texto de cada página en orden, cantidad total de páginas del PDF, segundos de CPU usados)
+        """
+        cpu_start = time.thread_time()
+        pdf_reader = PDFProcessor._open_pdf(file_content, doc_key)
+        page_count = len(pdf_reader.pages)
+        
+        pages: List[str] = []
+        total_chars = 0
+        for page_num in range(start, min(end, page_count)):
+            page_text = pdf_reader.pages[page_num].extract_text()
+            pages.append(page_text)
+            total_chars += len(page_text)
+            if char_budget and total_chars >= char_budget:
+                break #ya tenemos texto suficiente para el prompt
+        
+        return pages, page_count, time.thread_time() - cpu_start
+
+    @staticmethod
+    def _open_pdf(file_content: bytes, doc_key: Optional[str]):
+        """
+        Abre el PDF; el último documento abierto queda en el worker (por thread), así los rangos
+        siguientes del mismo documento que caen en este worker no lo vuelven a parsear
+        """
+        import PyPDF2 #import diferido: en el proceso principal no se carga nunca (ver preload)
+        
+        cached = getattr(_open_pdfs, "last", None)
+        if doc_key is not None and cached is not None and cached[0] == doc_key:
+            return cached[1]
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+        len(pdf_reader.pages) #arma el árbol de páginas acá, una vez
+        _open_pdfs.last = (doc_key, pdf_reader)
+        return pdf_reader
+
+    @staticmethod
+    def _extract_from_docx_sync(file_content: bytes) -> str:
+        """Extrae texto de un DOCX en memoria (bloqueante, corre en un worker)"""
         try:
-            docx_file = io.BytesIO(file_content)
-            doc = Document(docx_file)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            #motor rápido por default (zip + XML incremental); DOCX_EXTRACTOR=python-docx usa el anterior
+            if os.getenv("DOCX_EXTRACTOR", "fast") == "python-docx":
+                text = PDFProcessor._extract_docx_with_python_docx(file_content)
+            else:
+                text = extract_docx_text(file_content)
             text = PDFProcessor._clean_text(text)
             
             if not text.strip():
                 raise Exception("No se pudo extraer texto del DOCX")    
             return text
             
+        except ExtractionTimeoutError:
+            raise
         except Exception as e:
             raise Exception(f"Error procesando DOCX: {str(e)}")
 
+    @staticmethod
+    def _extract_docx_with_python_docx(file_content: bytes) -> str:
+        """Extracción con python-docx (solo párrafos del cuerpo; sin tablas ni headers)"""
+        from docx import Document
+        
+        doc = Document(io.BytesIO(file_content))
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs)
+
     @staticmethod
     def _clean_text(text: str) -> str:
         """Limpia y normaliza el texto extraído"""
@@ -73,7 +225,13 @@ class PDFProcessor:
         return '\n'.join(lines)
 
     @staticmethod
-    def validate_file_size(file_content: bytes, max_size_mb: int = 5) -> bool:
-        """Valida que el archivo no sea muy grande"""
-        size_mb = len(file_content) / (1024 * 1024)
-        return size_mb <= max_size_mb
\ No newline at end of file
+    def get_text_cache_stats() -> Dict[str, Any]:
+        return _text_cache.get_stats()
+
+    @staticmethod
+    def validate_file_size(file_content: bytes, max_size_mb: Optional[float] = None) -> bool:
+        """Valida que el archivo no sea muy grande (default: MAX_UPLOAD_MB, el mismo límite que el upload)"""
+        if max_size_mb is None:
+            from app.services.upload_ingest import max_upload_bytes #import diferido: los workers no lo necesitan
+            return len(file_content) <= max_upload_bytes()
+        return len(file_content) / (1024 * 1024) <= max_size_mb
\ No newline at end of file
@@ -0,0 +1,608 @@
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.services.roast_store import decode_result, encode_result, in_range
+
+
+class RoastBackend:
+    """
+    Almacenamiento persistente/compartido de roasts debajo de RoastGenerator.
+    Guarda los resultados (por roast_id), los índices de contenido (digest -> roast_id) y las
+    firmas MinHash para que varios workers/réplicas vean los mismos roasts y compartan el cache.
+    """
+
+    name = "base"
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._reads = 0
+        self._writes = 0
+
+    async def start(self) -> None:
+        """Abre conexiones / tareas de fondo"""
+
+    async def close(self) -> None:
+        """Vacía lo pendiente y cierra conexiones"""
+
+    async def get(self, roast_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def put(self, roast_id: str, result: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def delete(self, roast_id: str) -> bool:
+        raise NotImplementedError
+
+    async def clear(self) -> int:
+        raise NotImplementedError
+
+    async def get_index(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set_index(self, key: str, roast_id: str) -> None:
+        raise NotImplementedError
+
+    async def put_signature(self, roast_id: str, signature: bytes) -> None:
+        raise NotImplementedError
+
+    async def load_signatures(self, limit: int) -> List[Tuple[str, bytes]]:
+        """Firmas guardadas (hasta limit, las más nuevas), de la más vieja a la más nueva"""
+        raise NotImplementedError
+
+    async def scan(self, cursor: Optional[str], limit: int, since: Optional[float] = None,
+                   until: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Una página de hasta `limit` roasts vigentes con created_at en [since, until), desde `cursor`
+        (None = el principio). Devuelve (resultados, próximo cursor o None si no quedan).
+        El cursor es opaco y propio de cada backend; uno mal formado levanta ValueError.
+        """
+        raise NotImplementedError
+
+    def _expires_at(self) -> float:
+        return time.time() + self.ttl_seconds if self.ttl_seconds else float("inf")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "reads": self._reads,
+            "writes": self._writes
+        }
+
+
+#Segundos que puede tardar un resultado en guardarse después de su created_at (jobs async, batch de escritura)
+_WRITE_LAG = 300.0
+
+
+class SQLiteRoastBackend(RoastBackend):
+    """
+    Backend SQLite en modo WAL (lectores concurrentes de varios procesos + un escritor).
+    - Pool de conexiones usado desde threads (no bloquea el event loop)
+    - Escrituras en batch: se acumulan unos milisegundos y se escriben en una sola transacción
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl_seconds: float, pool_size: int = 4,
+                 batch_size: int = 64, flush_interval: float = 0.05):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self.pool_size = max(1, pool_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        #la base se abre en start() (lifespan) o en el primer uso: importar/instanciar no toca el disco
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._open_lock = threading.Lock()
+        self._opened = False
+
+        #escrituras pendientes (None = borrar); se leen antes que la base para read-your-writes
+        self._pending_roasts: Dict[str, Optional[Tuple[bytes, float]]] = {}
+        self._pending_index: Dict[str, Tuple[str, float]] = {}
+        self._pending_signatures: Dict[str, Tuple[bytes, float]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._batches = 0
+
+    def _open(self) -> None:
+        """Abre el pool de conexiones y crea el esquema si hace falta (bloqueante, una sola vez)"""
+        with self._open_lock:
+            if self._opened:
+                return
+            connections = [self._connect() for _ in range(self.pool_size)]
+            connections[0].executescript("""
+                CREATE TABLE IF NOT EXISTS roasts (
+                    roast_id TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS roast_index (
+                    key TEXT PRIMARY KEY,
+                    roast_id TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS roast_signatures (
+                    roast_id TEXT PRIMARY KEY,
+                    signature BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_roasts_created ON roasts (created_at);
+                CREATE INDEX IF NOT EXISTS idx_signatures_created ON roast_signatures (created_at);
+            """)
+            for conn in connections:
+                self._pool.put(conn)
+            self._opened = True
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        if not self._opened:
+            self._open() #sin start() (ej: scripts) se abre en el primer uso
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self._open)
+        if self._writer is None:
+            self._wake = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        await self.flush()
+        with self._open_lock:
+            while not self._pool.empty():
+                self._pool.get().close()
+            self._opened = False
+
+    async def get(self, roast_id: str) -> Optional[Dict[str, Any]]:
+        self._reads += 1
+        if roast_id in self._pending_roasts:
+            pending = self._pending_roasts[roast_id]
+            return decode_result(pending[0]) if pending is not None else None
+
+        row = await asyncio.to_thread(
+            self._fetch_one,
+            "SELECT payload FROM roasts WHERE roast_id = ? AND expires_at > ?",
+            (roast_id, time.time())
+        )
+        return decode_result(row[0]) if row else None
+
+    async def put(self, roast_id: str, result: Dict[str, Any]) -> None:
+        self._pending_roasts[roast_id] = (encode_result(result), self._expires_at())
+        await self._schedule_flush()
+
+    async def delete(self, roast_id: str) -> bool:
+        existed = await self.get(roast_id) is not None
+        self._pending_roasts[roast_id] = None
+        await self._schedule_flush()
+        return existed
+
+    async def clear(self) -> int:
+        await self.flush()
+        return await asyncio.to_thread(self._clear_sync)
+
+    async def get_index(self, key: str) -> Optional[str]:
+        self._reads += 1
+        if key in self._pending_index:
+            return self._pending_index[key][0]
+
+        row = await asyncio.to_thread(
+            self._fetch_one,
+            "SELECT roast_id FROM roast_index WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        )
+        return row[0] if row else None
+
+    async def set_index(self, key: str, roast_id: str) -> None:
+        self._pending_index[key] = (roast_id, self._expires_at())
+        await self._schedule_flush()
+
+    async def put_signature(self, roast_id: str, signature: bytes) -> None:
+        self._pending_signatures[roast_id] = (signature, self._expires_at())
+        await self._schedule_flush()
+
+    async def load_signatures(self, limit: int) -> List[Tuple[str, bytes]]:
+        await self.flush()
+        rows = await asyncio.to_thread(self._load_signatures_sync, limit)
+        self._reads += len(rows)
+        return list(reversed(rows))
+
+    async def scan(self, cursor: Optional[str], limit: int, since: Optional[float] = None,
+                   until: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        #keyset sobre (created_at, roast_id) con idx_roasts_created: cada página es un rango del índice
+        #(created_at es el primer guardado del roast y no cambia si se reescribe)
+        after = None
+        if cursor:
+            created_at, _, roast_id = cursor.partition("|")
+            after = (float(created_at), roast_id)
+        await self.flush()
+        results, last = await asyncio.to_thread(self._scan_sync, after, limit, since, until)
+        self._reads += len(results)
+        return results, f"{last[0]!r}|{last[1]}" if last is not None else None
+
+    async def flush(self) -> None:
+        """Escribe todo lo pendiente en una sola transacción"""
+        if not self._pending_roasts and not self._pending_index and not self._pending_signatures:
+            return
+        roasts, self._pending_roasts = self._pending_roasts, {}
+        index, self._pending_index = self._pending_index, {}
+        signatures, self._pending_signatures = self._pending_signatures, {}
+        try:
+            await asyncio.to_thread(self._write_batch, roasts, index, signatures)
+        except Exception:
+            #devolvemos el batch para reintentar (sin pisar escrituras más nuevas)
+            self._pending_roasts = {**roasts, **self._pending_roasts}
+            self._pending_index = {**index, **self._pending_index}
+            self._pending_signatures = {**signatures, **self._pending_signatures}
+            raise
+
+    async def _schedule_flush(self) -> None:
+        if self._writer is None:
+            await self.flush() #sin writer de fondo (ej: scripts) escribimos en el momento
+            return
+        if self._pending_count() >= self.batch_size:
+            await self.flush()
+        else:
+            self._wake.set()
+
+    async def _write_loop(self) -> None:
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(self.flush_interval) #juntamos más escrituras en el mismo batch
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error escribiendo batch en SQLite: {str(e)}")
+
+    def _pending_count(self) -> int:
+        return len(self._pending_roasts) + len(self._pending_index) + len(self._pending_signatures)
+
+    def _fetch_one(self, sql: str, params: Tuple) -> Optional[Tuple]:
+        with self._connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _load_signatures_sync(self, limit: int) -> List[Tuple[str, bytes]]:
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT roast_id, signature FROM roast_signatures WHERE expires_at > ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+
+    def _scan_sync(self, after: Optional[Tuple[float, str]], limit: int, since: Optional[float],
+                   until: Optional[float]) -> Tuple[List[Dict[str, Any]], Optional[Tuple[float, str]]]:
+        #la columna created_at es el momento del primer guardado (>= el created_at del resultado, hasta
+        #_WRITE_LAG después): acota el rango en el índice y el filtro exacto va sobre el resultado
+        conditions, params = ["expires_at > ?"], [time.time()]
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(until + _WRITE_LAG)
+        sql = ("SELECT created_at, roast_id, payload FROM roasts WHERE " + " AND ".join(conditions)
+               + " AND (created_at > ? OR (created_at = ? AND roast_id > ?)) ORDER BY created_at, roast_id LIMIT ?")
+
+        results: List[Dict[str, Any]] = []
+        position = after or (float("-inf"), "")
+        with self._connection() as conn:
+            while len(results) < limit:
+                rows = conn.execute(sql, (*params, position[0], position[0], position[1], limit)).fetchall()
+                for created_at, roast_id, payload in rows:
+                    position = (created_at, roast_id)
+                    #decodificamos acá, en el thread, para no ocupar el event loop
+                    result = decode_result(payload)
+                    if in_range(result, since, until):
+                        results.append(result)
+                        if len(results) >= limit:
+                            return results, position
+                if len(rows) < limit:
+                    return results, None
+        return results, position
+
+    def _write_batch(self, roasts: Dict[str, Optional[Tuple[bytes, float]]],
+                     index: Dict[str, Tuple[str, float]],
+                     signatures: Dict[str, Tuple[bytes, float]]) -> None:
+        now = time.time()
+        upserts = [(roast_id, value[0], value[1], now) for roast_id, value in roasts.items() if value is not None]
+        deletes = [(roast_id,) for roast_id, value in roasts.items() if value is None]
+
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if upserts:
+                    #un roast que se vuelve a guardar conserva su created_at: scan no lo saltea ni lo repite
+                    conn.executemany(
+                        "INSERT INTO roasts (roast_id, payload, expires_at, created_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (roast_id) DO UPDATE SET "
+                        "payload = excluded.payload, expires_at = excluded.expires_at",
+                        upserts
+                    )
+                if deletes:
+                    conn.executemany("DELETE FROM roasts WHERE roast_id = ?", deletes)
+                    conn.executemany("DELETE FROM roast_index WHERE roast_id = ?", deletes)
+                    conn.executemany("DELETE FROM roast_signatures WHERE roast_id = ?", deletes)
+                if index:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO roast_index (key, roast_id, expires_at) VALUES (?, ?, ?)",
+                        [(key, value[0], value[1]) for key, value in index.items()]
+                    )
+                if signatures:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO roast_signatures (roast_id, signature, expires_at, created_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        [(roast_id, value[0], value[1], now) for roast_id, value in signatures.items()]
+                    )
+                conn.execute("DELETE FROM roasts WHERE expires_at <= ?", (now,))
+                conn.execute("DELETE FROM roast_index WHERE expires_at <= ?", (now,))
+                conn.execute("DELETE FROM roast_signatures WHERE expires_at <= ?", (now,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        self._writes += len(upserts) + len(deletes) + len(index) + len(signatures)
+        self._batches += 1
+
+    def _clear_sync(self) -> int:
+        with self._connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM roasts").fetchone()[0]
+            conn.execute("DELETE FROM roasts")
+            conn.execute("DELETE FROM roast_index")
+            conn.execute("DELETE FROM roast_signatures")
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update({
+            "path": self.path,
+            "pool_size": self.pool_size,
+            "pending_writes": self._pending_count(),
+            "batches": self._batches
+        })
+        return stats
+
+
+class RedisError(Exception):
+    """Error devuelto por el servidor Redis"""
+
+
+class RedisRoastBackend(RoastBackend):
+    """
+    Backend para cualquier servidor que hable el protocolo de Redis (RESP).
+    Cliente mínimo sobre asyncio (sin dependencias extra) con un pool de conexiones;
+    se puede probar contra el stand-in local de benchmarks/fake_redis.py (GET/MGET/SET/DEL/SCAN).
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: float, pool_size: int = 8, prefix: str = "roast:"):
+        super().__init__(ttl_seconds)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.pool_size = max(1, pool_size)
+        self._aux_prefixes = ((prefix + "idx:").encode(), (prefix + "sim:").encode()) #claves que no son roasts
+
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def start(self) -> None:
+        await self.command("PING")
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def get(self, roast_id: str) -> Optional[Dict[str, Any]]:
+        self._reads += 1
+        payload = await self.command("GET", self.prefix + roast_id)
+        return decode_result(payload) if payload is not None else None
+
+    async def put(self, roast_id: str, result: Dict[str, Any]) -> None:
+        self._writes += 1
+        await self.command("SET", self.prefix + roast_id, encode_result(result), *self._ttl_args())
+
+    async def delete(self, roast_id: str) -> bool:
+        self._writes += 1
+        deleted = await self.command("DEL", self.prefix + roast_id) > 0
+        await self.command("DEL", self.prefix + "sim:" + roast_id)
+        return deleted
+
+    async def clear(self) -> int:
+        count = 0
+        cursor = b"0"
+        while True:
+            cursor, keys = await self.command("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 500)
+            if keys:
+                await self.command("DEL", *keys)
+                count += sum(1 for key in keys if not key.startswith(self._aux_prefixes))
+            if cursor in (b"0", 0):
+                return count
+
+    async def get_index(self, key: str) -> Optional[str]:
+        self._reads += 1
+        roast_id = await self.command("GET", self.prefix + "idx:" + key)
+        return roast_id.decode() if roast_id is not None else None
+
+    async def set_index(self, key: str, roast_id: str) -> None:
+        self._writes += 1
+        await self.command("SET", self.prefix + "idx:" + key, roast_id, *self._ttl_args())
+
+    async def put_signature(self, roast_id: str, signature: bytes) -> None:
+        self._writes += 1
+        await self.command("SET", self.prefix + "sim:" + roast_id, signature, *self._ttl_args())
+
+    async def load_signatures(self, limit: int) -> List[Tuple[str, bytes]]:
+        #SCAN no tiene orden: si hay más de limit firmas nos quedamos con cualquiera de ellas
+        signatures: List[Tuple[str, bytes]] = []
+        skip = len(self.prefix + "sim:")
+        cursor = b"0"
+        while len(signatures) < limit:
+            cursor, keys = await self.command("SCAN", cursor, "MATCH", self.prefix + "sim:*", "COUNT", 500)
+            keys = keys[:limit - len(signatures)]
+            if keys:
+                values = await self.command("MGET", *keys)
+                signatures.extend(
+                    (key[skip:].decode(), value) for key, value in zip(keys, values) if value is not None
+                )
+            if cursor in (b"0", 0):
+                break
+        self._reads += len(signatures)
+        return signatures
+
+    async def scan(self, cursor: Optional[str], limit: int, since: Optional[float] = None,
+                   until: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        #cursor = "cursor de SCAN:claves ya vistas de ese lote"; SCAN no tiene orden y el rango de
+        #fechas se filtra con el created_at de cada resultado
+        scan_cursor, skip = "0", 0
+        if cursor:
+            scan_cursor, _, seen = cursor.partition(":")
+            scan_cursor, skip = str(int(scan_cursor)), int(seen or 0)
+        results: List[Dict[str, Any]] = []
+        while True:
+            next_cursor, keys = await self.command(
+                "SCAN", scan_cursor, "MATCH", self.prefix + "*", "COUNT", max(limit, 100)
+            )
+            keys = [key for key in keys if not key.startswith(self._aux_prefixes)][skip:]
+            values = await self.command("MGET", *keys) if keys else []
+            for position, value in enumerate(values):
+                if value is None:
+                    continue
+                result = decode_result(value)
+                if not in_range(result, since, until):
+                    continue
+                results.append(result)
+                if len(results) >= limit and position + 1 < len(values):
+                    self._reads += len(results)
+                    return results, f"{scan_cursor}:{skip + position + 1}"
+            skip = 0
+            scan_cursor = next_cursor.decode() if isinstance(next_cursor, bytes) else str(next_cursor)
+            if scan_cursor == "0" or len(results) >= limit:
+                self._reads += len(results)
+                return results, (f"{scan_cursor}:0" if scan_cursor != "0" else None)
+
+    def _ttl_args(self) -> List[Any]:
+        return ["PX", int(self.ttl_seconds * 1000)] if self.ttl_seconds else []
+
+    async def command(self, *args) -> Any:
+        """Manda un comando y devuelve la respuesta usando una conexión del pool"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._open()
+            try:
+                reply = await _send_command(*conn, args)
+            except RedisError:
+                self._idle.append(conn) #error del comando: la conexión sigue sana
+                raise
+            except BaseException:
+                conn[1].close()
+                raise
+            self._idle.append(conn)
+            return reply
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        conn = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await _send_command(*conn, ("AUTH", self.password))
+        if self.db:
+            await _send_command(*conn, ("SELECT", self.db))
+        return conn
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update({
+            "host": f"{self.host}:{self.port}/{self.db}",
+            "pool_size": self.pool_size,
+            "idle_connections": len(self._idle)
+        })
+        return stats
+
+
+async def _send_command(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, args: Tuple) -> Any:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        elif not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    writer.write(b"".join(parts))
+    await writer.drain()
+    return await _read_reply(reader)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Conexión con Redis cerrada")
+
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise RedisError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(body)
+        if count < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(count)]
+    raise RedisError(f"Respuesta RESP inválida: {line!r}")
+
+
+def create_roast_backend(ttl_seconds: float) -> Optional[RoastBackend]:
+    """
+    Crea el backend según configuración (variables de entorno):
+        ROAST_BACKEND: memory | sqlite | redis (default: memory, sin backend compartido)
+        ROAST_SQLITE_PATH: archivo de la base (default: roasts.db)
+        REDIS_URL: redis://[:password@]host:port/db (default: redis://localhost:6379/0)
+    """
+    kind = os.getenv("ROAST_BACKEND", "memory")
+    if kind == "memory":
+        return None
+    if kind == "sqlite":
+        return SQLiteRoastBackend(
+            os.getenv("ROAST_SQLITE_PATH", "roasts.db"), ttl_seconds,
+            pool_size=int(os.getenv("ROAST_SQLITE_POOL", "4"))
+        )
+    if kind == "redis":
+        return RedisRoastBackend(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"), ttl_seconds,
+            pool_size=int(os.getenv("REDIS_POOL_SIZE", "8"))
+        )
+    raise ValueError(f"Backend de roasts desconocido: {kind}")
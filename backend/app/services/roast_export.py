@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict
+
+#Columnas del export (una fila por roast, sin el texto del roast ni el CV)
+EXPORT_FIELDS = (
+    "roast_id", "created_at", "brutality_level", "cv_length", "cv_tokens", "input_tokens",
+    "processing_time", "feedback_count", "feedback_points", "from_cache", "fallback",
+    "similar_to", "llm_backend"
+)
+
+
+def export_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Fila plana de un resultado guardado para analytics"""
+    route = result.get("route") or {}
+    return {
+        "roast_id": result.get("roast_id"),
+        "created_at": result.get("created_at"),
+        "brutality_level": result.get("brutality_level"),
+        "cv_length": result.get("cv_length"),
+        "cv_tokens": result.get("cv_tokens"),
+        "input_tokens": result.get("input_tokens"),
+        "processing_time": result.get("processing_time"),
+        "feedback_count": result.get("feedback_count"),
+        "feedback_points": result.get("feedback_points") or [],
+        "from_cache": result.get("from_cache", False),
+        "fallback": result.get("fallback"),
+        "similar_to": result.get("similar_to"),
+        "llm_backend": route.get("backend"),
+    }
+
+
+async def ndjson_lines(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Una línea JSON por roast"""
+    async for result in results:
+        yield json.dumps(export_row(result), ensure_ascii=False) + "\n"
+
+
+async def csv_lines(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Header y una fila CSV por roast; los feedback_points van juntos en una celda separados por " | " """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    async for result in results:
+        row = export_row(result)
+        row["feedback_points"] = " | ".join(str(point) for point in row["feedback_points"])
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue() #solo el header: no había roasts
@@ -1,100 +1,706 @@
+import asyncio
 import hashlib
 import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
 import time
-from app.services.ai_service import AIService
+from app.services.ai_service import AIService, CapacityExceededError
+from app.services.admission import AdmissionController, RateLimitedError
 from app.services.pdf_processor import PDFProcessor
+from app.services.extraction_executor import ExtractionTimeoutError, get_extraction_executor
+from app.services.roast_store import RoastStore, encode_public
+from app.services.roast_backends import create_roast_backend
+from app.services.text_compactor import TextCompactor
+from app.services.similarity_index import SimilarityIndex, minhash
+from app.services.cv_analyzer import fast_roast
+from app.services.upload_ingest import max_upload_bytes
+from app.services.metrics import CACHE_LOOKUPS, StageTimer
 
 class RoastGenerator:
     def __init__(self):
         """Inicializa el generador de roasts"""
         self.ai_service = AIService()
         self.pdf_processor = PDFProcessor()
+        #Compacta el texto del CV al presupuesto de tokens del prompt
+        self.text_compactor = TextCompactor()
+        self._tokens_saved = 0
         
-        #Cache en memoria para evitar reprocesar CVs idénticos
-        self._cache = {}
+        #Store único de resultados (LRU + TTL + límite en bytes); también hace de cache
+        #y guarda la respuesta de GET /roast/{id} ya serializada
+        self.store = RoastStore(on_remove=self._drop_index_entries, render=encode_public)
+        #Backend compartido entre workers (SQLite/Redis); None = solo memoria del proceso
+        self.backend = create_roast_backend(self.store.ttl_seconds)
+        #Índices content-addressed: "file" (digest de los bytes) / "text" (digest del texto normalizado) -> roast_id,
+        #y "alias": id de un job async que salió del cache -> roast que ya existía
+        self._indexes: Dict[str, Dict[str, str]] = {"file": {}, "text": {}, "alias": {}}
+        self._index_keys: Dict[str, List[Tuple[str, str]]] = {} #roast_id -> claves que apuntan a él
+        self._cache_hits = 0
+        self._cache_misses = 0
+        #Índice de CVs casi duplicados (MinHash + LSH): reutiliza el roast de una versión apenas distinta
+        self.similarity = SimilarityIndex()
+        self._similar_hits = 0
         
-    async def process_cv_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        #Single-flight: uploads idénticos concurrentes esperan al mismo procesamiento
+        self._in_flight: Dict[str, "_Flight"] = {}
+        self._coalesced = 0
+        #Admisión por cliente (token bucket + fair queuing) delante de extracción + LLM
+        self.admission = AdmissionController()
+        
+    async def process_cv_file(self, file_content: bytes, filename: str,
+                              on_stage: Optional[Callable[[str], None]] = None,
+                              file_digest: Optional[str] = None,
+                              timer: Optional[StageTimer] = None,
+                              on_preview: Optional[Callable[[Dict[str, Any]], None]] = None,
+                              client: Optional[str] = None,
+                              rate_limit: bool = True,
+                              roast_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Procesa un CV completo: extrae texto, genera roast y feedback
         Args:
             file_content: Contenido del archivo en bytes
             filename: Nombre del archivo
+            on_stage: Callback opcional que recibe cada etapa ("extracting", "roasting")
+            file_digest: sha256 del archivo si ya se calculó al recibirlo (evita re-hashear)
+            timer: StageTimer del request (trae las etapas del upload); si no viene se crea uno
+            on_preview: Callback opcional que recibe el fast roast local mientras se espera al LLM
+            client: Id del cliente para la admisión (None = sin admisión); los cache hits no la pasan
+            rate_limit: Si consume un token del cliente (un batch ya pagó el suyo al entrar)
+            roast_id: Id con el que se guarda el resultado (ej: el del job async); si el roast sale
+                del cache, roast_id queda como alias del que ya existía (no se guarda una copia)
         Returns:
             Dict con todo el resultado del roast
         """
         start_time = time.time()
+        timer = timer if timer is not None else StageTimer()
         
         try:
             #Validar tamaño del archivo
             if not self.pdf_processor.validate_file_size(file_content):
-                raise ValueError("Archivo muy grande (máximo 5MB)")
-            
-            #Generar ID único para este roast
-            roast_id = self._generate_roast_id(file_content, filename)
+                raise ValueError(f"Archivo muy grande (máximo {max_upload_bytes() // (1024 * 1024)}MB)")
             
-            #Verificar cache (para ahorrar API calls)
-            if roast_id in self._cache:
-                cached_result = self._cache[roast_id].copy()
-                cached_result["from_cache"] = True
-                return cached_result
+            #Verificar cache por contenido del archivo (re-upload exacto)
+            file_key = file_digest or self._timed_file_digest(file_content, timer)
+            result = await self.lookup_file(file_key, timer)
+            if result is None:
+                if client is not None and rate_limit:
+                    self.charge(client, file_key)
+                result = await self._single_flight(
+                    file_key,
+                    lambda flight: self._admitted(
+                        client, flight.timer,
+                        self._process_uncached(file_content, filename, file_key, start_time, flight.set_stage,
+                                               flight.timer, flight.set_preview if on_preview else None, roast_id)
+                    ),
+                    on_stage=on_stage, on_preview=on_preview, timer=timer
+                )
+            if roast_id is not None and result["roast_id"] != roast_id:
+                await self._index("alias", roast_id, result["roast_id"])
+            return result
             
+        except (ExtractionTimeoutError, CapacityExceededError, RateLimitedError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error procesando tu CV: {str(e)}")
+        finally:
+            timer.finish()
+
+    async def lookup_file(self, file_digest: str, timer: Optional[StageTimer] = None) -> Optional[Dict[str, Any]]:
+        """Resultado ya guardado para estos bytes (re-upload exacto), sin procesar nada; None si no hay"""
+        timer = timer if timer is not None else StageTimer()
+        with timer.stage("cache_lookup"):
+            return await self._lookup("file", file_digest)
+
+    def charge(self, client: str, file_digest: str) -> bool:
+        """
+        Cobra un token de la cuota del cliente (RateLimitedError si no le queda) por un archivo que
+        no estaba en cache; sumarse a uno que ya se está procesando no cuesta nada.
+        Devuelve si cobró (para devolverlo con admission.refund si el trabajo no arranca)
+        """
+        if file_digest in self._in_flight:
+            return False
+        self.admission.check_rate(client)
+        return True
+
+    async def _admitted(self, client: Optional[str], timer: StageTimer, work) -> Dict[str, Any]:
+        """Corre work (una corutina) cuando el cliente consigue lugar"""
+        if client is None:
+            return await work
+        try:
+            async with self.admission.slot(client, timer):
+                return await work
+        finally:
+            work.close() #si se rechazó o canceló antes de arrancar, no queda la corutina sin await
+
+    async def _process_uncached(self, file_content: bytes, filename: str,
+                                file_key: str, start_time: float,
+                                on_stage: Optional[Callable[[str], None]],
+                                timer: StageTimer,
+                                on_preview: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                roast_id: Optional[str] = None) -> Dict[str, Any]:
+        """Extrae el texto y genera el roast de un archivo que no estaba en cache (bajo roast_id si viene)"""
+        cv_text, text_key, signature, cached_result = await self._extract_and_lookup(
+            file_content, filename, file_key, start_time, on_stage, timer, roast_id
+        )
+        if cached_result is not None:
+            return cached_result
+        
+        self._cache_misses += 1
+        roast_id = roast_id or self.generate_roast_id()
+        
+        #Generar roast con IA
+        if on_preview and self.ai_service.use_openai:
+            on_preview(self._preview(cv_text)) #respuesta instantánea mientras esperamos al LLM
+        if on_stage:
+            on_stage("roasting")
+        with timer.stage("compaction"):
+            compacted = self._compact(cv_text)
+        ai_result = await self.ai_service.generate_roast_and_feedback(compacted["text"], timer)
+        
+        result = self._build_result(roast_id, ai_result, cv_text, start_time, compacted, timer)
+        
+        await self._add_to_cache(roast_id, result, file_key, text_key, signature) #guardamos en caché
+        
+        return result
+
+    async def _extract_and_lookup(self, file_content: bytes, filename: str, file_key: str, start_time: float,
+                                  on_stage: Optional[Callable[[str], None]], timer: StageTimer,
+                                  roast_id: Optional[str] = None
+                                  ) -> Tuple[str, str, Optional[bytes], Optional[Dict[str, Any]]]:
+        """
+        Extrae el texto y busca un roast por texto normalizado o por un CV casi igual
+        Returns:
+            (texto del CV, digest del texto, firma MinHash, resultado reutilizado o None)
+        """
+        if on_stage:
+            on_stage("extracting")
+        with timer.stage("extraction"):
             cv_text = await self.pdf_processor.extract_text_from_file(
-                file_content, filename
-            ) #extraemos el texto 
-            
-            #Validar que el texto no esté vacío
-            if len(cv_text.strip()) < 50:
-                raise ValueError("El CV parece estar vacío o tener muy poco contenido")
+                file_content, filename, file_digest=file_key
+            ) #extraemos el texto (o lo sacamos del cache de texto)
+        
+        #Validar que el texto no esté vacío
+        if len(cv_text.strip()) < 50:
+            raise ValueError("El CV parece estar vacío o tener muy poco contenido")
+        
+        #Verificar cache por texto normalizado (mismo CV re-exportado)
+        with timer.stage("cache_lookup"):
+            text_key = self._text_digest(cv_text)
+            cached_result = await self._lookup("text", text_key)
+        if cached_result is not None:
+            await self._index("file", file_key, cached_result["roast_id"])
+            return cv_text, text_key, None, cached_result
+        
+        #Verificar si ya roasteamos una versión casi igual del mismo CV
+        with timer.stage("similarity"):
+            signature = await self._signature(cv_text)
+        similar_result = await self._reuse_similar(signature, cv_text, file_key, text_key, start_time, timer,
+                                                   roast_id)
+        return cv_text, text_key, signature, similar_result
+
+    async def stream_cv_file(self, file_content: bytes, filename: str,
+                             file_digest: Optional[str] = None,
+                             timer: Optional[StageTimer] = None,
+                             client: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versión streaming de process_cv_file: emite el roast y cada feedback apenas
+        el modelo los termina de generar. Comparte el single-flight con process_cv_file: si el CV
+        ya se está procesando espera ese resultado, y si lo arranca este stream, los uploads
+        idénticos que lleguen mientras tanto esperan a este en vez de llamar otra vez al LLM
+        Yields:
+            {"type": "fast_roast", "data": Dict} con el análisis local antes de llamar al LLM,
+            {"type": "roast" | "feedback", ...}, {"type": "replace", ...} si lo emitido no quedó
+            como roast final, y al final {"type": "result", "data": Dict} con el mismo resultado
+            (y la misma entrada de cache) que process_cv_file
+        """
+        start_time = time.time()
+        timer = timer if timer is not None else StageTimer()
+        flight_task: Optional[asyncio.Future] = None
+        
+        try:
+            if not self.pdf_processor.validate_file_size(file_content):
+                raise ValueError(f"Archivo muy grande (máximo {max_upload_bytes() // (1024 * 1024)}MB)")
             
-            #Generar roast con IA
-            ai_result = await self.ai_service.generate_roast_and_feedback(cv_text)
+            file_key = file_digest or self._timed_file_digest(file_content, timer)
+            result = await self.lookup_file(file_key, timer)
+            streamed = False
+            if result is None:
+                if client is not None:
+                    self.charge(client, file_key)
+                #los eventos del LLM llegan por la cola; el resultado, por el flight (como a los demás que esperan)
+                events: asyncio.Queue = asyncio.Queue()
+                flight_task = asyncio.ensure_future(self._single_flight(
+                    file_key,
+                    lambda flight: self._admitted(
+                        client, flight.timer,
+                        self._stream_uncached(file_content, filename, file_key, start_time, flight.set_stage,
+                                              flight.timer, flight.set_preview, events.put_nowait)
+                    ),
+                    timer=timer
+                ))
+                while not flight_task.done() or not events.empty():
+                    if events.empty():
+                        getter = asyncio.ensure_future(events.get())
+                        await asyncio.wait({getter, flight_task}, return_when=asyncio.FIRST_COMPLETED)
+                        if not getter.done():
+                            getter.cancel()
+                            continue
+                        event = getter.result()
+                    else:
+                        event = events.get_nowait()
+                    streamed = streamed or event["type"] == "roast"
+                    yield event
+                result = flight_task.result()
             
-            processing_time = time.time() - start_time #cerramos para ver tiempo total
+            if not streamed:
+                #salió del cache o de otro procesamiento: lo mandamos entero
+                yield {"type": "roast", "value": result["roast_text"]}
+                for index, item in enumerate(result["feedback_points"]):
+                    yield {"type": "feedback", "index": index, "value": item}
+            yield {"type": "result", "data": result}
             
-            result = {
+        except (ExtractionTimeoutError, CapacityExceededError, RateLimitedError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error procesando tu CV: {str(e)}")
+        finally:
+            if flight_task is not None and not flight_task.done():
+                flight_task.cancel() #el cliente se fue: si nadie más espera el flight, se cancela
+            timer.finish()
+
+    async def _stream_uncached(self, file_content: bytes, filename: str, file_key: str, start_time: float,
+                               on_stage: Callable[[str], None], timer: StageTimer,
+                               on_preview: Callable[[Dict[str, Any]], None],
+                               emit: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """Como _process_uncached, pero pasa a emit los eventos del LLM a medida que llegan"""
+        cv_text, text_key, signature, cached_result = await self._extract_and_lookup(
+            file_content, filename, file_key, start_time, on_stage, timer
+        )
+        if cached_result is not None:
+            return cached_result
+        
+        self._cache_misses += 1
+        roast_id = self.generate_roast_id()
+        if self.ai_service.use_openai:
+            preview = self._preview(cv_text)
+            on_preview(preview)
+            emit({"type": "fast_roast", "data": preview})
+        on_stage("roasting")
+        with timer.stage("compaction"):
+            compacted = self._compact(cv_text)
+        
+        async for event in self.ai_service.stream_roast_and_feedback(compacted["text"], timer):
+            if event["type"] != "result":
+                emit(event)
+                continue
+            result = self._build_result(roast_id, event["data"], cv_text, start_time, compacted, timer)
+            await self._add_to_cache(roast_id, result, file_key, text_key, signature)
+            return result
+        raise Exception("El stream del roast terminó sin resultado")
+
+    @staticmethod
+    def _preview(cv_text: str) -> Dict[str, Any]:
+        """Fast roast local (reglas, unos ms) que se muestra mientras el LLM genera el definitivo"""
+        preview = fast_roast(cv_text)
+        return {
+            "roast_text": preview["roast"],
+            "feedback_points": preview["feedback"],
+            "brutality_level": preview["brutality_level"],
+            "analysis": preview["analysis"]
+        }
+
+    def _compact(self, cv_text: str) -> Dict[str, Any]:
+        """Pasa el texto extraído por el TextCompactor antes de armar el prompt"""
+        compacted = self.text_compactor.compact(cv_text)
+        self._tokens_saved += compacted["original_tokens"] - compacted["tokens"]
+        return compacted
+
+    def _build_result(self, roast_id: str, ai_result: Dict[str, Any], cv_text: str,
+                      start_time: float, compacted: Dict[str, Any], timer: StageTimer) -> Dict[str, Any]:
+        """Arma el resultado que se guarda en cache y se devuelve al cliente"""
+        processing_time = time.time() - start_time #cerramos para ver tiempo total
+        
+        return {
+            "roast_id": roast_id,
+            "roast_text": ai_result["roast"],
+            "feedback_points": ai_result["feedback"],
+            "brutality_level": ai_result["brutality_level"],
+            "processing_time": round(processing_time, 2),
+            "created_at": datetime.now().isoformat(),
+            "cv_length": len(cv_text),
+            "feedback_count": len(ai_result["feedback"]),
+            "cv_tokens_original": compacted["original_tokens"],
+            "cv_tokens": compacted["tokens"],
+            "cv_truncated": compacted["truncated"],
+            "input_tokens": ai_result["input_tokens"],
+            "input_tokens_estimated": ai_result["input_tokens_estimated"],
+            "fallback": ai_result.get("fallback"),
+            "route": ai_result.get("route"),
+            "stages_ms": timer.to_dict(),
+            "from_cache": False
+        }
+
+    async def _single_flight(self, key: str, factory,
+                             on_stage: Optional[Callable[[str], None]] = None,
+                             on_preview: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+        """
+        Ejecuta factory(flight) una sola vez por key aunque lleguen varios requests a la vez.
+        Las etapas, el preview y los tiempos del procesamiento (flight.set_stage, flight.set_preview,
+        flight.timer) llegan a todos los que esperan, no solo al que lo arrancó.
+        Los errores llegan a todos los que esperan; si un cliente se va solo deja de
+        esperar, y el procesamiento se cancela cuando ya no queda nadie esperando.
+        """
+        flight = self._in_flight.get(key)
+        leader = flight is None
+        
+        if leader:
+            flight = _Flight()
+            flight.join(on_stage, on_preview, timer)
+            flight.task = asyncio.ensure_future(factory(flight))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish_flight(key, flight))
+        else:
+            self._coalesced += 1
+            flight.join(on_stage, on_preview, timer)
+        
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            flight.leave(on_stage, on_preview, timer)
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+        
+        if leader:
+            return result
+        
+        shared_result = result.copy()
+        shared_result["from_cache"] = True
+        return shared_result
+
+    def _finish_flight(self, key: str, flight: "_Flight") -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.task.cancelled():
+            flight.task.exception() #marcamos la excepción como leída (ya la recibieron los waiters)
+
+    def generate_roast_id(self) -> str:
+        #ID público corto e independiente del contenido (no expone el hash del archivo)
+        while True:
+            roast_id = f"roast-{uuid.uuid4().hex[:12]}"
+            if roast_id not in self.store:
+                return roast_id
+
+    @staticmethod
+    def _file_digest(file_content: bytes) -> str:
+        """Digest completo de los bytes del archivo"""
+        return hashlib.sha256(file_content).hexdigest()
+
+    def _timed_file_digest(self, file_content: bytes, timer: StageTimer) -> str:
+        with timer.stage("hash"):
+            return self._file_digest(file_content)
+
+    @staticmethod
+    def _text_digest(cv_text: str) -> str:
+        """Digest del texto normalizado (el que devuelve PDFProcessor._clean_text)"""
+        normalized = PDFProcessor._clean_text(cv_text)
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    async def _lookup(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """Busca un resultado cacheado a partir de uno de los índices de contenido ("file" / "text")"""
+        roast_id = self._indexes[kind].get(key)
+        if roast_id is None and self.backend is not None:
+            roast_id = await self._from_backend(self.backend.get_index(f"{kind}:{key}"))
+            if roast_id is not None:
+                self._remember_index(kind, key, roast_id)
+        if roast_id is None:
+            CACHE_LOOKUPS.inc(1, kind, "miss")
+            return None
+        
+        cached_result = await self.get_roast(roast_id)
+        if cached_result is None:
+            CACHE_LOOKUPS.inc(1, kind, "miss")
+            return None
+        
+        self._cache_hits += 1
+        CACHE_LOOKUPS.inc(1, kind, "hit")
+        cached_result["from_cache"] = True
+        return cached_result
+
+    async def _signature(self, cv_text: str) -> Optional[bytes]:
+        """Firma MinHash del CV, en el executor de extracción (es CPU puro y no debe trabar el event loop)"""
+        if not self.similarity.enabled:
+            return None
+        return await get_extraction_executor().run(minhash, cv_text)
+
+    async def _reuse_similar(self, signature: Optional[bytes], cv_text: str, file_key: str,
+                             text_key: str, start_time: float, timer: StageTimer,
+                             roast_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Si hay un roast de un CV casi idéntico (similitud >= SIMILARITY_THRESHOLD) lo reutiliza
+        sin llamar a OpenAI: se guarda como un roast nuevo que apunta al original (similar_to)
+        """
+        if signature is None:
+            return None
+        
+        with timer.stage("similarity"):
+            original = None
+            for similar_id, similarity in self.similarity.query(signature):
+                original = await self.get_roast(similar_id)
+                if original is not None:
+                    break
+                self.similarity.remove(similar_id) #expiró o se borró
+        
+        if original is not None:
+            roast_id = roast_id or self.generate_roast_id()
+            result = dict(original)
+            result.update({
                 "roast_id": roast_id,
-                "roast_text": ai_result["roast"],
-                "feedback_points": ai_result["feedback"],
-                "brutality_level": ai_result["brutality_level"],
-                "processing_time": round(processing_time, 2),
+                "processing_time": round(time.time() - start_time, 2),
                 "created_at": datetime.now().isoformat(),
                 "cv_length": len(cv_text),
-                "feedback_count": len(ai_result["feedback"]),
-                "from_cache": False
-            }
-            
-            self._add_to_cache(roast_id, result) #guardamos en caché
-            
+                "similar_to": similar_id,
+                "similarity": round(similarity, 4),
+                "stages_ms": timer.to_dict(),
+                "from_cache": True
+            })
+            await self._add_to_cache(roast_id, result, file_key, text_key)
+            self._similar_hits += 1
+            CACHE_LOOKUPS.inc(1, "similar", "hit")
             return result
-            
+        
+        CACHE_LOOKUPS.inc(1, "similar", "miss")
+        return None
+
+    async def _add_to_cache(self, roast_id: str, result: Dict[str, Any],
+                            file_key: str, text_key: str, signature: Optional[bytes] = None) -> None:
+        await self.save_roast(roast_id, result)
+        if result.get("fallback"):
+            return #respuesta local por falla de OpenAI: no la reutilizamos, el próximo upload vuelve a intentar
+        await self._index("file", file_key, roast_id)
+        await self._index("text", text_key, roast_id)
+        if signature is not None and self.similarity.enabled:
+            self.similarity.add(roast_id, signature)
+            if self.backend is not None:
+                await self._from_backend(self.backend.put_signature(roast_id, signature))
+
+    async def _index(self, kind: str, key: str, roast_id: str) -> None:
+        self._remember_index(kind, key, roast_id)
+        if self.backend is not None:
+            await self._from_backend(self.backend.set_index(f"{kind}:{key}", roast_id))
+
+    def _remember_index(self, kind: str, key: str, roast_id: str) -> None:
+        self._indexes[kind][key] = roast_id
+        self._index_keys.setdefault(roast_id, []).append((kind, key))
+
+    def _drop_index_entries(self, roast_id: str) -> None:
+        """Quita las claves de contenido que apuntan a un roast desalojado"""
+        for kind, key in self._index_keys.pop(roast_id, []):
+            if self._indexes[kind].get(key) == roast_id:
+                del self._indexes[kind][key]
+        if self.backend is None:
+            self.similarity.remove(roast_id) #sin backend el roast ya no se puede recuperar
+
+    async def _from_backend(self, operation):
+        """Corre una operación del backend; si falla seguimos solo con la memoria local"""
+        try:
+            return await operation
         except Exception as e:
-            raise Exception(f"Error procesando tu CV: {str(e)}")
+            print(f"Error en el backend de roasts ({self.backend.name}): {str(e)}")
+            return None
 
-    def _generate_roast_id(self, file_content: bytes, filename: str) -> str:
-        #Hash del contenido + timestamp para uniqueness
-        content_hash = hashlib.md5(file_content).hexdigest()[:8]
-        timestamp = str(int(time.time()))[-6:]  #últimos 6 dígitos
-        
-        return f"roast-{content_hash}-{timestamp}"
+    async def get_roast(self, roast_id: str) -> Optional[Dict[str, Any]]:
+        """Busca un roast (o el roast al que apunta un alias) en memoria y, si no está, en el backend compartido"""
+        result = await self._get_stored(roast_id)
+        if result is None:
+            target = await self._alias_target(roast_id)
+            if target is not None:
+                result = await self._get_stored(target)
+        return result
 
-    def _add_to_cache(self, roast_id: str, result: Dict[str, Any]) -> None:
-        #Limitar cache a 100 entries (para no consumir mucha memoria)
-        if len(self._cache) >= 100:
-            oldest_key = next(iter(self._cache)) #removemos la entrada más antigua
-            del self._cache[oldest_key]
-        
-        self._cache[roast_id] = result.copy()
+    async def _get_stored(self, roast_id: str) -> Optional[Dict[str, Any]]:
+        result = self.store.get(roast_id)
+        if result is None and self.backend is not None:
+            result = await self._from_backend(self.backend.get(roast_id))
+            if result is not None:
+                self.store.put(roast_id, result) #queda caliente en este worker
+        return result
+
+    async def get_roast_response(self, roast_id: str) -> Optional[Tuple[bytes, str]]:
+        """Respuesta pública de un roast (o de un alias) ya serializada (body JSON, ETag); None si no existe"""
+        response = await self._stored_response(roast_id)
+        if response is None:
+            target = await self._alias_target(roast_id)
+            if target is not None:
+                response = await self._stored_response(target)
+        return response
+
+    async def _stored_response(self, roast_id: str) -> Optional[Tuple[bytes, str]]:
+        response = self.store.get_response(roast_id)
+        if response is None and self.backend is not None:
+            result = await self._from_backend(self.backend.get(roast_id))
+            if result is not None:
+                self.store.put(roast_id, result)
+                response = self.store.get_response(roast_id)
+        return response
+
+    async def _alias_target(self, roast_id: str) -> Optional[str]:
+        """Roast al que apunta el id de un job async que salió del cache (None si no es un alias)"""
+        target = self._indexes["alias"].get(roast_id)
+        if target is None and self.backend is not None:
+            target = await self._from_backend(self.backend.get_index(f"alias:{roast_id}"))
+        return target
 
-    def get_roast_by_id(self, roast_id: str) -> Dict[str, Any]:
-        if roast_id not in self._cache:
+    async def get_roast_by_id(self, roast_id: str) -> Dict[str, Any]:
+        result = await self.get_roast(roast_id)
+        if result is None:
             raise ValueError("Roast no encontrado o expirado")
         
-        return self._cache[roast_id].copy()
+        return result
 
-    def get_cache_stats(self) -> Dict[str, int]:
-        return {
-            "cached_roasts": len(self._cache),  
-            "cache_limit": 100
-        }
\ No newline at end of file
+    async def save_roast(self, roast_id: str, result: Dict[str, Any]) -> None:
+        self.store.put(roast_id, result) #el store desaloja por LRU/TTL/bytes y nos avisa
+        if self.backend is not None:
+            await self._from_backend(self.backend.put(roast_id, result))
+
+    async def delete_roast(self, roast_id: str) -> bool:
+        roast_id = await self._alias_target(roast_id) or roast_id #borrar un alias borra el roast al que apunta
+        self.similarity.remove(roast_id)
+        deleted = self.store.delete(roast_id)
+        if self.backend is not None:
+            deleted = bool(await self._from_backend(self.backend.delete(roast_id))) or deleted
+        return deleted
+
+    async def clear_roasts(self) -> int:
+        self.similarity.clear()
+        cleared = self.store.clear()
+        if self.backend is not None:
+            cleared = max(cleared, await self._from_backend(self.backend.clear()) or 0)
+        return cleared
+
+    async def list_roasts(self, cursor: Optional[str] = None, limit: int = 100, since: Optional[float] = None,
+                          until: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Una página de roasts guardados con created_at en [since, until) y el cursor de la siguiente
+        (None si no quedan). Sale del backend compartido si hay (la memoria es solo un subconjunto),
+        si no del store. ValueError si el cursor no es válido.
+        """
+        if self.backend is not None:
+            return await self.backend.scan(cursor, limit, since, until)
+        results, last = self.store.scan(int(cursor) if cursor else 0, limit, since, until)
+        return results, str(last) if last is not None else None
+
+    async def iter_roasts(self, since: Optional[float] = None, until: Optional[float] = None,
+                          page_size: int = 200) -> AsyncIterator[Dict[str, Any]]:
+        """Todos los roasts del rango, página por página: memoria acotada a una página y el event loop libre entre páginas"""
+        cursor = None
+        while True:
+            results, cursor = await self.list_roasts(cursor, page_size, since, until)
+            for result in results:
+                yield result
+            if cursor is None:
+                return
+            await asyncio.sleep(0)
+
+    async def start(self) -> None:
+        """Conecta el backend compartido (si hay)"""
+        if self.backend is not None:
+            await self.backend.start()
+
+    async def load_similarity(self) -> None:
+        """Recarga las firmas del índice de similitud desde el backend (se puede correr en segundo plano)"""
+        if self.backend is not None and self.similarity.enabled:
+            signatures = await self._from_backend(self.backend.load_signatures(self.similarity.max_entries))
+            for roast_id, signature in signatures or []:
+                self.similarity.add(roast_id, signature)
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        stats = {
+            "cached_roasts": len(self.store),
+            "indexed_files": len(self._indexes["file"]),
+            "indexed_texts": len(self._indexes["text"]),
+            "aliases": len(self._indexes["alias"]),
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "in_flight": len(self._in_flight),
+            "coalesced": self._coalesced,
+            "cv_token_budget": self.text_compactor.token_budget,
+            "cv_tokens_saved": self._tokens_saved,
+            "similar_hits": self._similar_hits,
+            "similarity": self.similarity.get_stats()
+        }
+        if self.backend is not None:
+            stats["backend"] = self.backend.get_stats()
+        return stats
+
+
+class _FlightTimer(StageTimer):
+    """Reparte los tiempos de un procesamiento compartido entre los StageTimer de todos los que lo esperan"""
+
+    __slots__ = ("timers",)
+
+    def __init__(self):
+        super().__init__()
+        self.timers: List[StageTimer] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        super().add(name, seconds)
+        for timer in self.timers:
+            timer.add(name, seconds)
+
+    def to_dict(self) -> Dict[str, float]:
+        #el resultado lleva las etapas del primero que espera (con las de su upload)
+        return self.timers[0].to_dict() if self.timers else super().to_dict()
+
+
+class _Flight:
+    """Procesamiento en curso compartido por los requests con el mismo contenido"""
+
+    __slots__ = ("task", "waiters", "timer", "stage", "preview", "_on_stage", "_on_preview")
+
+    def __init__(self):
+        self.task: Optional[asyncio.Future] = None
+        self.waiters = 0
+        self.timer = _FlightTimer()
+        self.stage: Optional[str] = None
+        self.preview: Optional[Dict[str, Any]] = None
+        self._on_stage: List[Callable[[str], None]] = []
+        self._on_preview: List[Callable[[Dict[str, Any]], None]] = []
+
+    def join(self, on_stage: Optional[Callable[[str], None]],
+             on_preview: Optional[Callable[[Dict[str, Any]], None]], timer: Optional[StageTimer]) -> None:
+        """Suma los callbacks de uno que espera; el que llega tarde recibe la etapa y el preview actuales"""
+        if on_stage is not None:
+            self._on_stage.append(on_stage)
+            if self.stage is not None:
+                on_stage(self.stage)
+        if on_preview is not None:
+            self._on_preview.append(on_preview)
+            if self.preview is not None:
+                on_preview(self.preview)
+        if timer is not None:
+            self.timer.timers.append(timer)
+
+    def leave(self, on_stage: Optional[Callable[[str], None]],
+              on_preview: Optional[Callable[[Dict[str, Any]], None]], timer: Optional[StageTimer]) -> None:
+        if on_stage is not None:
+            self._on_stage.remove(on_stage)
+        if on_preview is not None:
+            self._on_preview.remove(on_preview)
+        if timer is not None:
+            self.timer.timers.remove(timer)
+
+    def set_stage(self, stage: str) -> None:
+        self.stage = stage
+        for callback in list(self._on_stage):
+            callback(stage)
+
+    def set_preview(self, preview: Dict[str, Any]) -> None:
+        self.preview = preview
+        for callback in list(self._on_preview):
+            callback(preview)
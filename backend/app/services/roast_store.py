@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson  #opcional: serializa/parsea varias veces más rápido que json
+except ImportError:  # pragma: no cover
+    orjson = None
+
+#Overhead aproximado por entrada (nodo del OrderedDict + tupla + float + objetos bytes/str)
+_ENTRY_OVERHEAD = 260
+
+#Campos de la respuesta pública de GET /roast/{id} (los de RoastResult)
+PUBLIC_FIELDS = ("roast_id", "roast_text", "feedback_points", "brutality_level", "processing_time", "created_at")
+
+
+class RoastStore:
+    """
+    Store único de resultados (reemplaza a roast_storage y al cache del generator).
+    - LRU real: cada get mueve la entrada al final
+    - TTL por entrada
+    - Límite de memoria en bytes, no en cantidad de entradas
+    Las entradas se guardan serializadas como JSON compacto (bytes), que pesa
+    bastante menos que el dict de Python y permite medir el tamaño exacto.
+    Con `render`, junto a cada resultado queda también su respuesta pública ya serializada
+    con su ETag (los resultados no cambian): servirla es un lookup, sin serializar nada.
+    Cada put recibe además un número de secuencia creciente: `scan` pagina por orden de llegada
+    con ese número como cursor, sin copiar el store ni alterar el orden LRU.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 on_remove: Optional[Callable[[str], None]] = None,
+                 render: Optional[Callable[[Dict[str, Any]], bytes]] = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("ROAST_STORE_MAX_MB", "64")) * 1024 * 1024)
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("ROAST_TTL_SECONDS", str(24 * 3600)))
+
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.on_remove = on_remove
+        self.render = render
+
+        #roast_id -> (vence, resultado serializado, respuesta pública serializada, ETag, secuencia)
+        #(sin render: b"", "")
+        self._entries: "OrderedDict[str, Tuple[float, bytes, bytes, str, int]]" = OrderedDict()
+        self._resident_bytes = 0
+        self._puts_since_purge = 0
+
+        #orden de llegada para paginar: secuencias crecientes (las borradas se compactan de a tandas)
+        self._sequence = 0
+        self._sequences: List[int] = []
+        self._by_sequence: Dict[int, str] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def put(self, roast_id: str, result: Dict[str, Any]) -> None:
+        payload = encode_result(result)
+        body, etag = b"", ""
+        if self.render is not None:
+            body = self.render(result)
+            etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        size = _entry_size(roast_id, payload, body, etag)
+        if size > self.max_bytes:
+            raise ValueError("El resultado es más grande que el store completo")
+
+        if roast_id in self._entries:
+            self._remove(roast_id)
+
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else float("inf")
+        self._sequence += 1
+        self._entries[roast_id] = (expires_at, payload, body, etag, self._sequence)
+        self._sequences.append(self._sequence)
+        self._by_sequence[self._sequence] = roast_id
+        self._resident_bytes += size
+
+        self._puts_since_purge += 1
+        if self._puts_since_purge >= 256:
+            self.purge_expired()
+
+        #desalojamos por LRU hasta entrar en el presupuesto
+        while self._resident_bytes > self.max_bytes:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self._evictions += 1
+            self._notify(oldest_id)
+
+    def get(self, roast_id: str) -> Optional[Dict[str, Any]]:
+        """Devuelve una copia del resultado (o None si no existe / expiró)"""
+        entry = self._touch(roast_id)
+        return decode_result(entry[1]) if entry is not None else None
+
+    def get_response(self, roast_id: str) -> Optional[Tuple[bytes, str]]:
+        """Respuesta pública ya serializada (body, ETag) sin decodificar nada; requiere `render`"""
+        entry = self._touch(roast_id)
+        return (entry[2], entry[3]) if entry is not None and entry[3] else None
+
+    def _touch(self, roast_id: str) -> Optional[Tuple[float, bytes, bytes, str, int]]:
+        entry = self._entries.get(roast_id)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        if entry[0] <= time.time():
+            self._expire(roast_id)
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(roast_id)
+        self._hits += 1
+        return entry
+
+    def scan(self, after: int = 0, limit: int = 100, since: Optional[float] = None,
+             until: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Hasta `limit` resultados vigentes en orden de llegada, a partir del cursor `after` (0 = desde
+        el principio), filtrados por created_at en [since, until) (timestamps).
+        Devuelve (resultados, próximo cursor o None si no quedan). No cuenta como hit ni mueve el LRU.
+        """
+        now = time.time()
+        results = []
+        index = bisect_right(self._sequences, after)
+        while index < len(self._sequences) and len(results) < limit:
+            sequence = self._sequences[index]
+            index += 1
+            roast_id = self._by_sequence.get(sequence)
+            if roast_id is None:
+                continue
+            entry = self._entries[roast_id]
+            if entry[0] <= now:
+                continue
+            result = decode_result(entry[1])
+            if in_range(result, since, until):
+                results.append(result)
+        if index >= len(self._sequences):
+            return results, None
+        return results, self._sequences[index - 1]
+
+    def __contains__(self, roast_id: str) -> bool:
+        entry = self._entries.get(roast_id)
+        return entry is not None and entry[0] > time.time()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def delete(self, roast_id: str) -> bool:
+        if roast_id not in self._entries:
+            return False
+        self._remove(roast_id)
+        self._notify(roast_id)
+        return True
+
+    def clear(self) -> int:
+        count = len(self._entries)
+        for roast_id in list(self._entries):
+            self._notify(roast_id)
+        self._entries.clear()
+        self._sequences.clear()
+        self._by_sequence.clear()
+        self._resident_bytes = 0
+        return count
+
+    def purge_expired(self) -> int:
+        """Elimina todas las entradas vencidas"""
+        self._puts_since_purge = 0
+        now = time.time()
+        expired = [roast_id for roast_id, entry in self._entries.items() if entry[0] <= now]
+        for roast_id in expired:
+            self._expire(roast_id)
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "resident_bytes": self._resident_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations
+        }
+
+    def _expire(self, roast_id: str) -> None:
+        self._remove(roast_id)
+        self._expirations += 1
+        self._notify(roast_id)
+
+    def _remove(self, roast_id: str) -> None:
+        _, payload, body, etag, sequence = self._entries.pop(roast_id)
+        self._resident_bytes -= _entry_size(roast_id, payload, body, etag)
+        del self._by_sequence[sequence]
+        if len(self._sequences) > 2 * len(self._by_sequence) + 1024:
+            self._sequences = [seq for seq in self._sequences if seq in self._by_sequence]
+
+    def _notify(self, roast_id: str) -> None:
+        if self.on_remove is not None:
+            self.on_remove(roast_id)
+
+
+def encode_result(result: Dict[str, Any]) -> bytes:
+    """Serializa un resultado como JSON compacto UTF-8 (formato compartido con los backends)"""
+    if orjson is not None:
+        return orjson.dumps(result)
+    return json.dumps(result, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode_result(payload: bytes) -> Dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def encode_public(result: Dict[str, Any]) -> bytes:
+    """Body de GET /roast/{id}: los campos de RoastResult en el mismo JSON que generaría FastAPI"""
+    return encode_result({field: result.get(field) for field in PUBLIC_FIELDS})
+
+
+def created_timestamp(result: Dict[str, Any]) -> Optional[float]:
+    """created_at del resultado (ISO, hora local) como timestamp; None si falta o no se entiende"""
+    try:
+        return datetime.fromisoformat(result["created_at"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def in_range(result: Dict[str, Any], since: Optional[float], until: Optional[float]) -> bool:
+    """True si el created_at del resultado cae en [since, until) (sin límites: siempre)"""
+    if since is None and until is None:
+        return True
+    created = created_timestamp(result)
+    if created is None:
+        return False
+    return (since is None or created >= since) and (until is None or created < until)
+
+
+def _entry_size(roast_id: str, payload: bytes, body: bytes, etag: str) -> int:
+    return (sys.getsizeof(payload) + sys.getsizeof(body) + sys.getsizeof(etag)
+            + sys.getsizeof(roast_id) + _ENTRY_OVERHEAD)
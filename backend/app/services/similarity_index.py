@@ -0,0 +1,158 @@
+import hashlib
+import os
+import random
+import re
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from app.services.pdf_processor import PDFProcessor
+
+#MinHash de 32 valores de 32 bits, en 8 bandas de 4 filas para el LSH
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+
+_WORD_RE = re.compile(r"\w+")
+#Shingles de 3 palabras: un cambio chico (teléfono, un bullet) toca pocos shingles
+_SHINGLE_SIZE = 3
+_PRIME = (1 << 61) - 1
+#Semilla fija: las firmas tienen que ser comparables entre procesos y reinicios (se persisten)
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+_BAND_BYTES = ROWS * 4
+
+
+def minhash(cv_text: str) -> Optional[bytes]:
+    """
+    Firma MinHash del texto normalizado (PDFProcessor._clean_text) sobre shingles de 3 palabras.
+    La fracción de valores iguales entre dos firmas estima la similitud de Jaccard de los textos.
+    None si el texto no tiene palabras. Es Python puro (unos ms por CV): se corre en el executor de extracción.
+    """
+    words = _WORD_RE.findall(PDFProcessor._clean_text(cv_text).lower())
+    if not words:
+        return None
+    size = min(_SHINGLE_SIZE, len(words))
+    shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in shingles
+    ]
+    return array("I", (
+        min((a * value + b) % _PRIME for value in hashes) & 0xFFFFFFFF
+        for a, b in _PERMUTATIONS
+    )).tobytes()
+
+
+def signature_similarity(first: bytes, second: bytes) -> float:
+    """Similitud de Jaccard estimada entre dos firmas"""
+    return sum(x == y for x, y in zip(memoryview(first).cast("I"), memoryview(second).cast("I"))) / NUM_HASHES
+
+
+class SimilarityIndex:
+    """
+    Índice de CVs casi duplicados (MinHash + LSH): firma -> roast_id.
+    Cada firma se parte en 8 bandas; dos CVs son candidatos si coinciden en al menos una banda
+    entera (solo se comparan esos, no todo el índice) y se aceptan si la similitud estimada
+    llega al threshold. Con 8x4 un par con similitud 0.8 se encuentra el 98.5% de las veces.
+    Acotado a max_entries firmas (LRU) por worker; cada firma ocupa ~1KB con sus buckets (5k ≈ 5MB).
+    Config (variables de entorno):
+        SIMILARITY_THRESHOLD: similitud mínima para reutilizar un roast (default: 0.8; 0 lo desactiva)
+        SIMILARITY_MAX_ENTRIES: firmas que se guardan como máximo (default: 5000)
+    """
+
+    def __init__(self, threshold: float = None, max_entries: int = None):
+        if threshold is None:
+            threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))
+        if max_entries is None:
+            max_entries = int(os.getenv("SIMILARITY_MAX_ENTRIES", "5000"))
+        self.enabled = threshold > 0
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        self._signatures: "OrderedDict[str, bytes]" = OrderedDict() #roast_id -> firma (orden LRU)
+        #hash de (banda, valores de la banda) -> roast_id, o lista si hay varios en el bucket
+        self._buckets: Dict[int, Union[str, List[str]]] = {}
+        self._queries = 0
+        self._matches = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _keys(signature: bytes) -> Iterable[int]:
+        for band in range(BANDS):
+            yield hash((band, signature[band * _BAND_BYTES:(band + 1) * _BAND_BYTES]))
+
+    def add(self, roast_id: str, signature: bytes) -> None:
+        if not self.enabled:
+            return
+        self.remove(roast_id)
+        self._signatures[roast_id] = signature
+        for key in self._keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = roast_id
+            elif isinstance(bucket, str):
+                self._buckets[key] = [bucket, roast_id]
+            else:
+                bucket.append(roast_id)
+
+        while len(self._signatures) > self.max_entries:
+            self.remove(next(iter(self._signatures)))
+            self._evictions += 1
+
+    def remove(self, roast_id: str) -> None:
+        signature = self._signatures.pop(roast_id, None)
+        if signature is None:
+            return
+        for key in self._keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket == roast_id:
+                del self._buckets[key]
+            elif isinstance(bucket, list) and roast_id in bucket:
+                bucket.remove(roast_id)
+                if len(bucket) == 1:
+                    self._buckets[key] = bucket[0]
+
+    def clear(self) -> None:
+        self._signatures.clear()
+        self._buckets.clear()
+
+    def query(self, signature: bytes) -> List[Tuple[str, float]]:
+        """Roasts con similitud >= threshold, del más parecido al menos parecido"""
+        if not self.enabled:
+            return []
+        self._queries += 1
+        matches: Dict[str, float] = {}
+        checked = set()
+        for key in self._keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            for roast_id in (bucket,) if isinstance(bucket, str) else bucket:
+                if roast_id in checked:
+                    continue
+                checked.add(roast_id)
+                similarity = signature_similarity(signature, self._signatures[roast_id])
+                if similarity >= self.threshold:
+                    matches[roast_id] = similarity
+
+        for roast_id in matches:
+            self._signatures.move_to_end(roast_id)
+        if matches:
+            self._matches += 1
+        return sorted(matches.items(), key=lambda item: item[1], reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._signatures),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "buckets": len(self._buckets),
+            "queries": self._queries,
+            "matches": self._matches,
+            "evictions": self._evictions
+        }
@@ -0,0 +1,103 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class RoastStreamParser:
+    """
+    Parser incremental del JSON del roast mientras llegan los tokens.
+    Emite el "roast" y cada item de "feedback" apenas su string se cierra,
+    sin esperar a que termine la respuesta completa.
+
+    Uso:
+        parser = RoastStreamParser()
+        for chunk in stream:
+            for event in parser.feed(chunk):
+                ...  # {"type": "roast", "value": ...} / {"type": "feedback", "index": i, "value": ...}
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._stack: List[Dict[str, Any]] = [] #contenedores abiertos: {"kind": "{" | "[", "expect_key", "key"}
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._offset = 0 #posición absoluta del próximo caracter
+        self._feedback_count = 0
+
+    @property
+    def text(self) -> str:
+        """Todo el texto recibido hasta ahora"""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        if not chunk:
+            return events
+
+        self._parts.append(chunk)
+        base = self._offset
+        self._offset += len(chunk)
+
+        for i, char in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    event = self._close_string(base + i + 1)
+                    if event is not None:
+                        events.append(event)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = base + i
+            elif char in "{[":
+                self._stack.append({"kind": char, "expect_key": char == "{", "key": None})
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+            elif char == ":":
+                if self._stack:
+                    self._stack[-1]["expect_key"] = False
+            elif char == ",":
+                if self._stack and self._stack[-1]["kind"] == "{":
+                    self._stack[-1]["expect_key"] = True
+                    self._stack[-1]["key"] = None
+
+        return events
+
+    def _close_string(self, end: int) -> Optional[Dict[str, Any]]:
+        if not self._stack:
+            return None
+
+        value = self._decode(self._string_start, end)
+        top = self._stack[-1]
+
+        #clave de un objeto
+        if top["kind"] == "{" and top["expect_key"]:
+            top["key"] = value
+            return None
+
+        #"roast": "..." en el objeto raíz
+        if len(self._stack) == 1 and top["key"] == "roast":
+            return {"type": "roast", "value": value}
+
+        #"feedback": ["...", "..."] en el objeto raíz
+        if len(self._stack) == 2 and top["kind"] == "[" and self._stack[0]["key"] == "feedback":
+            event = {"type": "feedback", "index": self._feedback_count, "value": value}
+            self._feedback_count += 1
+            return event
+
+        return None
+
+    def _decode(self, start: int, end: int) -> Any:
+        raw = self.text[start:end]
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return raw.strip('"')
@@ -0,0 +1,152 @@
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List
+
+#Aproximación local de tokens BPE: cada palabra cuenta ~1 token cada 4 caracteres, cada signo 1
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_PAGE_NUMBER_RE = re.compile(
+    r"^(?:(?:page|p[áa]gina|p[áa]g\.?|p\.)\s*)?\d{1,3}(?:\s*(?:of|de|/)\s*\d{1,3})?$|^-\s*\d{1,3}\s*-$",
+    re.IGNORECASE
+)
+_URL_RE = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+
+_SECTION_WORDS = (
+    "experience", "experiencia", "education", "educación", "educacion", "skills", "habilidades",
+    "projects", "proyectos", "summary", "resumen", "perfil", "profile", "certifications",
+    "certificaciones", "languages", "idiomas", "contact", "contacto", "awards", "publications",
+    "publicaciones", "references", "referencias", "work history", "employment", "formación"
+)
+
+#Cuántas líneas de links seguidas dejamos antes de resumirlas
+_MAX_URL_LINES = 3
+#Una línea corta que aparece tantas veces (o más) es header/footer repetido
+_REPEATED_MIN = 3
+
+
+def count_tokens(text: str) -> int:
+    """Cuenta tokens de forma local (sin llamar al proveedor); aproxima el tokenizer de OpenAI"""
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        tokens += (len(piece) + 3) // 4 if piece[0].isalnum() or piece[0] == "_" else 1
+    return tokens
+
+
+def is_heading(line: str) -> bool:
+    """Detecta títulos de sección (EXPERIENCIA, Education:, Skills, ...)"""
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40:
+        return False
+    lowered = stripped.lower()
+    if any(lowered == word or lowered.startswith(word + " ") for word in _SECTION_WORDS):
+        return True
+    letters = [char for char in stripped if char.isalpha()]
+    return len(letters) >= 4 and all(char.isupper() for char in letters) and len(stripped.split()) <= 4
+
+
+class TextCompactor:
+    """
+    Etapa entre PDFProcessor y AIService: achica el texto del CV antes de armar el prompt.
+    1. saca números de página y headers/footers repetidos
+    2. colapsa líneas repetidas y listas largas de URLs
+    3. recorta al presupuesto de tokens conservando los títulos de sección
+    Config: PROMPT_CV_TOKEN_BUDGET (default: 3000 tokens para el texto del CV)
+    """
+
+    def __init__(self, token_budget: int = None):
+        if token_budget is None:
+            token_budget = int(os.getenv("PROMPT_CV_TOKEN_BUDGET", "3000"))
+        self.token_budget = token_budget
+
+    def compact(self, cv_text: str) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict con el texto compactado ("text") y los conteos de tokens antes/después
+        """
+        lines = [line.strip() for line in cv_text.split("\n") if line.strip()]
+        original_tokens = count_tokens(cv_text)
+
+        lines = self._drop_boilerplate(lines)
+        lines = self._collapse_urls(lines)
+        lines, truncated = self._fit_budget(lines)
+
+        text = "\n".join(lines)
+        return {
+            "text": text,
+            "original_tokens": original_tokens,
+            "tokens": count_tokens(text),
+            "truncated": truncated
+        }
+
+    def _drop_boilerplate(self, lines: List[str]) -> List[str]:
+        counts = Counter(lines)
+        seen = set()
+        kept: List[str] = []
+
+        for line in lines:
+            if _PAGE_NUMBER_RE.match(line):
+                continue
+            if kept and kept[-1] == line:
+                continue #línea repetida seguida
+            if counts[line] >= _REPEATED_MIN and len(line) <= 120 and not is_heading(line):
+                if line in seen:
+                    continue #header/footer que se repite en cada página: lo dejamos una vez
+                seen.add(line)
+            kept.append(line)
+
+        return kept
+
+    def _collapse_urls(self, lines: List[str]) -> List[str]:
+        kept: List[str] = []
+        run = 0
+        hidden = 0
+
+        for line in lines:
+            is_url_line = bool(_URL_RE.search(line)) and len(_URL_RE.sub("", line).strip(" -•|,;")) < 15
+            if is_url_line:
+                run += 1
+                if run > _MAX_URL_LINES:
+                    hidden += 1
+                    continue
+            else:
+                if hidden:
+                    kept.append(f"[+{hidden} links más]")
+                run = hidden = 0
+            kept.append(line)
+
+        if hidden:
+            kept.append(f"[+{hidden} links más]")
+        return kept
+
+    def _fit_budget(self, lines: List[str]):
+        if not self.token_budget:
+            return lines, False
+
+        costs = [count_tokens(line) + 1 for line in lines] #+1 por el salto de línea
+        if sum(costs) <= self.token_budget:
+            return lines, False
+
+        #reservamos lugar para todos los títulos, y el resto se llena en orden
+        heading_cost = sum(cost for line, cost in zip(lines, costs) if is_heading(line))
+        body_budget = max(0, self.token_budget - heading_cost)
+
+        kept: List[str] = []
+        used = 0
+        full = False
+        cut_in_section = False
+        for line, cost in zip(lines, costs):
+            if is_heading(line):
+                kept.append(line)
+                cut_in_section = False
+                continue
+            if not full and used + cost <= body_budget:
+                kept.append(line)
+                used += cost
+                continue
+            full = True #desde acá solo quedan los títulos de las secciones siguientes
+            if not cut_in_section:
+                kept.append("[...]")
+                cut_in_section = True
+
+        return kept, True
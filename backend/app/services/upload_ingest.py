@@ -0,0 +1,256 @@
+import hashlib
+import os
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+#Firmas (magic bytes) de los formatos aceptados
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04" #DOCX es un zip
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" #.doc viejo (Word 97-2003)
+
+_EXTENSIONS = {
+    "pdf": (".pdf",),
+    "docx": (".docx", ".doc"),
+    "zip": (".zip",), #solo en el upload batch
+}
+
+#margen para boundaries y headers del multipart al chequear Content-Length
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadRejectedError(Exception):
+    """El upload no es válido; status_code indica la respuesta HTTP"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class IngestedFile:
+    """
+    Archivo recibido: contenido, digest calculado mientras llegaba y tipo real (por magic bytes).
+    read_seconds es lo que tardó en llegar el body; hash_seconds la parte de eso que fue el sha256
+    error es el motivo del rechazo cuando se lee con per_file_errors (sin contenido ni tipo)
+    """
+
+    __slots__ = ("filename", "content", "digest", "kind", "read_seconds", "hash_seconds", "error")
+
+    def __init__(self, filename: str, content: bytes, digest: str, kind: Optional[str], hash_seconds: float = 0.0,
+                 error: Optional[str] = None):
+        self.filename = filename
+        self.content = content
+        self.digest = digest
+        self.kind = kind
+        self.read_seconds = 0.0
+        self.hash_seconds = hash_seconds
+        self.error = error
+
+
+def max_upload_bytes() -> int:
+    return int(float(os.getenv("MAX_UPLOAD_MB", "5")) * 1024 * 1024)
+
+
+def sniff_kind(head: bytes) -> Optional[str]:
+    """Detecta el tipo de archivo por sus primeros bytes ("pdf" / "docx" / "doc")"""
+    #primero las firmas de prefijo: un zip sin comprimir puede tener "%PDF-" en el primer KB
+    if head.startswith(ZIP_MAGIC):
+        return "docx"
+    if head.startswith(OLE_MAGIC):
+        return "doc"
+    if PDF_MAGIC in head[:1024]: #algunos generadores meten basura antes del header
+        return "pdf"
+    return None
+
+
+def check_kind(filename: str, kind: Optional[str], allow_zip: bool = False) -> str:
+    """Valida el tipo detectado contra la extensión del archivo; devuelve el tipo final"""
+    if kind == "docx" and allow_zip and filename.lower().endswith(".zip"):
+        kind = "zip" #un zip de CVs y un DOCX tienen la misma firma
+    if kind is None:
+        raise UploadRejectedError("El archivo no es un PDF ni un DOCX válido")
+    if kind == "doc":
+        raise UploadRejectedError("Formato .doc (Word 97-2003) no soportado. Guardalo como DOCX o PDF")
+    if not filename.lower().endswith(_EXTENSIONS[kind]):
+        raise UploadRejectedError("El contenido del archivo no coincide con su extensión")
+    return kind
+
+
+class _FilePart:
+    def __init__(self, filename: str, max_bytes: int, allow_zip: bool = False, per_file_errors: bool = False):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.allow_zip = allow_zip
+        self.per_file_errors = per_file_errors
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.kind: Optional[str] = None
+        self.error: Optional[str] = None
+        self.digest = hashlib.sha256()
+        self.hash_seconds = 0.0
+        self._head = b""
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadRejectedError(
+                f"Archivo muy grande (máximo {self.max_bytes // (1024 * 1024)}MB)", status_code=413
+            )
+
+        if self.error is not None:
+            return #rechazado: el resto de la parte se descarta
+        if self.kind is None:
+            self._head += data
+            self._sniff()
+            if self.error is not None:
+                return
+
+        start = time.perf_counter()
+        self.digest.update(data)
+        self.hash_seconds += time.perf_counter() - start
+        self.chunks.append(data)
+
+    def _sniff(self, final: bool = False) -> None:
+        kind = sniff_kind(self._head)
+        if kind is None and len(self._head) < 1024 and not final:
+            return #puede ser un PDF con basura adelante; esperamos más bytes
+        try:
+            self.kind = check_kind(self.filename, kind, self.allow_zip)
+        except UploadRejectedError as e:
+            if not self.per_file_errors:
+                raise
+            self.error = str(e)
+            self.chunks = []
+        self._head = b""
+
+    def finish(self) -> IngestedFile:
+        if self.size == 0:
+            self._reject("El archivo está vacío")
+        elif self.kind is None and self.error is None:
+            self._sniff(final=True)
+        if self.error is not None:
+            return IngestedFile(self.filename, b"", "", None, error=self.error)
+        return IngestedFile(self.filename, b"".join(self.chunks), self.digest.hexdigest(), self.kind, self.hash_seconds)
+
+    def _reject(self, message: str) -> None:
+        if not self.per_file_errors:
+            raise UploadRejectedError(message)
+        self.error = message
+
+
+class _UploadCollector:
+    """Callbacks del parser multipart: junta las partes de archivo del campo pedido"""
+
+    def __init__(self, field: str, max_files: int, max_bytes: int, max_total_bytes: int, allow_zip: bool = False,
+                 per_file_errors: bool = False):
+        self.field = field
+        self.allow_zip = allow_zip
+        self.per_file_errors = per_file_errors
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+
+        self.files: List[IngestedFile] = []
+        self._total = 0
+        self._current: Optional[_FilePart] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._current = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        filename = options.get(b"filename")
+        if name != self.field or filename is None:
+            return #otros campos del form se ignoran
+
+        if len(self.files) >= self.max_files:
+            raise UploadRejectedError(f"Demasiados archivos (máximo {self.max_files})")
+        filename = filename.decode("utf-8", errors="replace")
+        if not filename:
+            raise UploadRejectedError("Archivo sin nombre")
+        self._current = _FilePart(filename, self.max_bytes, self.allow_zip, self.per_file_errors)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._current is None:
+            return
+        chunk = data[start:end]
+        self._total += len(chunk)
+        if self._total > self.max_total_bytes:
+            raise UploadRejectedError("El upload supera el tamaño total permitido", status_code=413)
+        self._current.write(chunk)
+
+    def on_part_end(self) -> None:
+        if self._current is not None:
+            self.files.append(self._current.finish())
+            self._current = None
+
+
+async def read_uploads(request: Request, field: str = "file", max_files: int = 1,
+                       max_bytes: Optional[int] = None,
+                       max_total_bytes: Optional[int] = None,
+                       allow_zip: bool = False, per_file_errors: bool = False) -> List[IngestedFile]:
+    """
+    Lee el body multipart en streaming (sin que Starlette lo bufferee entero antes):
+    - corta apenas un archivo supera max_bytes (o el total supera max_total_bytes)
+    - calcula el sha256 a medida que llegan los chunks
+    - valida el tipo por magic bytes en el primer chunk (%PDF / zip de DOCX)
+    allow_zip acepta además archivos .zip (kind "zip"), para el upload batch
+    per_file_errors (batch): un archivo vacío o que no es PDF/DOCX vuelve con error en vez de
+    rechazar el request entero; los límites de tamaño siguen cortando todo
+    """
+    start = time.perf_counter()
+    max_bytes = max_bytes or max_upload_bytes()
+    max_total_bytes = max_total_bytes or max_bytes * max_files
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadRejectedError("Se esperaba un form multipart con el archivo en el campo 'file'")
+
+    #si el cliente declara un body gigante lo rechazamos sin leer nada
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_total_bytes + _MULTIPART_OVERHEAD * max_files:
+        raise UploadRejectedError(
+            f"Archivo muy grande (máximo {max_bytes // (1024 * 1024)}MB)", status_code=413
+        )
+
+    collector = _UploadCollector(field, max_files, max_bytes, max_total_bytes, allow_zip, per_file_errors)
+    parser = MultipartParser(params[b"boundary"], collector.callbacks())
+    async for chunk in request.stream():
+        parser.write(chunk)
+    parser.finalize()
+
+    if not collector.files:
+        raise UploadRejectedError("No se subió ningún archivo")
+    read_seconds = time.perf_counter() - start
+    for file in collector.files:
+        file.read_seconds = read_seconds
+    return collector.files
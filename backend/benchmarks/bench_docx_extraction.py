@@ -0,0 +1,67 @@
+"""
+Compara el extractor DOCX rápido (zip + XML incremental) contra python-docx.
+Uso (desde backend/):
+    python -m benchmarks.bench_docx_extraction [--pages 1 5 20 50] [--repeat 5] [--output results.json]
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+from app.services.docx_extractor import extract_docx_text
+from app.services.pdf_processor import PDFProcessor
+from benchmarks.corpus import make_docx
+
+ENGINES = {
+    "fast": extract_docx_text,
+    "python-docx": PDFProcessor._extract_docx_with_python_docx,
+}
+
+
+def measure(fn, payload: bytes, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = fn(payload)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "chars": len(text),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    results = []
+    for pages in args.pages:
+        payload = make_docx(pages)
+        row = {"pages": pages, "bytes": len(payload)}
+        for name, fn in ENGINES.items():
+            row[name] = measure(fn, payload, args.repeat)
+        row["speedup"] = round(row["python-docx"]["median_ms"] / row["fast"]["median_ms"], 2)
+        row["memory_ratio"] = round(row["python-docx"]["peak_kb"] / row["fast"]["peak_kb"], 2)
+        results.append(row)
+
+    report = json.dumps({"benchmark": "docx_extraction", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark de extracción de PDFs: secuencial vs. por páginas en paralelo (con y sin
+presupuesto de caracteres) vs. cache de texto.
+Uso (desde backend/):
+    python -m benchmarks.bench_pdf_extraction [--pages 1 5 50] [--repeat 3] [--workers 4] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.services import pdf_processor
+from app.services.extraction_executor import ProcessPoolExtractionExecutor, set_extraction_executor
+from app.services.pdf_processor import PDFProcessor
+from benchmarks.corpus import make_pdf
+
+
+def _legacy_extract(file_content: bytes) -> str:
+    """Extracción original: todas las páginas, concatenando con +="""
+    import io
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return PDFProcessor._clean_text(text)
+
+
+async def _timed(coro_factory, repeat: int) -> dict:
+    timings = []
+    text = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = await coro_factory()
+        timings.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(timings) * 1000, 2), "chars": len(text)}
+
+
+async def run(pages_list, repeat: int, workers: int, budget: int) -> list:
+    executor = ProcessPoolExtractionExecutor(max_workers=workers, cpu_deadline=None)
+    set_extraction_executor(executor)
+    executor.start()
+    await executor.run(len, b"warmup") #levantamos los procesos antes de medir
+
+    results = []
+    try:
+        for pages in pages_list:
+            payload = make_pdf(pages)
+            row = {"pages": pages, "bytes": len(payload)}
+
+            row["legacy_single_worker"] = await _timed(lambda: executor.run(_legacy_extract, payload), repeat)
+            row["parallel_no_budget"] = await _timed(lambda: PDFProcessor._extract_from_pdf(payload, char_budget=0), repeat)
+            row["parallel_budget"] = await _timed(lambda: PDFProcessor._extract_from_pdf(payload, char_budget=budget), repeat)
+
+            pdf_processor._text_cache.clear()
+            await PDFProcessor.extract_text_from_file(payload, "cv.pdf")
+            row["text_cache_hit"] = await _timed(lambda: PDFProcessor.extract_text_from_file(payload, "cv.pdf"), repeat)
+            results.append(row)
+    finally:
+        executor.shutdown()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--budget", type=int, default=pdf_processor.PDF_CHAR_BUDGET)
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.pages, args.repeat, args.workers, args.budget))
+    report = json.dumps({
+        "benchmark": "pdf_extraction",
+        "workers": args.workers,
+        "char_budget": args.budget,
+        "results": results
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Mide el índice de CVs casi duplicados (MinHash + LSH) con muchas firmas cargadas.
+Se cargan --real CVs sintéticos del corpus y el resto con firmas al azar hasta llegar a --entries.
+Reporta tiempo de la firma, latencia de búsqueda (p50/p99), recall sobre versiones editadas,
+falsos positivos sobre CVs distintos del mismo template y memoria del índice.
+Uso (desde backend/):
+    python -m benchmarks.bench_similarity [--entries 100000] [--real 1000] [--queries 500] [--output results.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+from app.services.similarity_index import NUM_HASHES, SimilarityIndex, minhash
+from benchmarks.corpus import make_text
+
+
+def edit(text: str, rng: random.Random) -> str:
+    """Versión apenas distinta del CV: cambia el teléfono y agrega un bullet"""
+    lines = text.split("\n")
+    lines[1] = f"juan.perez@mail.com | +54 11 {rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+    lines.insert(rng.randrange(3, len(lines)), "- Armé el pipeline de CI/CD desde cero para 5 servicios")
+    return "\n".join(lines)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--real", type=int, default=1000, help="CVs del corpus (el resto son firmas al azar)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    texts = [make_text(args.pages, seed) for seed in range(args.real)]
+    signature_times = []
+    signatures = []
+    for text in texts:
+        start = time.perf_counter()
+        signatures.append(minhash(text))
+        signature_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    index = SimilarityIndex(threshold=args.threshold, max_entries=args.entries)
+    for number, signature in enumerate(signatures):
+        index.add(f"roast-{number}", signature)
+    for number in range(args.real, args.entries):
+        index.add(f"roast-{number}", os.urandom(NUM_HASHES * 4))
+    resident, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def run_queries(probes):
+        timings, hits = [], []
+        for signature, expected in probes:
+            start = time.perf_counter()
+            matches = index.query(signature)
+            timings.append(time.perf_counter() - start)
+            hits.append(bool(matches) and (expected is None or matches[0][0] == expected))
+        return timings, hits
+
+    picks = [rng.randrange(args.real) for _ in range(args.queries)]
+    near = [(minhash(edit(texts[pick], rng)), f"roast-{pick}") for pick in picks]
+    near_timings, near_hits = run_queries(near)
+
+    unrelated = [(minhash(make_text(args.pages, args.real + seed)), None) for seed in range(args.queries)]
+    unrelated_timings, unrelated_hits = run_queries(unrelated)
+
+    def latency(timings):
+        return {
+            "p50_us": round(statistics.median(timings) * 1e6, 1),
+            "p99_us": round(percentile(timings, 0.99) * 1e6, 1),
+            "max_us": round(max(timings) * 1e6, 1),
+        }
+
+    report = json.dumps({
+        "benchmark": "similarity_index",
+        "entries": len(index),
+        "threshold": args.threshold,
+        "signature_ms": round(statistics.median(signature_times) * 1000, 3),
+        "index_mb": round(resident / (1024 * 1024), 1),
+        "near_duplicates": {"recall": round(sum(near_hits) / len(near_hits), 4), **latency(near_timings)},
+        "unrelated": {
+            "false_positive_rate": round(sum(unrelated_hits) / len(unrelated_hits), 4),
+            **latency(unrelated_timings)
+        },
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
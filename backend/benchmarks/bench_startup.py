@@ -0,0 +1,124 @@
+"""
+Mide el arranque en frío: tiempo de `import app.main` en un proceso nuevo (y qué librerías pesadas
+quedan cargadas), el piso de `import fastapi`, y con uvicorn el tiempo hasta que /health responde
+y hasta que termina el precalentamiento de fondo.
+Para comparar contra otra versión: git worktree add /tmp/old <ref> y correr con --app-dir /tmp/old/backend
+Uso (desde backend/):
+    python -m benchmarks.bench_startup [--runs 5] [--app-dir .] [--no-server] [--output results.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+HEAVY_MODULES = ("openai", "httpx", "PyPDF2", "docx", "lxml")
+
+_IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_time(module: str, app_dir: str, env: dict) -> dict:
+    """Importa module en un intérprete nuevo y devuelve los ms y los módulos pesados cargados"""
+    code = _IMPORT_SNIPPET.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=app_dir, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_json(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.loads(response.read())
+    except Exception:
+        return None
+
+
+def server_start(app_dir: str, env: dict, timeout: float = 30.0) -> dict:
+    """Levanta uvicorn y mide cuándo /health responde y cuándo termina el precalentamiento"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    result = {"health_ms": None, "warmup_ms": None}
+    try:
+        while time.perf_counter() - start < timeout:
+            health = get_json(f"http://127.0.0.1:{port}/health")
+            now = (time.perf_counter() - start) * 1000
+            if health is not None and result["health_ms"] is None:
+                result["health_ms"] = round(now, 1)
+            warmup = (health or {}).get("warmup")
+            if health is not None and (warmup is None or warmup.get("status") in ("done", "failed", "disabled")):
+                result["warmup_ms"] = round(now, 1) if warmup is not None else None
+                result["warmup_status"] = warmup.get("status") if warmup else None
+                break
+            time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait()
+    return result
+
+
+def summarize(values):
+    return {"median": round(statistics.median(values), 1), "min": round(min(values), 1), "max": round(max(values), 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app-dir", default=".", help="directorio backend/ de la versión a medir")
+    parser.add_argument("--no-server", action="store_true", help="solo medir imports (sin uvicorn)")
+    parser.add_argument("--no-prewarm", action="store_true", help="arrancar con PREWARM=0")
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    app_dir = os.path.abspath(args.app_dir)
+    env = {**os.environ, "PYTHONPATH": app_dir}
+    if args.no_prewarm:
+        env["PREWARM"] = "0"
+
+    app_runs = [import_time("app.main", app_dir, env) for _ in range(args.runs)]
+    fastapi_runs = [import_time("fastapi", app_dir, env) for _ in range(args.runs)]
+    report = {
+        "benchmark": "startup",
+        "app_dir": app_dir,
+        "runs": args.runs,
+        "import_app_ms": summarize([run["ms"] for run in app_runs]),
+        "import_fastapi_ms": summarize([run["ms"] for run in fastapi_runs]),
+        "heavy_modules_at_import": app_runs[0]["loaded"],
+    }
+    if not args.no_server:
+        starts = [server_start(app_dir, env) for _ in range(args.runs)]
+        report["health_ready_ms"] = summarize([run["health_ms"] for run in starts if run["health_ms"] is not None])
+        warmups = [run["warmup_ms"] for run in starts if run.get("warmup_ms") is not None]
+        if warmups:
+            report["warmup_done_ms"] = summarize(warmups)
+            report["warmup_status"] = starts[-1].get("warmup_status")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
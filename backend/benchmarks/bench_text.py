@@ -0,0 +1,79 @@
+"""
+Microbenchmarks del procesamiento de texto que corre en el proceso principal después de la
+extracción: PDFProcessor._clean_text, TextCompactor.compact, count_tokens, minhash y fast_roast,
+sobre CVs sintéticos de 1 a 50 páginas (con el ruido típico de un extractor: espacios y líneas vacías).
+Uso (desde backend/):
+    python -m benchmarks.bench_text [--pages 1 5 20 50] [--repeat 20] [--output results.json]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.services.cv_analyzer import fast_roast
+from app.services.pdf_processor import PDFProcessor
+from app.services.similarity_index import minhash
+from app.services.text_compactor import TextCompactor, count_tokens
+from benchmarks.corpus import make_text
+
+
+def raw_text(pages: int, seed: int = 0) -> str:
+    """Texto como sale del extractor: sangrías, espacios de más y líneas vacías entre bloques"""
+    rng = random.Random(seed)
+    lines = []
+    for line in make_text(pages, seed).split("\n"):
+        lines.append(" " * rng.randint(0, 4) + line + " " * rng.randint(0, 3))
+        if rng.random() < 0.3:
+            lines.append(" " * rng.randint(0, 6))
+    return "\n".join(lines)
+
+
+def measure(fn, argument, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(argument)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    compactor = TextCompactor()
+    results = []
+    for pages in args.pages:
+        raw = raw_text(pages)
+        clean = PDFProcessor._clean_text(raw)
+        row = {"pages": pages, "raw_chars": len(raw), "clean_chars": len(clean)}
+        row["clean_text"] = measure(PDFProcessor._clean_text, raw, args.repeat)
+        row["compact"] = measure(compactor.compact, clean, args.repeat)
+        row["count_tokens"] = measure(count_tokens, clean, args.repeat)
+        row["minhash"] = measure(minhash, clean, args.repeat)
+        row["fast_roast"] = measure(fast_roast, clean, args.repeat)
+        row["clean_text"]["mb_per_s"] = round(len(raw) / (row["clean_text"]["median_ms"] / 1000) / 1e6, 1)
+        results.append(row)
+
+    report = json.dumps({
+        "benchmark": "text_processing",
+        "repeat": args.repeat,
+        "token_budget": compactor.token_budget,
+        "results": results
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
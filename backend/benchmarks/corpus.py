@@ -0,0 +1,92 @@
+"""Generador de CVs sintéticos (PDF y DOCX) para los benchmarks"""
+import io
+import random
+from typing import List
+
+from docx import Document
+
+_ROLES = ["Backend Developer", "Data Analyst", "Product Manager", "QA Engineer", "DevOps Engineer"]
+_COMPANIES = ["Globant", "Mercado Libre", "Despegar", "Ualá", "Accenture", "Startup XYZ"]
+_SKILLS = ["Python", "SQL", "Docker", "Kubernetes", "React", "AWS", "Excel", "Scrum", "Go", "Kafka"]
+
+LINES_PER_PAGE = 45
+
+
+def _cv_lines(pages: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    lines = ["Juan Pérez", "juan.perez@mail.com | +54 11 5555-5555 | linkedin.com/in/juanperez", "EXPERIENCIA"]
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines.append(f"{rng.choice(_ROLES)} - {rng.choice(_COMPANIES)} ({rng.randint(2010, 2024)})")
+        for _ in range(rng.randint(2, 5)):
+            lines.append(
+                f"- Lideré la migración de {rng.choice(_SKILLS)} reduciendo costos un {rng.randint(5, 60)}% "
+                f"y mejorando la latencia p95 en {rng.randint(10, 900)}ms para {rng.randint(2, 40)} equipos"
+            )
+    return lines[:pages * LINES_PER_PAGE]
+
+
+def make_text(pages: int, seed: int = 0) -> str:
+    """Texto plano del CV (como lo deja el extractor)"""
+    return "\n".join(_cv_lines(pages, seed))
+
+
+def make_docx(pages: int, seed: int = 0) -> bytes:
+    """DOCX con párrafos, una tabla de skills y header/footer (donde muchos templates guardan datos)"""
+    doc = Document()
+    section = doc.sections[0]
+    section.header.paragraphs[0].text = "Juan Pérez - CV"
+    section.footer.paragraphs[0].text = "juan.perez@mail.com"
+
+    for line in _cv_lines(pages, seed):
+        doc.add_paragraph(line)
+
+    table = doc.add_table(rows=len(_SKILLS), cols=2)
+    for row, skill in enumerate(_SKILLS):
+        table.cell(row, 0).text = skill
+        table.cell(row, 1).text = f"{(row % 5) + 1} años"
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def make_pdf(pages: int, seed: int = 0) -> bytes:
+    """PDF mínimo válido (Helvetica, una columna de texto por página) sin dependencias extra"""
+    lines = _cv_lines(pages, seed)
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    next_id = 4
+    for page in range(pages):
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        kids.append(page_id)
+
+        page_lines = lines[page * LINES_PER_PAGE:(page + 1) * LINES_PER_PAGE]
+        text = " ".join(f"({_escape(line)}) '" for line in page_lines)
+        stream = f"BT /F1 9 Tf 40 790 Td 16 TL {text} ET".encode("latin-1", errors="replace")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in range(1, next_id):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id]))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % next_id)
+    for obj_id in range(1, next_id):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_id, xref))
+    return out.getvalue()
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
@@ -0,0 +1,182 @@
+"""
+Servidor local que imita la API de OpenAI (chat completions con y sin streaming, /models)
+e inyecta latencia, latencia de cola y errores, para probar deadlines, reintentos, hedging y
+el circuit breaker de AIService sin gastar tokens.
+Distribuciones de latencia (--distribution, con --latency y --jitter):
+    fixed: siempre latency | uniform: latency + U(0, jitter) | normal: N(latency, jitter)
+    lognormal: mediana latency y sigma jitter (cola larga) | exponential: media latency
+Uso (desde backend/):
+    python -m benchmarks.fake_openai [--port 8089] [--distribution uniform] [--latency 0.5] [--jitter 0.1]
+        [--slow-rate 0.05] [--slow-latency 5] [--error-rate 0.1] [--error-status 500] [--seed 1]
+y el backend con:
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+La inyección se cambia en caliente con POST /control (ej: {"error_rate": 1}) y GET /control
+devuelve la configuración y los contadores.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.text_compactor import count_tokens
+
+DEFAULT_FAULTS = {
+    "distribution": "uniform",
+    "latency": 0.5, #segundos hasta la respuesta (o hasta el primer chunk)
+    "jitter": 0.1,
+    "slow_rate": 0.0, #fracción de requests con latencia de cola
+    "slow_latency": 5.0,
+    "error_rate": 0.0,
+    "error_status": 500,
+    "chunk_delay": 0.02, #entre chunks del streaming
+}
+
+ROAST = {
+    "roast": "This CV has more buzzwords than a startup pitch deck and fewer results than a broken search bar.",
+    "feedback": [
+        "Quantify your impact with real numbers",
+        "Cut the generic soft skills section",
+        "Lead each bullet with an action verb",
+        "Move your strongest project to the top"
+    ],
+    "brutality_level": 78
+}
+
+
+def sample_latency(rng: random.Random, distribution: str, latency: float, jitter: float) -> float:
+    """Latencia (segundos) de un request según la distribución configurada"""
+    if distribution == "fixed":
+        return latency
+    if distribution == "uniform":
+        return latency + rng.uniform(0, jitter)
+    if distribution == "normal":
+        return max(0.0, rng.gauss(latency, jitter))
+    if distribution == "lognormal":
+        return latency * math.exp(rng.gauss(0, jitter))
+    if distribution == "exponential":
+        return rng.expovariate(1 / latency) if latency > 0 else 0.0
+    raise ValueError(f"Distribución de latencia desconocida: {distribution}")
+
+
+def create_app(seed: Optional[int] = None, **faults: Any) -> FastAPI:
+    """App del servidor falso; faults pisa los valores de DEFAULT_FAULTS y seed fija las latencias/errores"""
+    app = FastAPI(title="Fake OpenAI")
+    config: Dict[str, Any] = {**DEFAULT_FAULTS, **faults}
+    sample_latency(random.Random(), config["distribution"], 0.0, 0.0) #distribución inválida: falla al arrancar
+    counters = {"requests": 0, "errors": 0, "slow": 0, "streams": 0}
+    rng = random.Random(seed)
+
+    async def inject() -> Optional[JSONResponse]:
+        counters["requests"] += 1
+        latency = sample_latency(rng, config["distribution"], config["latency"], config["jitter"])
+        if rng.random() < config["slow_rate"]:
+            counters["slow"] += 1
+            latency = config["slow_latency"]
+        await asyncio.sleep(latency)
+        if rng.random() < config["error_rate"]:
+            counters["errors"] += 1
+            return JSONResponse(
+                status_code=config["error_status"],
+                content={"error": {"message": "Error inyectado por el servidor falso", "type": "server_error"}}
+            )
+        return None
+
+    @app.get("/control")
+    async def get_control():
+        return {"faults": config, "counters": counters}
+
+    @app.post("/control")
+    async def set_control(request: Request):
+        config.update(await request.json())
+        return {"faults": config}
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "gpt-5-mini", "object": "model", "created": 0, "owned_by": "fake"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = await inject()
+        if error is not None:
+            return error
+
+        content = json.dumps(ROAST)
+        prompt_tokens = sum(count_tokens(message.get("content") or "") for message in body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": count_tokens(content),
+            "total_tokens": prompt_tokens + count_tokens(content)
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "gpt-5-mini")
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+
+        counters["streams"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events():
+            for start in range(0, len(content), 16):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[start:start + 16]}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(config["chunk_delay"])
+            if include_usage:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": usage
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--seed", type=int, help="semilla de latencias y errores (reproducible)")
+    for name, default in DEFAULT_FAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    faults = {name: getattr(args, name) for name in DEFAULT_FAULTS}
+    uvicorn.run(create_app(seed=args.seed, **faults), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Servidor local mínimo que habla el protocolo de Redis (RESP2), con lo que usa RedisRoastBackend:
+PING, AUTH, SELECT, GET, MGET, SET (con EX/PX), DEL, PTTL, SCAN (MATCH/COUNT), FLUSHDB y DBSIZE.
+Guarda todo en memoria y vence las claves con TTL; sirve para probar el backend sin un Redis real.
+Uso (desde backend/):
+    python -m benchmarks.fake_redis [--port 6399] [--password secreto]
+y el backend con:
+    ROAST_BACKEND=redis REDIS_URL=redis://127.0.0.1:6399/0
+En código (tests): server = FakeRedis(); await server.start(); ...; await server.stop()
+"""
+import argparse
+import asyncio
+import fnmatch
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _Error(Exception):
+    """Error que se devuelve al cliente como respuesta RESP (-ERR ...)"""
+
+
+class FakeRedis:
+    """Stand-in de Redis en el mismo proceso; commands cuenta los comandos recibidos por nombre"""
+
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self.port: Optional[int] = None
+        self.commands: Dict[str, int] = {}
+        self._databases: Dict[int, Dict[bytes, Tuple[bytes, Optional[float]]]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Escucha en host:port (0 = un puerto libre, queda en self.port)"""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.port}/0"
+
+    def _db(self, index: int) -> Dict[bytes, Tuple[bytes, Optional[float]]]:
+        return self._databases.setdefault(index, {})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = {"db": 0, "authenticated": self.password is None}
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    return
+                try:
+                    reply = self._execute(session, args)
+                except _Error as e:
+                    writer.write(b"-ERR " + str(e).encode() + b"\r\n")
+                else:
+                    writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
+
+    def _execute(self, session: Dict[str, Any], args: List[bytes]) -> Any:
+        name = args[0].decode().upper()
+        self.commands[name] = self.commands.get(name, 0) + 1
+        if name == "AUTH":
+            if args[-1].decode() != self.password:
+                raise _Error("invalid password")
+            session["authenticated"] = True
+            return "OK"
+        if not session["authenticated"]:
+            raise _Error("NOAUTH Authentication required")
+
+        db = self._db(session["db"])
+        if name == "PING":
+            return "PONG"
+        if name == "SELECT":
+            session["db"] = int(args[1])
+            return "OK"
+        if name == "GET":
+            return self._get(db, args[1])
+        if name == "MGET":
+            return [self._get(db, key) for key in args[1:]]
+        if name == "SET":
+            return self._set(db, args[1], args[2], args[3:])
+        if name == "DEL":
+            live = [key for key in args[1:] if self._get(db, key) is not None]
+            for key in live:
+                del db[key]
+            return len(live)
+        if name == "PTTL":
+            if self._get(db, args[1]) is None:
+                return -2
+            expires_at = db[args[1]][1]
+            return -1 if expires_at is None else max(0, int((expires_at - time.time()) * 1000))
+        if name == "SCAN":
+            return self._scan(db, args[1:])
+        if name == "DBSIZE":
+            return sum(1 for key in list(db) if self._get(db, key) is not None)
+        if name == "FLUSHDB":
+            db.clear()
+            return "OK"
+        raise _Error(f"unknown command '{name}'")
+
+    @staticmethod
+    def _get(db: Dict[bytes, Tuple[bytes, Optional[float]]], key: bytes) -> Optional[bytes]:
+        entry = db.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            del db[key] #vencida: se borra al leerla, como Redis
+            return None
+        return entry[0]
+
+    @staticmethod
+    def _set(db: Dict[bytes, Tuple[bytes, Optional[float]]], key: bytes, value: bytes,
+             options: List[bytes]) -> str:
+        expires_at = None
+        options = [option.upper() if i % 2 == 0 else option for i, option in enumerate(options)]
+        for flag, amount in zip(options[::2], options[1::2]):
+            if flag == b"EX":
+                expires_at = time.time() + int(amount)
+            elif flag == b"PX":
+                expires_at = time.time() + int(amount) / 1000
+            else:
+                raise _Error("syntax error")
+        db[key] = (value, expires_at)
+        return "OK"
+
+    def _scan(self, db: Dict[bytes, Tuple[bytes, Optional[float]]], args: List[bytes]) -> List[Any]:
+        #el cursor es la posición en las claves ordenadas: estable mientras no cambien las claves
+        cursor, pattern, count = int(args[0]), None, 10
+        for flag, value in zip(args[1::2], args[2::2]):
+            if flag.upper() == b"MATCH":
+                pattern = value.decode("latin-1")
+            elif flag.upper() == b"COUNT":
+                count = int(value)
+        keys = sorted(db)
+        batch = keys[cursor:cursor + count]
+        next_cursor = cursor + count if cursor + count < len(keys) else 0
+        matches = [
+            key for key in batch
+            if (pattern is None or fnmatch.fnmatchcase(key.decode("latin-1"), pattern))
+            and self._get(db, key) is not None
+        ]
+        return [str(next_cursor).encode(), matches]
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.strip().split() #comando inline (ej: redis-cli / telnet)
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = await reader.readline()
+        length = int(header[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+def _encode(reply: Any) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, str):
+        return b"+" + reply.encode() + b"\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+    raise TypeError(f"Respuesta no soportada: {reply!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6399)
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    async def serve():
+        server = FakeRedis(password=args.password)
+        await server.start(args.host, args.port)
+        print(f"Fake Redis escuchando en {args.host}:{server.port}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
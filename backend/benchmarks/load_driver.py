@@ -0,0 +1,259 @@
+"""
+Generador de carga de lazo abierto: sube CVs a /api/v1/upload-cv a un RPS fijo (no espera a que
+termine el anterior, como el tráfico real) y pide GET /api/v1/roast/{id} de cada uno.
+Reporta throughput, códigos de respuesta y latencia p50/p95/p99 por endpoint en JSON.
+Con --spawn levanta el servidor falso de OpenAI y la API en puertos libres (reproducible, sin red).
+Con --clients N reparte las sesiones entre N API keys (para ver la admisión por cliente); con --spawn
+la cuota por cliente queda desactivada salvo que se pase --admission-rate.
+Uso (desde backend/):
+    python -m benchmarks.load_driver --spawn [--rps 10] [--duration 30] [--unique 0.5] [--clients 4]
+        [--llm-distribution lognormal] [--llm-latency 1.0] [--llm-jitter 0.5] [--llm-error-rate 0.02]
+    python -m benchmarks.load_driver --url http://127.0.0.1:8000 --rps 5 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.corpus import make_pdf
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+
+    def record(self, status: str, seconds: float) -> None:
+        self.statuses[status] += 1
+        self.latencies.append(seconds)
+
+    def report(self, elapsed: float) -> Dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+
+        ok = sum(count for status, count in self.statuses.items() if status.startswith("2"))
+        return {
+            "requests": len(ordered),
+            "ok": ok,
+            "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+            "statuses": dict(self.statuses),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(ordered[-1] * 1000, 1) if ordered else None,
+        }
+
+
+class Corpus:
+    """CVs a subir: una fracción `unique` son nuevos y el resto repite alguno ya subido (pega en cache)"""
+
+    def __init__(self, unique: float, pages: List[int], seed: int):
+        self.unique = unique
+        self.pages = pages
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.sent: List[bytes] = []
+
+    def next(self) -> bytes:
+        if self.sent and self.rng.random() >= self.unique:
+            return self.rng.choice(self.sent)
+        payload = make_pdf(self.rng.choice(self.pages), self.seed * 1_000_000 + len(self.sent))
+        self.sent.append(payload)
+        return payload
+
+
+def api_keys(clients: int) -> List[str]:
+    return [f"load-{number}" for number in range(clients)] if clients > 1 else []
+
+
+async def session(client: httpx.AsyncClient, payload: bytes, stats: Dict[str, EndpointStats],
+                  api_key: Optional[str] = None) -> None:
+    """Un usuario: sube el CV y pide el roast"""
+    headers = {"X-API-Key": api_key} if api_key else {}
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            "/api/v1/upload-cv", files={"file": ("cv.pdf", payload, "application/pdf")}, headers=headers
+        )
+        stats["upload"].record(str(response.status_code), time.perf_counter() - start)
+    except httpx.HTTPError as e:
+        stats["upload"].record(type(e).__name__, time.perf_counter() - start)
+        return
+    if response.status_code != 200:
+        return
+
+    roast_id = response.json()["roast_id"]
+    start = time.perf_counter()
+    try:
+        response = await client.get(f"/api/v1/roast/{roast_id}")
+        stats["get_roast"].record(str(response.status_code), time.perf_counter() - start)
+    except httpx.HTTPError as e:
+        stats["get_roast"].record(type(e).__name__, time.perf_counter() - start)
+
+
+async def run_load(url: str, rps: float, duration: float, corpus: Corpus, max_outstanding: int,
+                   timeout: float, clients: int = 1) -> Dict:
+    stats = {"upload": EndpointStats(), "get_roast": EndpointStats()}
+    total = int(rps * duration)
+    payloads = [corpus.next() for _ in range(total)] #generados antes: el driver no compite por CPU al medir
+    keys = api_keys(clients)
+    tasks = set()
+    dropped = 0
+
+    limits = httpx.Limits(max_connections=max_outstanding, max_keepalive_connections=max_outstanding)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        for number, payload in enumerate(payloads):
+            delay = start + number / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= max_outstanding:
+                dropped += 1 #el cliente no da abasto: lo contamos en vez de frenar el ritmo
+                continue
+            task = asyncio.create_task(session(client, payload, stats, keys[number % len(keys)] if keys else None))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        sending = time.perf_counter() - start
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        server = None
+        try:
+            server = (await client.get("/api/v1/health")).json()
+        except Exception:
+            pass
+
+    report = {
+        "target_rps": rps,
+        "offered_rps": round((total - dropped) / sending, 2) if sending else 0.0,
+        "duration_s": round(elapsed, 2),
+        "sessions": total,
+        "dropped": dropped,
+        "unique_cvs": len(corpus.sent),
+        "endpoints": {name: endpoint.report(elapsed) for name, endpoint in stats.items()},
+    }
+    if server is not None:
+        report["server"] = {
+            "cache": {key: server.get("cache_stats", {}).get(key) for key in ("hits", "misses", "coalesced")},
+            "llm_fallbacks": server.get("llm", {}).get("fallbacks"),
+            "llm_rejected": server.get("llm", {}).get("rejected"),
+            "admission_rate_limited": sum(
+                client["rate_limited"] + client["queue_full"]
+                for client in server.get("admission", {}).get("top_clients", {}).values()
+            ),
+        }
+    return report
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} no respondió en {timeout}s")
+
+
+def spawn(args) -> List[subprocess.Popen]:
+    """Levanta fake_openai y la API (uvicorn) apuntando a él; devuelve los procesos y fija args.url"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fake_port, api_port = free_port(), free_port()
+    quiet = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL, "cwd": backend_dir}
+
+    fake = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_openai", "--port", str(fake_port), "--seed", str(args.seed),
+        "--distribution", args.llm_distribution, "--latency", str(args.llm_latency),
+        "--jitter", str(args.llm_jitter), "--error-rate", str(args.llm_error_rate)
+    ], **quiet)
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{fake_port}/v1",
+        "ADMISSION_RATE": str(args.admission_rate),
+        "ADMISSION_API_KEYS": ",".join(api_keys(args.clients)),
+    }
+    api = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port), "--log-level", "warning"
+    ], env=env, **quiet)
+    processes = [fake, api]
+    try:
+        wait_ready(f"http://127.0.0.1:{fake_port}/control")
+        wait_ready(f"http://127.0.0.1:{api_port}/health")
+    except Exception:
+        for process in processes:
+            process.terminate()
+        raise
+    args.url = f"http://127.0.0.1:{api_port}"
+    return processes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos enviando carga")
+    parser.add_argument("--unique", type=float, default=0.5, help="fracción de CVs nuevos (el resto repite)")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--max-outstanding", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=1, help="API keys distintas entre las que se reparten las sesiones")
+    parser.add_argument("--admission-rate", type=float, default=0.0,
+                        help="con --spawn: CVs nuevos por segundo por cliente (0 = sin cuota)")
+    parser.add_argument("--spawn", action="store_true", help="levantar fake_openai + la API localmente")
+    parser.add_argument("--llm-distribution", default="lognormal")
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--llm-jitter", type=float, default=0.5)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    processes = spawn(args) if args.spawn else []
+    try:
+        corpus = Corpus(args.unique, args.pages, args.seed)
+        report = asyncio.run(run_load(
+            args.url, args.rps, args.duration, corpus, args.max_outstanding, args.timeout, args.clients
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    report = {"benchmark": "load", "url": args.url, "spawned": args.spawn, **report}
+    if args.spawn:
+        report["fake_llm"] = {
+            "distribution": args.llm_distribution, "latency": args.llm_latency,
+            "jitter": args.llm_jitter, "error_rate": args.llm_error_rate
+        }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
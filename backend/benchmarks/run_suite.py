@@ -0,0 +1,152 @@
+"""
+Corre la suite de benchmarks y junta todo en un solo JSON con el commit, para seguir regresiones:
+microbenchmarks (texto, extracción PDF/DOCX, índice de similitud, arranque) y, con --load,
+una corrida del load driver contra fake_openai.
+Con --baseline compara contra un JSON anterior y lista los tiempos que empeoraron más de --threshold.
+Uso (desde backend/):
+    python -m benchmarks.run_suite [--full] [--load] [--only text pdf] [--output bench-$(git rev-parse --short HEAD).json]
+    python -m benchmarks.run_suite --baseline bench-abc123.json --output bench-def456.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+#benchmark -> (módulo, args rápidos, args completos)
+SUITE = {
+    "text": ("benchmarks.bench_text", ["--pages", "1", "5", "50", "--repeat", "10"],
+             ["--pages", "1", "5", "20", "50", "--repeat", "50"]),
+    "pdf": ("benchmarks.bench_pdf_extraction", ["--pages", "1", "5", "50", "--repeat", "2"],
+            ["--pages", "1", "5", "20", "50", "--repeat", "5"]),
+    "docx": ("benchmarks.bench_docx_extraction", ["--pages", "1", "5", "50", "--repeat", "3"],
+             ["--pages", "1", "5", "20", "50", "--repeat", "10"]),
+    "similarity": ("benchmarks.bench_similarity", ["--entries", "10000", "--real", "300", "--queries", "200"],
+                   ["--entries", "100000", "--real", "1000", "--queries", "500"]),
+    "startup": ("benchmarks.bench_startup", ["--runs", "3"], ["--runs", "10"]),
+    "load": ("benchmarks.load_driver", ["--spawn", "--rps", "5", "--duration", "10", "--llm-latency", "0.5"],
+             ["--spawn", "--rps", "10", "--duration", "60", "--llm-latency", "1.0"]),
+}
+
+#Métricas que se comparan con --baseline (tiempos: más alto es peor)
+_TIME_SUFFIXES = ("_ms", "_us")
+
+
+def git_info(cwd: str) -> Dict:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True).stdout.strip()
+        except OSError:
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run_benchmark(module: str, args: List[str], cwd: str) -> Dict:
+    """Corre un benchmark en un proceso aparte (sin estado compartido entre benchmarks)"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        path = f.name
+    try:
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-m", module, *args, "--output", path], cwd=cwd, capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "falló"}
+        with open(path) as f:
+            result = json.load(f)
+        result["wall_s"] = round(time.perf_counter() - start, 1)
+        return result
+    finally:
+        os.unlink(path)
+
+
+def flatten(value, prefix: str = "") -> Dict[str, float]:
+    """{"a": {"b": [{"pages": 5, "x_ms": 1}]}} -> {"a.b[pages=5].x_ms": 1}"""
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = f"pages={item['pages']}" if isinstance(item, dict) and "pages" in item else str(index)
+            flat.update(flatten(item, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = value
+    return flat
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> Tuple[List[Dict], List[Dict]]:
+    """Tiempos que empeoraron (o mejoraron) más que threshold respecto del baseline"""
+    now, before = flatten(current["results"]), flatten(baseline.get("results", {}))
+    regressions, improvements = [], []
+    for key, value in now.items():
+        name = key.rsplit(".", 1)[-1]
+        if not name.endswith(_TIME_SUFFIXES) and not name.startswith(("p50", "p95", "p99", "median")):
+            continue
+        old = before.get(key)
+        if not old or not value:
+            continue
+        change = (value - old) / old
+        row = {"metric": key, "baseline": old, "current": value, "change": round(change, 3)}
+        if change > threshold:
+            regressions.append(row)
+        elif change < -threshold:
+            improvements.append(row)
+    regressions.sort(key=lambda row: row["change"], reverse=True)
+    improvements.sort(key=lambda row: row["change"])
+    return regressions, improvements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITE), help="correr solo estos benchmarks")
+    parser.add_argument("--full", action="store_true", help="parámetros completos (más lento, menos ruido)")
+    parser.add_argument("--load", action="store_true", help="incluir el load test (fake_openai + API)")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.10, help="cambio relativo que cuenta como regresión")
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    names = args.only or [name for name in SUITE if name != "load" or args.load]
+
+    results = {}
+    for name in names:
+        module, quick_args, full_args = SUITE[name]
+        print(f"corriendo {name}...", file=sys.stderr)
+        results[name] = run_benchmark(module, full_args if args.full else quick_args, backend_dir)
+
+    report = {
+        "suite": "full" if args.full else "quick",
+        **git_info(backend_dir),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions, improvements = compare(report, baseline, args.threshold)
+        report["comparison"] = {
+            "baseline_commit": baseline.get("commit"),
+            "threshold": args.threshold,
+            "regressions": regressions,
+            "improvements": improvements,
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if report.get("comparison", {}).get("regressions"):
+        sys.exit(1) #para poder cortar un CI
+
+
+if __name__ == "__main__":
+    main()
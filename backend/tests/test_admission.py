@@ -0,0 +1,76 @@
+"""
+Admisión por cliente: token bucket (cuota de CVs nuevos) y weighted fair queuing sobre los lugares
+Correr desde backend/: python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, RateLimitedError
+
+
+def test_rate_limit_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("ADMISSION_RATE", raising=False)
+    admission = AdmissionController(slots=1)
+    for _ in range(100):
+        admission.check_rate("ip:1")
+
+
+def test_token_bucket_allows_a_burst_then_limits():
+    admission = AdmissionController(slots=1, rate=1, burst=2)
+    admission.check_rate("ip:1")
+    admission.check_rate("ip:1")
+    with pytest.raises(RateLimitedError) as error:
+        admission.check_rate("ip:1")
+    assert error.value.retry_after >= 1
+    admission.check_rate("ip:2") #otro cliente tiene su propio bucket
+
+
+def test_refund_returns_the_token():
+    admission = AdmissionController(slots=1, rate=0.001, burst=1)
+    admission.check_rate("ip:1")
+    admission.refund("ip:1")
+    admission.check_rate("ip:1")
+    with pytest.raises(RateLimitedError):
+        admission.check_rate("ip:1")
+
+
+def test_fair_queuing_takes_turns_between_clients():
+    async def run():
+        admission = AdmissionController(slots=1, rate=0)
+        order = []
+
+        async def job(client: str):
+            await admission.acquire(client)
+            order.append(client)
+            await asyncio.sleep(0)
+            admission.release(client)
+
+        await admission.acquire("busy") #ocupa el único lugar
+        tasks = [asyncio.create_task(job("busy")) for _ in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job("other"))) #llega después de los 3 del otro cliente
+        await asyncio.sleep(0)
+        admission.release("busy")
+        await asyncio.gather(*tasks)
+        assert order.index("other") == 1 #no espera a que pasen los 3 del cliente ocupado
+
+    asyncio.run(run())
+
+
+def test_full_client_queue_is_rejected_and_cancel_frees_it():
+    async def run():
+        admission = AdmissionController(slots=1, rate=0, max_queue=1)
+        await admission.acquire("ip:1")
+        waiting = asyncio.create_task(admission.acquire("ip:1"))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimitedError):
+            await admission.acquire("ip:1")
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert admission.get_stats()["waiting"] == 0
+        admission.release("ip:1")
+        assert admission.get_stats()["free_slots"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,243 @@
+"""
+Deadline, reintentos, hedging, streaming y circuit breaker de AIService contra el servidor falso de
+benchmarks/fake_openai.py, montado en el mismo proceso (httpx.ASGITransport, sin sockets)
+Correr desde backend/: python -m pytest tests
+"""
+import asyncio
+import time
+
+import httpx
+import openai
+
+from app.services.ai_service import AIService
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.services.model_router import ModelBackend, ModelRouter
+from benchmarks import fake_openai
+
+CV_TEXT = "Senior Developer with 10 years of experience in Python, FastAPI and distributed systems. " * 5
+
+
+class FakeProvider:
+    """AIService con un solo backend que apunta al servidor falso, más un cliente para /control"""
+
+    def __init__(self, breaker: CircuitBreaker = None, **faults):
+        app = fake_openai.create_app(seed=1, **{"latency": 0.0, "jitter": 0.0, **faults})
+        transport = httpx.ASGITransport(app=app)
+        self.backend = ModelBackend("fake", base_url="http://fake/v1", api_key="fake",
+                                    breaker=breaker or CircuitBreaker(failure_threshold=5, reset_timeout=30))
+        self.backend.client = openai.AsyncOpenAI(
+            api_key="fake", base_url="http://fake/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=transport, base_url="http://fake/v1")
+        )
+        self.control = httpx.AsyncClient(transport=transport, base_url="http://fake")
+
+        self.service = AIService()
+        self.service.router = ModelRouter([self.backend])
+        self.service.use_openai = True
+        self.service.retry_backoff = 0.0
+
+    async def set_faults(self, **faults) -> None:
+        await self.control.post("/control", json=faults)
+
+    async def counters(self) -> dict:
+        return (await self.control.get("/control")).json()["counters"]
+
+    async def close(self) -> None:
+        await self.service.close()
+        await self.control.aclose()
+
+
+def _run(test):
+    async def wrapper():
+        provider = FakeProvider()
+        try:
+            await test(provider)
+        finally:
+            await provider.close()
+    asyncio.run(wrapper())
+
+
+def test_success_returns_provider_roast():
+    async def test(provider):
+        data = await provider.service.generate_roast_and_feedback(CV_TEXT)
+        assert data.get("fallback") is None
+        assert data["brutality_level"] == 78
+        assert data["input_tokens_estimated"] is False
+        assert (await provider.counters())["requests"] == 1
+    _run(test)
+
+
+def test_retries_retryable_errors_up_to_max_retries():
+    async def test(provider):
+        await provider.set_faults(error_rate=1, error_status=500)
+        provider.service.max_retries = 2
+        data = await provider.service.generate_roast_and_feedback(CV_TEXT)
+        assert data["fallback"] == "error"
+        assert provider.service.get_stats()["retries"] == 2
+        assert (await provider.counters())["requests"] == 3
+    _run(test)
+
+
+def test_does_not_retry_client_errors():
+    async def test(provider):
+        await provider.set_faults(error_rate=1, error_status=400)
+        data = await provider.service.generate_roast_and_feedback(CV_TEXT)
+        assert data["fallback"] == "error"
+        assert provider.service.get_stats()["retries"] == 0
+        assert (await provider.counters())["requests"] == 1
+        assert provider.backend.breaker.get_stats()["consecutive_failures"] == 0 #un 400 es culpa nuestra
+    _run(test)
+
+
+def test_deadline_falls_back_and_counts_timeout():
+    async def test(provider):
+        await provider.set_faults(latency=1.0)
+        provider.service.deadline = 0.1
+        start = time.monotonic()
+        data = await provider.service.generate_roast_and_feedback(CV_TEXT)
+        assert time.monotonic() - start < 0.5
+        assert data["fallback"] == "timeout"
+        assert provider.service.get_stats()["timeouts"] == 1
+    _run(test)
+
+
+async def _stream_events(provider):
+    return [event async for event in provider.service.stream_roast_and_feedback(CV_TEXT)]
+
+
+def test_stream_emits_validated_roast_without_replace():
+    async def test(provider):
+        events = await _stream_events(provider)
+        kinds = [event["type"] for event in events]
+        assert kinds == ["roast"] + ["feedback"] * 4 + ["result"]
+        assert events[0]["value"] == events[-1]["data"]["roast"]
+    _run(test)
+
+
+def test_stream_replaces_content_that_fails_validation(monkeypatch):
+    monkeypatch.setattr(fake_openai, "ROAST", {**fake_openai.ROAST, "brutality_level": "very"})
+
+    async def test(provider):
+        events = await _stream_events(provider)
+        assert [event["type"] for event in events[:5]] == ["roast"] + ["feedback"] * 4
+        replace, result = events[-2], events[-1]
+        assert replace["type"] == "replace" and result["type"] == "result"
+        assert result["data"]["fallback"] == "error"
+        assert replace["roast"] == result["data"]["roast"] != events[0]["value"]
+        assert replace["feedback"] == result["data"]["feedback"]
+    _run(test)
+
+
+def _leftover_tasks():
+    return [task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()]
+
+
+def test_hedge_wins_and_cancels_slow_request():
+    async def test(provider):
+        provider.service.hedge = True
+        provider.service.hedge_min_samples = 1
+        provider.backend.record(0.05, ok=True) #p95 = 50ms: el hedge sale a los 50ms
+        await provider.set_faults(slow_rate=1, slow_latency=5.0) #el primer request queda colgado
+
+        async def unstick():
+            await asyncio.sleep(0.02)
+            await provider.set_faults(slow_rate=0) #el hedge ya responde rápido
+
+        start = time.monotonic()
+        data, _ = await asyncio.gather(provider.service.generate_roast_and_feedback(CV_TEXT), unstick())
+        assert time.monotonic() - start < 1.0 #no esperamos al request lento
+        assert data.get("fallback") is None
+        stats = provider.service.get_stats()
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+        assert (await provider.counters())["requests"] == 2
+        await asyncio.sleep(0.01)
+        assert _leftover_tasks() == [] #el request lento se canceló
+    _run(test)
+
+
+def test_hedge_loser_is_cancelled_when_first_request_wins():
+    async def test(provider):
+        provider.service.hedge = True
+        provider.service.hedge_min_samples = 1
+        provider.backend.record(0.05, ok=True)
+        await provider.set_faults(latency=0.2)
+
+        data = await provider.service.generate_roast_and_feedback(CV_TEXT)
+        assert data.get("fallback") is None
+        stats = provider.service.get_stats()
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 0
+        await asyncio.sleep(0.01)
+        assert _leftover_tasks() == []
+    _run(test)
+
+
+def test_no_hedge_without_enough_samples():
+    async def test(provider):
+        provider.service.hedge = True
+        provider.service.hedge_min_samples = 20
+        await provider.set_faults(latency=0.05)
+        await provider.service.generate_roast_and_feedback(CV_TEXT)
+        assert provider.service.get_stats()["hedges"] == 0
+        assert (await provider.counters())["requests"] == 1
+    _run(test)
+
+
+def test_breaker_opens_short_circuits_and_recovers():
+    async def test(provider):
+        breaker = provider.backend.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        provider.service.max_retries = 0
+        await provider.set_faults(error_rate=1, error_status=503)
+
+        for _ in range(2):
+            assert (await provider.service.generate_roast_and_feedback(CV_TEXT))["fallback"] == "error"
+        assert breaker.state == OPEN
+
+        #abierto: ni se llama al proveedor
+        assert (await provider.service.generate_roast_and_feedback(CV_TEXT))["fallback"] == "circuit_open"
+        assert (await provider.counters())["requests"] == 2
+
+        #pasado el reset, un request de prueba que anda lo cierra
+        await asyncio.sleep(0.1)
+        await provider.set_faults(error_rate=0)
+        data = await provider.service.generate_roast_and_feedback(CV_TEXT)
+        assert data.get("fallback") is None
+        assert breaker.state == CLOSED
+        assert (await provider.counters())["requests"] == 3
+    _run(test)
+
+
+def test_breaker_failed_probe_reopens():
+    async def test(provider):
+        breaker = provider.backend.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        provider.service.max_retries = 0
+        await provider.set_faults(error_rate=1, error_status=500)
+
+        await provider.service.generate_roast_and_feedback(CV_TEXT)
+        assert breaker.state == OPEN
+        await asyncio.sleep(0.05)
+        assert (await provider.service.generate_roast_and_feedback(CV_TEXT))["fallback"] == "error"
+        assert breaker.state == OPEN
+        assert breaker.get_stats()["opens"] == 2
+    _run(test)
+
+
+def test_breaker_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow() #pasó el reset: el primero es la prueba
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.release() #la prueba se canceló: puede salir otra
+    assert breaker.allow()
+
+
+def test_breaker_failures_while_open_do_not_delay_the_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    opened_at = breaker._opened_at
+    time.sleep(0.03)
+    breaker.record_failure() #un request que salió antes de abrir
+    assert breaker._opened_at == opened_at
+    time.sleep(0.03)
+    assert breaker.allow()
+    assert breaker.get_stats()["opens"] == 1
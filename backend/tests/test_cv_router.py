@@ -0,0 +1,64 @@
+"""
+Endpoints de /api/v1 con la app entera en el mismo proceso (TestClient), la extracción inline
+y el LLM local (sin OPENAI_API_KEY)
+Correr desde backend/: python -m pytest tests
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import cv_router
+from app.services.extraction_executor import InlineExtractionExecutor, get_extraction_executor, set_extraction_executor
+from app.services.job_queue import QueueFullError
+from benchmarks.corpus import make_pdf
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("PREWARM", "0")
+    previous = get_extraction_executor()
+    set_extraction_executor(InlineExtractionExecutor())
+    with TestClient(app) as client:
+        yield client
+    set_extraction_executor(previous)
+
+
+def _upload(client, pdf: bytes, **params):
+    return client.post("/api/v1/upload-cv", params=params, files=[("file", ("cv.pdf", pdf, "application/pdf"))])
+
+
+def test_get_roast_has_etag_and_answers_304(client):
+    roast_id = _upload(client, make_pdf(1, seed=21)).json()["roast_id"]
+    response = client.get(f"/api/v1/roast/{roast_id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.json()["roast_id"] == roast_id
+
+    for header in (etag, f"W/{etag}", f'"otro", {etag}', "*"):
+        cached = client.get(f"/api/v1/roast/{roast_id}", headers={"If-None-Match": header})
+        assert cached.status_code == 304 and cached.headers["etag"] == etag
+    assert client.get(f"/api/v1/roast/{roast_id}", headers={"If-None-Match": '"otro"'}).status_code == 200
+
+
+def test_async_reupload_of_a_cached_cv_completes_without_queueing(client):
+    pdf = make_pdf(1, seed=22)
+    roast_id = _upload(client, pdf).json()["roast_id"]
+    submitted = cv_router.job_queue.get_stats()
+    response = _upload(client, pdf, **{"async": "true"}).json()
+    assert response["processing_status"] == "completed" and response["roast_id"] == roast_id
+    assert cv_router.job_queue.get_stats() == submitted
+
+
+def test_full_queue_refunds_the_rate_limit_token(client, monkeypatch):
+    monkeypatch.setattr(cv_router.admission, "rate", 0.001)
+    monkeypatch.setattr(cv_router.admission, "burst", 1)
+    submit = cv_router.job_queue.submit
+
+    def full_once(*args, **kwargs):
+        monkeypatch.setattr(cv_router.job_queue, "submit", submit)
+        raise QueueFullError("La cola de CVs está llena", retry_after=5)
+
+    monkeypatch.setattr(cv_router.job_queue, "submit", full_once)
+    assert _upload(client, make_pdf(1, seed=23), **{"async": "true"}).status_code == 503
+    #el token volvió: el próximo CV nuevo no recibe 429
+    assert _upload(client, make_pdf(1, seed=24), **{"async": "true"}).status_code == 200
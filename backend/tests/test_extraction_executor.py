@@ -0,0 +1,44 @@
+"""
+Pool de procesos de extracción: reutiliza los workers entre jobs y corta los que pasan el deadline de CPU
+Correr desde backend/: python -m pytest tests
+"""
+import asyncio
+import os
+
+import pytest
+
+from app.services.extraction_executor import ExtractionTimeoutError, ProcessPoolExtractionExecutor
+
+
+def _spin() -> None:
+    while True:
+        pass
+
+
+def _with_pool(test, **kwargs):
+    async def run():
+        executor = ProcessPoolExtractionExecutor(**{"max_workers": 1, **kwargs})
+        try:
+            await test(executor)
+        finally:
+            executor.shutdown()
+    asyncio.run(run())
+
+
+def test_consecutive_jobs_run_on_the_same_worker():
+    async def test(executor):
+        first = await executor.run(os.getpid)
+        second = await executor.run(os.getpid)
+        assert first == second != os.getpid()
+        assert executor.get_stats()["pools_retired"] == 0
+    _with_pool(test, cpu_deadline=10.0)
+
+
+def test_cpu_deadline_cuts_the_job_and_keeps_the_worker():
+    async def test(executor):
+        pid = await executor.run(os.getpid)
+        with pytest.raises(ExtractionTimeoutError):
+            await executor.run(_spin)
+        assert await executor.run(os.getpid) == pid
+        assert executor.get_stats()["timed_out"] == 1
+    _with_pool(test, cpu_deadline=1.0)
@@ -0,0 +1,215 @@
+"""
+Backends compartidos de roasts: SQLite en un archivo temporal y Redis contra el stand-in
+RESP de benchmarks/fake_redis.py (en el mismo proceso, en un puerto libre)
+Correr desde backend/: python -m pytest tests
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.roast_backends import RedisError, RedisRoastBackend, SQLiteRoastBackend
+from benchmarks.fake_redis import FakeRedis
+
+
+def _result(roast_id: str, created_at: datetime) -> dict:
+    return {"roast_id": roast_id, "roast_text": f"roast de {roast_id}", "created_at": created_at.isoformat()}
+
+
+def _results(count: int) -> list:
+    base = datetime.now() - timedelta(minutes=count)
+    return [_result(f"roast-{i:03d}", base + timedelta(minutes=i)) for i in range(count)]
+
+
+async def _scan_all(backend, limit: int, during_page=None, **kwargs) -> list:
+    seen, cursor, page = [], None, 0
+    while True:
+        results, cursor = await backend.scan(cursor, limit, **kwargs)
+        seen.extend(result["roast_id"] for result in results)
+        if cursor is None:
+            return seen
+        if during_page is not None:
+            await during_page(page)
+        page += 1
+
+
+def test_sqlite_does_not_touch_disk_until_started(tmp_path):
+    path = tmp_path / "roasts.db"
+
+    async def run():
+        backend = SQLiteRoastBackend(str(path), ttl_seconds=60)
+        assert not path.exists()
+        await backend.start()
+        assert path.exists()
+        await backend.close()
+
+    asyncio.run(run())
+
+
+def test_sqlite_put_get_delete_and_index(tmp_path):
+    async def run():
+        backend = SQLiteRoastBackend(str(tmp_path / "roasts.db"), ttl_seconds=60)
+        await backend.start()
+        try:
+            result = _results(1)[0]
+            await backend.put(result["roast_id"], result)
+            await backend.set_index("file:abc", result["roast_id"])
+            await backend.flush()
+            assert await backend.get(result["roast_id"]) == result
+            assert await backend.get_index("file:abc") == result["roast_id"]
+            assert await backend.delete(result["roast_id"])
+            await backend.flush()
+            assert await backend.get(result["roast_id"]) is None
+            assert await backend.get_index("file:abc") is None
+        finally:
+            await backend.close()
+
+    asyncio.run(run())
+
+
+def test_sqlite_scan_is_stable_when_rows_are_saved_again(tmp_path):
+    async def run():
+        backend = SQLiteRoastBackend(str(tmp_path / "roasts.db"), ttl_seconds=60)
+        await backend.start()
+        try:
+            results = _results(30)
+            for result in results:
+                await backend.put(result["roast_id"], result)
+            await backend.flush()
+
+            async def resave(page: int):
+                #se reescriben uno ya devuelto y uno que todavía no salió
+                for result in (results[page * 7], results[-1 - page]):
+                    await backend.put(result["roast_id"], {**result, "roast_text": "reescrito"})
+                await backend.flush()
+
+            seen = await _scan_all(backend, 7, during_page=resave)
+            assert sorted(seen) == [result["roast_id"] for result in results]
+            assert len(seen) == len(set(seen))
+        finally:
+            await backend.close()
+
+    asyncio.run(run())
+
+
+def test_sqlite_scan_filters_by_created_at(tmp_path):
+    async def run():
+        backend = SQLiteRoastBackend(str(tmp_path / "roasts.db"), ttl_seconds=60)
+        await backend.start()
+        try:
+            results = _results(10)
+            for result in results:
+                await backend.put(result["roast_id"], result)
+            since = datetime.fromisoformat(results[3]["created_at"]).timestamp()
+            until = datetime.fromisoformat(results[7]["created_at"]).timestamp()
+            seen = await _scan_all(backend, 2, since=since, until=until)
+            assert seen == [result["roast_id"] for result in results[3:7]]
+        finally:
+            await backend.close()
+
+    asyncio.run(run())
+
+
+def _with_redis(test, ttl_seconds: float = 60, password: str = None):
+    async def run():
+        server = FakeRedis(password=password)
+        await server.start()
+        backend = RedisRoastBackend(server.url, ttl_seconds=ttl_seconds, pool_size=2)
+        try:
+            await backend.start()
+            await test(backend, server)
+        finally:
+            await backend.close()
+            await server.stop()
+    asyncio.run(run())
+
+
+def test_redis_put_get_delete():
+    async def test(backend, server):
+        result = _results(1)[0]
+        assert await backend.get(result["roast_id"]) is None
+        await backend.put(result["roast_id"], result)
+        assert await backend.get(result["roast_id"]) == result
+        assert await backend.delete(result["roast_id"])
+        assert not await backend.delete(result["roast_id"])
+        assert await backend.get(result["roast_id"]) is None
+    _with_redis(test)
+
+
+def test_redis_index_and_signatures():
+    async def test(backend, server):
+        await backend.set_index("text:abc", "roast-001")
+        assert await backend.get_index("text:abc") == "roast-001"
+        assert await backend.get_index("text:otro") is None
+        signatures = {f"roast-{i:03d}": bytes([i]) * 8 for i in range(5)}
+        for roast_id, signature in signatures.items():
+            await backend.put_signature(roast_id, signature)
+        assert dict(await backend.load_signatures(100)) == signatures
+        assert len(await backend.load_signatures(3)) == 3
+    _with_redis(test)
+
+
+def test_redis_ttl_expires_entries():
+    async def test(backend, server):
+        result = _results(1)[0]
+        await backend.put(result["roast_id"], result)
+        await backend.set_index("file:abc", result["roast_id"])
+        ttl_ms = await backend.command("PTTL", backend.prefix + result["roast_id"])
+        assert 0 < ttl_ms <= 200
+        await asyncio.sleep(0.25)
+        assert await backend.get(result["roast_id"]) is None
+        assert await backend.get_index("file:abc") is None
+    _with_redis(test, ttl_seconds=0.2)
+
+
+def test_redis_without_ttl_keeps_entries():
+    async def test(backend, server):
+        await backend.put("roast-001", _results(1)[0])
+        assert await backend.command("PTTL", backend.prefix + "roast-001") == -1
+    _with_redis(test, ttl_seconds=0)
+
+
+def test_redis_scan_pages_skip_index_and_signature_keys():
+    async def test(backend, server):
+        results = _results(250)
+        for result in results:
+            await backend.put(result["roast_id"], result)
+            await backend.set_index(f"file:{result['roast_id']}", result["roast_id"])
+            await backend.put_signature(result["roast_id"], b"sig")
+        seen = await _scan_all(backend, 40)
+        assert sorted(seen) == [result["roast_id"] for result in results]
+        assert len(seen) == len(set(seen))
+        assert server.commands["SCAN"] > 1 #más de un lote de SCAN
+    _with_redis(test)
+
+
+def test_redis_scan_filters_by_created_at():
+    async def test(backend, server):
+        results = _results(20)
+        for result in results:
+            await backend.put(result["roast_id"], result)
+        since = datetime.fromisoformat(results[5]["created_at"]).timestamp()
+        until = datetime.fromisoformat(results[12]["created_at"]).timestamp()
+        seen = await _scan_all(backend, 3, since=since, until=until)
+        assert sorted(seen) == [result["roast_id"] for result in results[5:12]]
+    _with_redis(test)
+
+
+def test_redis_clear_counts_only_roasts():
+    async def test(backend, server):
+        for result in _results(3):
+            await backend.put(result["roast_id"], result)
+            await backend.set_index(f"file:{result['roast_id']}", result["roast_id"])
+        assert await backend.clear() == 3
+        assert await backend.command("DBSIZE") == 0
+    _with_redis(test)
+
+
+def test_redis_auth_and_errors():
+    async def test(backend, server):
+        await backend.put("roast-001", _results(1)[0])
+        assert server.commands["AUTH"] == 1 #una sola conexión abierta y reutilizada
+        with pytest.raises(RedisError):
+            await backend.command("NOPE")
+        assert await backend.get("roast-001") is not None #la conexión sigue sana después del error
+    _with_redis(test, password="secreto")
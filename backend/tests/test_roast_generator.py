@@ -0,0 +1,132 @@
+"""
+Single-flight, admisión y alias de RoastGenerator, con el LLM del servidor falso de benchmarks/fake_openai.py
+(ver FakeProvider en test_ai_service.py) y la extracción inline
+Correr desde backend/: python -m pytest tests
+"""
+import asyncio
+
+from app.services.extraction_executor import InlineExtractionExecutor, get_extraction_executor, set_extraction_executor
+from app.services.roast_generator import RoastGenerator
+from benchmarks.corpus import make_pdf
+from test_ai_service import FakeProvider
+
+
+def _with_generator(test, **faults):
+    async def run():
+        previous = get_extraction_executor()
+        set_extraction_executor(InlineExtractionExecutor())
+        provider = FakeProvider(**faults)
+        generator = RoastGenerator()
+        generator.ai_service = provider.service
+        try:
+            await test(generator, provider)
+        finally:
+            await provider.close()
+            set_extraction_executor(previous)
+    asyncio.run(run())
+
+
+async def _stream(generator, pdf: bytes) -> list:
+    return [event async for event in generator.stream_cv_file(pdf, "cv.pdf")]
+
+
+def test_concurrent_streams_and_uploads_share_one_llm_call():
+    async def test(generator, provider):
+        pdf = make_pdf(1, seed=7)
+        stream = generator.stream_cv_file(pdf, "cv.pdf")
+        first = [await stream.__anext__()] #el stream arrancó el procesamiento
+        second, upload = await asyncio.gather(_stream(generator, pdf), generator.process_cv_file(pdf, "cv.pdf"))
+        first += [event async for event in stream]
+
+        assert (await provider.counters())["requests"] == 1
+        assert generator.get_cache_stats()["coalesced"] == 2
+        #el que arrancó recibe el stream del LLM; el otro stream recibe el roast entero cuando termina
+        assert [event["type"] for event in first][:2] == ["fast_roast", "roast"]
+        assert [event["type"] for event in second][0] == "roast"
+        roast_ids = {first[-1]["data"]["roast_id"], second[-1]["data"]["roast_id"], upload["roast_id"]}
+        assert len(roast_ids) == 1
+        assert generator.get_cache_stats()["in_flight"] == 0
+    _with_generator(test, latency=0.2)
+
+
+def test_stream_leader_leaving_keeps_the_flight_for_other_waiters():
+    async def test(generator, provider):
+        pdf = make_pdf(1, seed=8)
+        stream = generator.stream_cv_file(pdf, "cv.pdf")
+        assert (await stream.__anext__())["type"] == "fast_roast"
+        upload = asyncio.ensure_future(generator.process_cv_file(pdf, "cv.pdf"))
+        await asyncio.sleep(0.01)
+        await stream.aclose() #el cliente del stream se fue
+        result = await upload
+        assert result.get("fallback") is None
+        assert (await provider.counters())["requests"] == 1
+    _with_generator(test, latency=0.2)
+
+
+def test_leader_cancelled_while_follower_waits_keeps_processing():
+    async def test(generator, provider):
+        pdf = make_pdf(1, seed=9)
+        leader = asyncio.ensure_future(generator.process_cv_file(pdf, "cv.pdf"))
+        await asyncio.sleep(0.05)
+        follower = asyncio.ensure_future(generator.process_cv_file(pdf, "cv.pdf"))
+        await asyncio.sleep(0.01)
+        leader.cancel() #el cliente que lo arrancó se fue
+
+        result = await follower
+        assert result.get("fallback") is None and result["from_cache"] is True
+        assert (await provider.counters())["requests"] == 1
+        assert await generator.get_roast(result["roast_id"]) is not None
+    _with_generator(test, latency=0.2)
+
+
+def test_last_waiter_leaving_cancels_the_work():
+    async def test(generator, provider):
+        pdf = make_pdf(1, seed=10)
+        upload = asyncio.ensure_future(generator.process_cv_file(pdf, "cv.pdf"))
+        await asyncio.sleep(0.05)
+        assert generator.get_cache_stats()["in_flight"] == 1
+        upload.cancel()
+        await asyncio.sleep(0.01)
+        assert generator.get_cache_stats()["in_flight"] == 0
+        assert len(generator.store) == 0 #no se guardó nada a medias
+    _with_generator(test, latency=0.5)
+
+
+def test_errors_reach_every_waiter():
+    async def test(generator, provider):
+        broken = b"%PDF-1.4 esto no es un PDF"
+        results = await asyncio.gather(
+            generator.process_cv_file(broken, "cv.pdf"), generator.process_cv_file(broken, "cv.pdf"),
+            return_exceptions=True
+        )
+        assert all(isinstance(result, Exception) for result in results)
+        assert generator.get_cache_stats()["coalesced"] == 1
+        assert generator.get_cache_stats()["in_flight"] == 0
+    _with_generator(test)
+
+
+def test_followers_get_stages_and_preview():
+    async def test(generator, provider):
+        pdf = make_pdf(1, seed=11)
+        stages, previews = [], []
+        leader = asyncio.ensure_future(generator.process_cv_file(pdf, "cv.pdf", on_preview=lambda p: None))
+        await asyncio.sleep(0.05) #ya está esperando al LLM
+        await generator.process_cv_file(pdf, "cv.pdf", on_stage=stages.append, on_preview=previews.append)
+        await leader
+        assert stages == ["roasting"] #el que llega tarde recibe la etapa actual
+        assert len(previews) == 1
+    _with_generator(test, latency=0.2)
+
+
+def test_async_job_ids_alias_a_cached_roast():
+    async def test(generator, provider):
+        pdf = make_pdf(1, seed=12)
+        first = await generator.process_cv_file(pdf, "cv.pdf", roast_id="job-1")
+        again = await generator.process_cv_file(pdf, "cv.pdf", roast_id="job-2")
+        assert first["roast_id"] == again["roast_id"] == "job-1"
+        assert len(generator.store) == 1 #una sola copia del roast
+        assert (await generator.get_roast("job-2"))["roast_id"] == "job-1"
+        assert (await generator.get_roast_response("job-2")) == (await generator.get_roast_response("job-1"))
+        assert await generator.delete_roast("job-2") #borrar el alias borra el roast
+        assert await generator.get_roast("job-1") is None
+    _with_generator(test)
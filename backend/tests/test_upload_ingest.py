@@ -0,0 +1,96 @@
+"""
+Ingesta en streaming del multipart: tope de tamaño, tipo por magic bytes y sha256 mientras llega
+Correr desde backend/: python -m pytest tests
+"""
+import asyncio
+import hashlib
+
+import pytest
+from starlette.requests import Request
+
+from app.services.upload_ingest import UploadRejectedError, read_uploads
+from benchmarks.corpus import make_pdf
+
+BOUNDARY = "testboundary"
+
+
+def _multipart(*parts) -> bytes:
+    body = b""
+    for field, filename, content in parts:
+        body += (
+            f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(body: bytes, chunk_size: int = 4096, content_length: int = None):
+    """Request con el body en chunks; chunks_read cuenta cuántos se leyeron"""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    state = {"chunks_read": 0}
+
+    async def receive():
+        index = state["chunks_read"]
+        state["chunks_read"] += 1
+        return {"type": "http.request", "body": chunks[index], "more_body": index + 1 < len(chunks)}
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers, "query_string": b""}
+    return Request(scope, receive), state, len(chunks)
+
+
+def _read(body: bytes, **kwargs):
+    request, _, _ = _request(body)
+    return asyncio.run(read_uploads(request, **kwargs))
+
+
+def test_reads_file_with_digest_and_kind():
+    pdf = make_pdf(1)
+    files = _read(_multipart(("file", "cv.pdf", pdf)))
+    assert len(files) == 1
+    assert files[0].content == pdf
+    assert files[0].digest == hashlib.sha256(pdf).hexdigest()
+    assert files[0].kind == "pdf"
+
+
+def test_oversized_file_stops_reading_early():
+    body = _multipart(("file", "cv.pdf", b"%PDF-1.4\n" + b"x" * 200_000))
+    request, state, total_chunks = _request(body)
+    with pytest.raises(UploadRejectedError) as error:
+        asyncio.run(read_uploads(request, max_bytes=20_000))
+    assert error.value.status_code == 413
+    assert state["chunks_read"] < total_chunks / 2
+
+
+def test_declared_content_length_over_the_limit_is_rejected_before_reading():
+    request, state, _ = _request(_multipart(("file", "cv.pdf", make_pdf(1))), content_length=50 * 1024 * 1024)
+    with pytest.raises(UploadRejectedError) as error:
+        asyncio.run(read_uploads(request, max_bytes=1024 * 1024))
+    assert error.value.status_code == 413
+    assert state["chunks_read"] == 0
+
+
+@pytest.mark.parametrize("filename, content", [
+    ("cv.pdf", b"hola, no soy un PDF" * 100),
+    ("cv.docx", make_pdf(1)), #contenido PDF con extensión de DOCX
+    ("cv.doc", b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 2000),
+    ("cv.pdf", b""),
+])
+def test_rejects_wrong_kind_and_empty_files(filename, content):
+    with pytest.raises(UploadRejectedError) as error:
+        _read(_multipart(("file", filename, content)))
+    assert error.value.status_code == 400
+
+
+def test_per_file_errors_keep_the_valid_files():
+    pdf = make_pdf(1)
+    files = _read(
+        _multipart(("files", "a.pdf", pdf), ("files", "b.txt", b"texto"), ("files", "c.pdf", b"")),
+        field="files", max_files=3, per_file_errors=True
+    )
+    assert [file.error for file in files] == [
+        None, "El archivo no es un PDF ni un DOCX válido", "El archivo está vacío"
+    ]
+    assert files[0].content == pdf